@@ -6,6 +6,7 @@ from .models import (
     AssetType,
     DisposalRecord,
     Employee,
+    ImportJob,
     RepairStatus,
 )
 
@@ -15,3 +16,4 @@ admin.site.register(Employee)
 admin.site.register(AssetDocument)
 admin.site.register(RepairStatus)
 admin.site.register(DisposalRecord)
+admin.site.register(ImportJob)
@@ -7,3 +7,5 @@ class AssetsConfig(AppConfig):
 
     def ready(self):
         import assets.signals  # noqa
+        import common.query_stats  # noqa
+        import common.sqlite  # noqa
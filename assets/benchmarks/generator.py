@@ -0,0 +1,218 @@
+"""
+Synthetic inventory for benchmarks.
+
+``generate_inventory`` fills the database with employees, asset types,
+assets, their history and document rows, skewed the way a real inventory is:
+a few employees hold many assets, desktops and monitors outnumber printers,
+most assets are working and a share is unassigned. The same seed always
+produces the same data.
+
+Rows are inserted with ``bulk_create`` a batch at a time, so signals do not
+run; the inventory summary and the search index are rebuilt at the end.
+Document rows point at a placeholder path; no files are written.
+"""
+import random
+import string
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from ..models import (
+    Asset,
+    AssetDocument,
+    AssetHistory,
+    AssetType,
+    Employee,
+)
+from ..services.choices import invalidate_employee_choices
+from ..services.csv_import import chunked
+from ..services.inventory import rebuild_inventory_summary
+from ..services.search import get_search_backend
+from ..services.summary import invalidate_asset_summary
+
+SIZES = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000}
+
+# (name, weight, models)
+ASSET_TYPES = [
+    ("Desktop", 30, ["HP 280 G4 MT", "HP Slimline 260", "Dell OptiPlex 3080"]),
+    ("Monitor", 25, ["HP W185", "Dell P2419H", "LG 22MK400", "Samsung S24R350"]),
+    ("Laptop", 15, ["HP ProBook 440", "Dell Latitude 5420", "Lenovo ThinkPad E14"]),
+    ("Keyboard and Mouse", 15, ["HP Combo", "Logitech MK270", "Dell KM117"]),
+    ("UPS", 8, ["APC BX600", "Cyberpower 600VA", "Luminous 1KVA"]),
+    ("Printer", 5, ["HP Laserjet M1136 MFP", "HP Laserjet 1020 Plus", "Canon LBP2900"]),
+    ("Speaker", 2, ["Creative SBS", "Amazon Basics", "iBall Decor"]),
+]
+CONDITIONS = [
+    ("working", 80),
+    ("damaged", 7),
+    ("repair", 5),
+    ("obsolete", 5),
+    ("disposed", 3),
+]
+UNASSIGNED_SHARE = 0.15
+ASSETS_PER_EMPLOYEE = 8
+HISTORY_SPAN = timedelta(days=3 * 365)
+
+FIRST_NAMES = [
+    "Amit", "Priya", "Rahul", "Sneha", "Vikram", "Anjali", "Suresh", "Kavita",
+    "Rajesh", "Pooja", "Arjun", "Meena", "Sanjay", "Divya", "Manoj", "Nisha",
+]
+LAST_NAMES = [
+    "Sharma", "Patel", "Das", "Iyer", "Reddy", "Gupta", "Nair", "Singh",
+    "Roy", "Mehta", "Bose", "Rao", "Ghosh", "Kumar", "Pillai", "Sen",
+]
+SECTIONS = ["Admin", "Accounts", "Establishment", "IT Cell", "Legal", "Stores"]
+
+
+@contextmanager
+def _explicit_timestamps(*fields):
+    """Let bulk_create keep the given auto_now_add values instead of using now()."""
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def _serial(rng):
+    return "".join(rng.choices(string.ascii_uppercase + string.digits, k=10))
+
+
+def _create_employees(rng, count):
+    employees = [
+        Employee(
+            # numbered so names stay unique at any size
+            first_name=rng.choice(FIRST_NAMES),
+            last_name=f"{rng.choice(LAST_NAMES)} {n}",
+            section=rng.choice(SECTIONS),
+            designation="Staff",
+        )
+        for n in range(count)
+    ]
+    Employee.objects.bulk_create(employees, batch_size=1000)
+    invalidate_employee_choices()
+    return list(Employee.objects.order_by("id").values_list("id", flat=True))
+
+
+def _employee_weights(rng, count):
+    # Pareto: most employees hold a handful of assets, a few hold dozens
+    return [rng.paretovariate(1.5) for _ in range(count)]
+
+
+def _build_assets(rng, count, types, employee_ids, employee_weights, now):
+    type_weights = [weight for _, weight, _ in ASSET_TYPES]
+    conditions = [condition for condition, _ in CONDITIONS]
+    condition_weights = [weight for _, weight in CONDITIONS]
+    assignees = rng.choices(employee_ids, weights=employee_weights, k=count)
+    assets = []
+    for n in range(count):
+        name, _, models = rng.choices(ASSET_TYPES, weights=type_weights)[0]
+        computer = name in ("Desktop", "Laptop")
+        assets.append(
+            Asset(
+                type_id=types[name],
+                make_model=rng.choice(models),
+                serial_number=_serial(rng),
+                year_of_purchase=rng.randint(2012, 2025),
+                ram=rng.choice(["4 GB", "8 GB", "16 GB"]) if computer else None,
+                os=rng.choice(["Win-10", "Win-11"]) if computer else None,
+                condition=rng.choices(conditions, weights=condition_weights)[0],
+                alloted_to_id=None if rng.random() < UNASSIGNED_SHARE else assignees[n],
+                created_at=now - HISTORY_SPAN * rng.random(),
+            )
+        )
+    return assets
+
+
+def _build_history(rng, assets, employee_ids, now):
+    history = []
+    for asset in assets:
+        history.append(
+            AssetHistory(
+                asset_id=asset.pk,
+                employee_id=asset.alloted_to_id,
+                action="created",
+                timestamp=asset.created_at,
+                remarks="Asset record created",
+            )
+        )
+        # a fifth of the assets have moved around since
+        if rng.random() < 0.2:
+            timestamp = asset.created_at
+            for _ in range(rng.randint(1, 4)):
+                timestamp += (now - timestamp) * rng.random()
+                action = rng.choice(
+                    ["transferred", "transferred", "repaired", "returned"]
+                )
+                history.append(
+                    AssetHistory(
+                        asset_id=asset.pk,
+                        employee_id=rng.choice(employee_ids),
+                        action=action,
+                        timestamp=timestamp,
+                        remarks=f"System auto-logged change: {action}",
+                    )
+                )
+    return history
+
+
+def generate_inventory(size, seed=0, batch_size=5000, stdout=None):
+    """
+    Create ``size`` assets with their employees, types, history and
+    documents. Returns {model name: rows created}.
+    """
+    rng = random.Random(seed)
+    now = timezone.now()
+
+    AssetType.objects.bulk_create(
+        [AssetType(name=name) for name, _, _ in ASSET_TYPES], ignore_conflicts=True
+    )
+    types = dict(AssetType.objects.values_list("name", "id"))
+    employee_ids = _create_employees(rng, max(1, size // ASSETS_PER_EMPLOYEE))
+    employee_weights = _employee_weights(rng, len(employee_ids))
+
+    counts = {"employees": len(employee_ids), "assets": 0, "history": 0, "documents": 0}
+    with _explicit_timestamps(Asset._meta.get_field("created_at")):
+        for batch in chunked(range(size), batch_size):
+            assets = _build_assets(
+                rng, len(batch), types, employee_ids, employee_weights, now
+            )
+            with transaction.atomic():
+                Asset.objects.bulk_create(assets)
+                if any(asset.pk is None for asset in assets):
+                    # Backends that cannot return ids from bulk inserts
+                    ids = dict(
+                        Asset.objects.filter(
+                            asset_tag__in=[asset.asset_tag for asset in assets]
+                        ).values_list("asset_tag", "id")
+                    )
+                    for asset in assets:
+                        asset.pk = ids[asset.asset_tag]
+
+                history = _build_history(rng, assets, employee_ids, now)
+                AssetHistory.objects.bulk_create(history, batch_size=1000)
+                documents = [
+                    AssetDocument(
+                        asset_id=asset.pk,
+                        name="Invoice",
+                        document=f"benchmark/{asset.asset_tag}/invoice.pdf",
+                    )
+                    for asset in assets
+                    if rng.random() < 0.05
+                ]
+                AssetDocument.objects.bulk_create(documents, batch_size=1000)
+
+            counts["assets"] += len(assets)
+            counts["history"] += len(history)
+            counts["documents"] += len(documents)
+            if stdout:
+                stdout.write(f"  {counts['assets']}/{size} assets")
+
+    rebuild_inventory_summary()
+    get_search_backend().rebuild()
+    invalidate_asset_summary()
+    return counts
@@ -0,0 +1,229 @@
+"""
+Timed benchmark scenarios, run through the Django test client.
+
+Every scenario is a function taking a logged-in ``Client`` and the run's
+``BenchmarkData``. ``run_scenario`` records its wall time, its SQL queries
+(including those run while a streaming response is consumed) and its peak
+Python memory.
+"""
+import csv
+import io
+import random
+import statistics
+import time
+import tracemalloc
+from contextlib import ExitStack
+
+from django.db import connections
+from django.db.models import Max, Min
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from common.query_stats import QueryRecorder
+
+from ..models import Asset, Employee
+from .generator import ASSET_TYPES
+
+BULK_UPLOAD_ROWS = 1000
+BULK_ACTION_ASSETS = 500
+PAGES_DEEP = 10
+
+
+class BenchmarkData:
+    """Ids and search terms picked once from the generated data."""
+
+    def __init__(self, seed=0):
+        self.rng = random.Random(seed)
+        self.asset_ids = self._sample(Asset, BULK_ACTION_ASSETS)
+        self.employee_ids = self._sample(Employee, 10)
+        self.search_terms = [
+            self.rng.choice(ASSET_TYPES)[2][0].split()[0],  # a make, e.g. "HP"
+            Employee.objects.values_list("last_name", flat=True).first() or "",
+        ]
+
+    def _sample(self, model, k):
+        """Pick up to ``k`` existing ids without ORDER BY RANDOM() over the table."""
+        bounds = model.objects.aggregate(low=Min("id"), high=Max("id"))
+        if bounds["low"] is None:
+            return []
+        population = range(bounds["low"], bounds["high"] + 1)
+        candidates = self.rng.sample(population, min(k, len(population)))
+        return sorted(
+            model.objects.filter(pk__in=candidates).values_list("id", flat=True)
+        )
+
+
+def _consume(response):
+    if response.streaming:
+        for _ in response.streaming_content:
+            pass
+    else:
+        response.content
+    assert response.status_code < 400, f"{response.status_code} from {response}"
+    return response
+
+
+def _get(client, url, **params):
+    return _consume(client.get(url, params))
+
+
+def _upload_csv(rows, seed):
+    rng = random.Random(seed)
+    header = (
+        "Sl.No.,Alloted To,Device,Make model,Serial No.,PROCESSOR,RAM,HDD,SSD,OS,"
+        "Year of Purchase,Monitor,Monitor Serial number,Monitor Year of Purchase,"
+        "Keyboard and Mouse,UPS,UPS Serial number,UPS Year of Purchase,"
+        "Printer,Printer Serial number,Printer Year of Purchase,Speaker,"
+        "Condition,REMARKS"
+    ).split(",")
+    out = io.StringIO()
+    writer = csv.DictWriter(out, fieldnames=header)
+    writer.writeheader()
+    for n in range(rows):
+        writer.writerow(
+            {
+                "Sl.No.": n + 1,
+                "Alloted To": f"Upload User{rng.randint(1, rows // 4 + 1)}",
+                "Device": rng.choice(["Desktop", "Laptop"]),
+                "Make model": "HP 280 G4 MT",
+                "Serial No.": f"UP{rng.getrandbits(40):X}",
+                "RAM": "8 GB",
+                "OS": "Win-11",
+                "Year of Purchase": rng.randint(2015, 2025),
+                "Monitor": "HP W185",
+                "Monitor Serial number": f"MO{rng.getrandbits(40):X}",
+                "Keyboard and Mouse": "HP Combo",
+                "Condition": "Desktop: Working; Monitor: Working",
+            }
+        )
+    upload = io.BytesIO(out.getvalue().encode())
+    upload.name = "benchmark.csv"
+    return upload
+
+
+@override_settings(BULK_UPLOAD_ASYNC=False)
+def bulk_upload(client, data):
+    upload = _upload_csv(BULK_UPLOAD_ROWS, data.rng.random())
+    _consume(client.post(reverse("bulk_upload"), {"csv_file": upload}))
+
+
+def export_current_data(client, data):
+    _get(client, reverse("export_current_data"))
+
+
+def dashboard(client, data):
+    _get(client, reverse("dashboard"))
+
+
+def dashboard_search(client, data):
+    _get(client, reverse("dashboard"), q=data.search_terms[0])
+
+
+def asset_list(client, data):
+    _get(client, reverse("asset_list"))
+
+
+def asset_list_search(client, data):
+    for term in data.search_terms:
+        _get(client, reverse("asset_list"), q=term)
+
+
+def asset_list_pagination(client, data):
+    """Follow the Next link PAGES_DEEP pages into the list."""
+    url = reverse("asset_list")
+    cursor = None
+    for _ in range(PAGES_DEEP):
+        response = client.get(url, {"cursor": cursor} if cursor else {})
+        _consume(response)
+        page = response.context["page"]
+        if not page.has_next:
+            break
+        cursor = page.next_cursor
+
+
+def history_list(client, data):
+    _get(client, reverse("history_list"))
+    _get(client, reverse("history_list"), action="transferred")
+
+
+def history_writes_single(client, data):
+    """Edit assets one at a time through asset_update, as a user would."""
+    for asset in Asset.objects.filter(pk__in=data.asset_ids[:20]):
+        employee_id = data.rng.choice(data.employee_ids)
+        form = {
+            "type": asset.type_id,
+            "make_model": asset.make_model,
+            "serial_number": asset.serial_number or "",
+            "year_of_purchase": asset.year_of_purchase,
+            "condition": "repair" if asset.condition == "working" else "working",
+            "alloted_to": employee_id,
+            "is_active": "on",
+            "documents-TOTAL_FORMS": 0,
+            "documents-INITIAL_FORMS": 0,
+        }
+        _consume(client.post(reverse("asset_update", args=[asset.pk]), form))
+
+
+def history_writes_bulk(client, data):
+    """Reassign BULK_ACTION_ASSETS assets with one bulk action."""
+    _consume(
+        client.post(
+            reverse("asset_bulk_action"),
+            {
+                "action": "reassign",
+                "employee": data.rng.choice(data.employee_ids),
+                "asset_ids": data.asset_ids,
+            },
+        )
+    )
+
+
+SCENARIOS = {
+    "bulk_upload": bulk_upload,
+    "export_current_data": export_current_data,
+    "dashboard": dashboard,
+    "dashboard_search": dashboard_search,
+    "asset_list": asset_list,
+    "asset_list_search": asset_list_search,
+    "asset_list_pagination": asset_list_pagination,
+    "history_list": history_list,
+    "history_writes_single": history_writes_single,
+    "history_writes_bulk": history_writes_bulk,
+}
+
+
+def _run_once(scenario, client, data):
+    recorder = QueryRecorder()
+    start = time.perf_counter()
+    with ExitStack() as stack:
+        for alias in connections:
+            stack.enter_context(connections[alias].execute_wrapper(recorder))
+        scenario(client, data)
+    return (time.perf_counter() - start) * 1000, recorder
+
+
+def run_scenario(scenario, client, data, repeat=3):
+    """
+    Run ``scenario`` ``repeat`` times and once more under tracemalloc, which
+    slows it down too much to time, for its peak memory.
+    """
+    runs = [_run_once(scenario, client, data) for _ in range(repeat)]
+    tracemalloc.start()
+    try:
+        _run_once(scenario, client, data)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    timings = [elapsed for elapsed, _ in runs]
+    recorder = runs[-1][1]
+    return {
+        "runs": repeat,
+        "min_ms": round(min(timings), 1),
+        "median_ms": round(statistics.median(timings), 1),
+        "max_ms": round(max(timings), 1),
+        "queries": max(recorder.count for _, recorder in runs),
+        "db_ms": round(statistics.median(r.duration for _, r in runs) * 1000, 1),
+        "duplicate_queries": sum(n - 1 for _, n in recorder.duplicates()),
+        "peak_memory_kib": round(peak / 1024),
+    }
@@ -1,6 +1,7 @@
 from django import forms
 
-from ..models import Asset, AssetDocument
+from ..models import CONDITION_CHOICES, Asset, AssetDocument
+from ..services.choices import employee_choices
 
 class AssetForm(forms.ModelForm):
     class Meta:
@@ -37,4 +38,58 @@ class AssetForm(forms.ModelForm):
 class AssetDocumentForm(forms.ModelForm):
     class Meta:
         model = AssetDocument
-        fields = ['name', 'document']
\ No newline at end of file
+        fields = ['name', 'document']
+
+class BulkAssetActionForm(forms.Form):
+    ACTIONS = [
+        ("reassign", "Reassign to"),
+        ("condition", "Set condition to"),
+        ("deactivate", "Deactivate"),
+    ]
+
+    action = forms.ChoiceField(
+        choices=ACTIONS, widget=forms.Select(attrs={"class": "select"})
+    )
+    # An Employee id; the options come from the cached employee_choices()
+    # so rendering the asset list does not query every employee
+    employee = forms.TypedChoiceField(
+        coerce=int,
+        empty_value=None,
+        required=False,
+        widget=forms.Select(attrs={"class": "select"}),
+    )
+    condition = forms.ChoiceField(
+        choices=[("", "---------")] + CONDITION_CHOICES,
+        required=False,
+        widget=forms.Select(attrs={"class": "select"}),
+    )
+    remarks = forms.CharField(
+        required=False,
+        widget=forms.TextInput(attrs={"class": "input", "placeholder": "Remarks"}),
+    )
+    asset_ids = forms.Field(required=False, widget=forms.MultipleHiddenInput)
+    # apply to every asset matching the list filters instead of the ticked ones
+    select_all = forms.BooleanField(required=False)
+
+    def __init__(self, *args, employees=None, **kwargs):
+        """``employees`` is the employee_choices() list, if already loaded."""
+        super().__init__(*args, **kwargs)
+        if employees is None:
+            employees = employee_choices()
+        self.fields["employee"].choices = [("", "Nobody (unassign)")] + [
+            (emp["id"], f"{emp['first_name']} {emp['last_name']}") for emp in employees
+        ]
+
+    def clean_asset_ids(self):
+        try:
+            return [int(pk) for pk in self.cleaned_data["asset_ids"] or []]
+        except (TypeError, ValueError):
+            raise forms.ValidationError("Invalid asset selection.")
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if cleaned_data.get("action") == "condition" and not cleaned_data.get("condition"):
+            self.add_error("condition", "Choose the new condition.")
+        if not cleaned_data.get("select_all") and not cleaned_data.get("asset_ids"):
+            raise forms.ValidationError("Select at least one asset.")
+        return cleaned_data
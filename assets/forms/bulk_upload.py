@@ -1,4 +1,17 @@
-from django import forms
-
-class BulkUploadForm(forms.Form):
-    csv_file = forms.FileField(label="CSV File")
\ No newline at end of file
+from django import forms
+
+class BulkUploadForm(forms.Form):
+    csv_file = forms.FileField(label="CSV File")
+    update_existing = forms.BooleanField(
+        label="Update existing assets",
+        required=False,
+        help_text=(
+            "Update the assets whose type and serial number are already stored "
+            "instead of adding them again."
+        ),
+    )
+    validate_only = forms.BooleanField(
+        label="Validate only",
+        required=False,
+        help_text="Compare the file with the current inventory without importing it.",
+    )
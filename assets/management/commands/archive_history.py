@@ -0,0 +1,56 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from assets.services.history_archive import archive_history
+
+
+class Command(BaseCommand):
+    help = (
+        "Move AssetHistory rows older than the retention window to the archive, "
+        "collapsing runs of quick reassignments."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=365,
+            help="Keep this many days of history in the live table (default: 365).",
+        )
+        parser.add_argument(
+            "--collapse-minutes",
+            type=int,
+            default=10,
+            help=(
+                "Collapse assign/transfer rows of one asset that follow each other "
+                "within this many minutes (default: 10; 0 disables)."
+            ),
+        )
+        parser.add_argument(
+            "--export-dir",
+            help=(
+                "Write the archived rows to monthly gzip JSONL files in this "
+                "directory instead of the AssetHistoryArchive table. Exported "
+                "rows leave the database: history_list cannot show them."
+            ),
+        )
+
+    def handle(self, *args, **options):
+        if options["days"] < 0 or options["collapse_minutes"] < 0:
+            raise CommandError("--days and --collapse-minutes must not be negative.")
+
+        before = timezone.now() - timedelta(days=options["days"])
+        result = archive_history(
+            before,
+            window=timedelta(minutes=options["collapse_minutes"]),
+            export_dir=options["export_dir"],
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Archived {result.archived} history row(s) of {result.assets} "
+                f"asset(s) older than {before:%Y-%m-%d %H:%M}; "
+                f"collapsed {result.collapsed} redundant row(s)."
+            )
+        )
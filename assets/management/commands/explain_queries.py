@@ -0,0 +1,166 @@
+import re
+from contextlib import ExitStack
+
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test import RequestFactory
+from django.urls import resolve
+
+from assets.models import AssetType, Employee
+from common.query_stats import fingerprint
+
+# Tables big enough that a full scan or a sort of them is worth flagging
+WATCHED_TABLES = {"assets_asset", "assets_assethistory", "assets_assethistoryarchive"}
+
+# SQLite: "SCAN assets_asset" without "USING ... INDEX"; PostgreSQL: "Seq Scan on"
+_SQLITE_SCAN = re.compile(r"\bSCAN (\w+)(?! USING)(?:\s|$)")
+_POSTGRES_SCAN = re.compile(r"Seq Scan on (\w+)")
+_SQLITE_SORT = re.compile(r"USE TEMP B-TREE FOR (?:ORDER BY|GROUP BY)")
+_POSTGRES_SORT = re.compile(r"Sort Key")
+
+
+SORT = "sort without an index"
+
+
+def view_requests():
+    """
+    Yield the (label, path, expected) requests whose queries are explained.
+    ``expected`` are the problems that request has by design and that are
+    reported without being counted.
+    """
+    type_id = AssetType.objects.values_list("id", flat=True).first()
+    employee_id = Employee.objects.values_list("id", flat=True).first()
+    # The dashboard sorts the assets of the employees on one page only
+    yield "dashboard", "/", {SORT}
+    yield "dashboard search", "/?q=hp", {SORT}
+    yield "asset_list", "/assets/", set()
+    yield "asset_list by type", f"/assets/?type={type_id}", set()
+    yield "asset_list by assignee", f"/assets/?assigned={employee_id}", set()
+    yield "asset_list assigned", "/assets/?assigned=true", set()
+    yield "asset_list by status", "/assets/?status=repair", set()
+    # Search results are sorted by their rank in the search index
+    yield "asset_list search", "/assets/?q=hp", {SORT}
+    yield "history_list", "/history/", set()
+    yield "history_list by action", "/history/?action=transferred", set()
+    yield "history_list by employee", f"/history/?employee={employee_id}", set()
+    yield "history_list by date", "/history/?date_from=2024-01-01&date_to=2024-12-31", set()
+    # The export reads every asset, and sorts the peripherals (found through
+    # the type index) by id to pick each employee's first one of a type
+    yield (
+        "export_current_data",
+        "/export-data/",
+        {"full scan of assets_asset", SORT},
+    )
+
+
+class CaptureSelects:
+    """
+    Execute wrapper that records every distinct SELECT with its parameters
+    and the alias it ran on (read-only views read through their own alias).
+    """
+
+    def __init__(self):
+        self.queries = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        if sql.lstrip().upper().startswith("SELECT"):
+            alias = context["connection"].alias
+            self.queries.setdefault(fingerprint(sql), (alias, sql, params))
+        return execute(sql, params, many, context)
+
+
+class Command(BaseCommand):
+    help = (
+        "Run the main pages against the database, EXPLAIN every SELECT they "
+        "issue and flag full scans and sorts of the large tables."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Print the plan of every query, not only the flagged ones.",
+        )
+        parser.add_argument(
+            "--fail-on-scan",
+            action="store_true",
+            help="Exit with an error if any query is flagged.",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor not in ("sqlite", "postgresql"):
+            raise CommandError(f"EXPLAIN is not supported for {connection.vendor}.")
+
+        # An unsaved superuser: the pages need a user, not a session
+        user = User(username="explain", is_staff=True, is_superuser=True)
+
+        async def auser():
+            return user
+
+        factory = RequestFactory()
+        flagged = 0
+        for label, path, expected in view_requests():
+            request = factory.get(path)
+            request.user = user
+            request.auser = auser
+            capture = CaptureSelects()
+            with ExitStack() as stack:
+                for conn in connections.all():
+                    stack.enter_context(conn.execute_wrapper(capture))
+                match = resolve(request.path_info)
+                view = match.func
+                if iscoroutinefunction(view):
+                    view = async_to_sync(view)
+                response = view(request, *match.args, **match.kwargs)
+                if response.streaming:
+                    for _ in response:
+                        pass
+
+            self.stdout.write(self.style.MIGRATE_HEADING(f"{label} ({path})"))
+            for alias, sql, params in capture.queries.values():
+                plan = self.explain(alias, sql, params)
+                problems = self.problems(plan)
+                unexpected = [problem for problem in problems if problem not in expected]
+                flagged += bool(unexpected)
+                if unexpected:
+                    self.stdout.write(self.style.WARNING(f"  {', '.join(unexpected)}"))
+                elif problems:
+                    self.stdout.write(f"  expected: {', '.join(problems)}")
+                if problems or options["all"]:
+                    self.stdout.write(f"    {sql[:200]}")
+                    for line in plan:
+                        self.stdout.write(f"      {line}")
+
+        if flagged:
+            message = f"{flagged} query plan(s) flagged."
+            if options["fail_on_scan"]:
+                raise CommandError(message)
+            self.stdout.write(self.style.WARNING(message))
+        else:
+            self.stdout.write(self.style.SUCCESS("No unexpected scans or sorts of the large tables."))
+
+    def explain(self, alias, sql, params):
+        prefix = "EXPLAIN QUERY PLAN " if connection.vendor == "sqlite" else "EXPLAIN "
+        with connections[alias].cursor() as cursor:
+            cursor.execute(prefix + sql, params)
+            rows = cursor.fetchall()
+        # SQLite rows are (id, parent, notused, detail); PostgreSQL rows are (line,)
+        return [row[-1] for row in rows]
+
+    def problems(self, plan):
+        if connection.vendor == "sqlite":
+            scan, sort = _SQLITE_SCAN, _SQLITE_SORT
+        else:
+            scan, sort = _POSTGRES_SCAN, _POSTGRES_SORT
+        problems = []
+        for line in plan:
+            match = scan.search(line)
+            if match and match.group(1) in WATCHED_TABLES:
+                problems.append(f"full scan of {match.group(1)}")
+        # A sort is only worth flagging when it sorts the rows of a large table
+        sorts = any(sort.search(line) for line in plan)
+        if sorts and any(table in line for line in plan for table in WATCHED_TABLES):
+            problems.append(SORT)
+        return problems
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from assets.services.inventory import (
+    rebuild_inventory_summary,
+    verify_inventory_summary,
+)
+from assets.services.summary import invalidate_asset_summary
+
+
+class Command(BaseCommand):
+    help = "Rebuild the InventorySummary table from Asset, or verify it against Asset."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--verify",
+            action="store_true",
+            help="Only compare the summary with Asset and report differences.",
+        )
+
+    def handle(self, *args, **options):
+        if options["verify"]:
+            differences = verify_inventory_summary()
+            for (employee_id, type_id, condition), stored, actual in differences:
+                self.stdout.write(
+                    f"employee={employee_id} type={type_id} condition={condition!r}: "
+                    f"summary {stored}, actual {actual}"
+                )
+            if differences:
+                raise CommandError(
+                    f"{len(differences)} summary row(s) differ; "
+                    "run rebuild_inventory_summary to fix."
+                )
+            self.stdout.write(self.style.SUCCESS("Inventory summary is up to date."))
+            return
+
+        rows = rebuild_inventory_summary()
+        invalidate_asset_summary()
+        self.stdout.write(self.style.SUCCESS(f"Inventory summary rebuilt ({rows} rows)."))
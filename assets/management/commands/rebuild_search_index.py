@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from assets.services.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = "Rebuild the asset search index from the Asset table."
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        backend.rebuild()
+        self.stdout.write(
+            self.style.SUCCESS(f"Search index rebuilt ({type(backend).__name__}).")
+        )
@@ -0,0 +1,145 @@
+import json
+import platform
+import subprocess
+
+import django
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import (
+    override_settings,
+    setup_databases,
+    setup_test_environment,
+    teardown_databases,
+    teardown_test_environment,
+)
+from django.utils import timezone
+
+from assets.benchmarks.generator import SIZES, generate_inventory
+from assets.benchmarks.scenarios import SCENARIOS, BenchmarkData, run_scenario
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=settings.BASE_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a synthetic inventory in a throwaway test database and time "
+        "the main pages and write paths against it."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--size",
+            choices=sorted(SIZES),
+            default="1k",
+            help="Number of generated assets (default: 1k).",
+        )
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=0,
+            help="Seed for the generated data (default: 0).",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=3,
+            help="Timed runs per scenario (default: 3).",
+        )
+        parser.add_argument(
+            "--scenario",
+            action="append",
+            choices=sorted(SCENARIOS),
+            help="Run only this scenario; may be given more than once.",
+        )
+        parser.add_argument("--output", help="Write the results as JSON to this file.")
+        parser.add_argument(
+            "--keepdb",
+            action="store_true",
+            help=(
+                "Keep the test database and its generated data for the next "
+                "--keepdb run (needs a test database on disk, see TEST NAME)."
+            ),
+        )
+
+    def handle(self, *args, **options):
+        if options["repeat"] < 1:
+            raise CommandError("--repeat must be at least 1.")
+        names = options["scenario"] or list(SCENARIOS)
+
+        setup_test_environment()
+        # Also points mirror aliases (e.g. "readonly") at the test database
+        old_config = setup_databases(
+            verbosity=0, interactive=False, keepdb=options["keepdb"]
+        )
+        try:
+            results = self._run(names, options)
+        finally:
+            teardown_databases(old_config, verbosity=0, keepdb=options["keepdb"])
+            teardown_test_environment()
+
+        if options["output"]:
+            with open(options["output"], "w") as output:
+                json.dump(results, output, indent=2)
+            self.stdout.write(
+                self.style.SUCCESS(f"Results written to {options['output']}.")
+            )
+
+    def _run_scenario(self, name, client, data, repeat):
+        result = run_scenario(SCENARIOS[name], client, data, repeat)
+        self.stdout.write(
+            f"{name:<24} median {result['median_ms']:>9.1f} ms  "
+            f"{result['queries']:>5} queries  "
+            f"peak {result['peak_memory_kib']:>7} KiB"
+        )
+        return result
+
+    def _run(self, names, options):
+        size = SIZES[options["size"]]
+        if options["keepdb"] and User.objects.filter(username="benchmark").exists():
+            self.stdout.write("Reusing the generated data of the kept test database.")
+            counts = None
+        else:
+            self.stdout.write(f"Generating {options['size']} assets...")
+            counts = generate_inventory(size, seed=options["seed"], stdout=self.stdout)
+            User.objects.create_superuser("benchmark", "benchmark@example.com", None)
+
+        client = Client()
+        client.force_login(User.objects.get(username="benchmark"))
+        data = BenchmarkData(seed=options["seed"])
+
+        scenarios = {}
+        # The results report the query counts; don't log every slow request too
+        with override_settings(QUERY_STATS_LOG_QUERIES=None, QUERY_STATS_LOG_MS=None):
+            for name in names:
+                scenarios[name] = self._run_scenario(
+                    name, client, data, options["repeat"]
+                )
+
+        return {
+            "meta": {
+                "size": options["size"],
+                "seed": options["seed"],
+                "repeat": options["repeat"],
+                "generated": counts,
+                "commit": _git_commit(),
+                "run_at": timezone.now().isoformat(),
+                "python": platform.python_version(),
+                "django": django.get_version(),
+                "database": connection.vendor,
+            },
+            "scenarios": scenarios,
+        }
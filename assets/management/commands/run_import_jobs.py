@@ -0,0 +1,52 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from assets.services.import_jobs import (
+    claim_next_job,
+    fail_stale_jobs,
+    run_import_job,
+)
+
+
+class Command(BaseCommand):
+    help = "Process queued bulk CSV import jobs."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Process the jobs currently queued, then exit.",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=2.0,
+            help="Seconds to wait between polls of an empty queue (default: 2).",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            help=(
+                "Processes that parse each file while it is imported "
+                "(default: settings.BULK_IMPORT_WORKERS)."
+            ),
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            for stale in fail_stale_jobs():
+                self.stdout.write(f"Import job {stale.pk} failed: {stale.message}")
+            job = claim_next_job()
+            if job is None:
+                if options["once"]:
+                    return
+                time.sleep(options["poll_interval"])
+                continue
+
+            self.stdout.write(f"Running import job {job.pk}...")
+            job = run_import_job(job, workers=options["workers"])
+            self.stdout.write(
+                f"Import job {job.pk} {job.status}: {job.message} "
+                f"({job.error_count} error(s))"
+            )
@@ -0,0 +1,44 @@
+from django.db import migrations
+
+FTS_TABLE = "assets_asset_fts"
+
+
+def create_search_index(apps, schema_editor):
+    """Create and fill the SQLite FTS5 asset index; other databases skip it."""
+    connection = schema_editor.connection
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        cursor.execute("PRAGMA compile_options")
+        if "ENABLE_FTS5" not in {row[0] for row in cursor.fetchall()}:
+            return
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+            "make_model, serial_number, type_name, employee_name, "
+            "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+        )
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE}"
+            "(rowid, make_model, serial_number, type_name, employee_name) "
+            "SELECT a.id, a.make_model, COALESCE(a.serial_number, ''), t.name, "
+            "COALESCE(e.first_name || ' ' || e.last_name, '') "
+            "FROM assets_asset a "
+            "JOIN assets_assettype t ON t.id = a.type_id "
+            "LEFT JOIN assets_employee e ON e.id = a.alloted_to_id"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "sqlite":
+        schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("assets", "0003_importjob"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
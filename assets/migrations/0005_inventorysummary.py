@@ -0,0 +1,49 @@
+# Generated by Django 5.2.5 on 2026-10-17 15:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def build_inventory_summary(apps, schema_editor):
+    Asset = apps.get_model("assets", "Asset")
+    InventorySummary = apps.get_model("assets", "InventorySummary")
+    rows = (
+        Asset.objects.order_by()
+        .values("alloted_to_id", "type_id", "condition")
+        .annotate(count=Count("id"))
+    )
+    InventorySummary.objects.bulk_create(
+        InventorySummary(
+            employee_id=row["alloted_to_id"],
+            asset_type_id=row["type_id"],
+            condition=row["condition"],
+            count=row["count"],
+        )
+        for row in rows
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assets', '0004_asset_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InventorySummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('condition', models.CharField(max_length=20)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('asset_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='inventory_summary', to='assets.assettype')),
+                ('employee', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='inventory_summary', to='assets.employee')),
+            ],
+            options={
+                'verbose_name_plural': 'Inventory Summaries',
+                'constraints': [models.UniqueConstraint(condition=models.Q(('employee__isnull', False)), fields=('employee', 'asset_type', 'condition'), name='unique_inventory_summary_assigned'), models.UniqueConstraint(condition=models.Q(('employee__isnull', True)), fields=('asset_type', 'condition'), name='unique_inventory_summary_unassigned')],
+            },
+        ),
+        migrations.RunPython(build_inventory_summary, migrations.RunPython.noop),
+    ]
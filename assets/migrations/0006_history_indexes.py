@@ -0,0 +1,84 @@
+# Generated by Django 5.2.5 on 2026-10-17 17:08
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assets', '0005_inventorysummary'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AssetHistoryArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('action', models.CharField(choices=[('created', 'Created'), ('assigned', 'Assigned'), ('transferred', 'Transferred'), ('returned', 'Returned'), ('repaired', 'Sent for Repair'), ('disposed', 'Disposed')], max_length=50)),
+                ('timestamp', models.DateTimeField()),
+                ('remarks', models.TextField(blank=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Asset History Archive',
+                'ordering': ['-timestamp'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='assethistory',
+            index=models.Index(fields=['timestamp', 'id'], name='history_timestamp_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='assethistory',
+            index=models.Index(fields=['asset', 'timestamp'], name='history_asset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='assethistory',
+            index=models.Index(fields=['employee', 'timestamp'], name='history_employee_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='assethistory',
+            index=models.Index(fields=['performed_by', 'timestamp'], name='history_performer_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='assethistory',
+            index=models.Index(fields=['action', 'timestamp'], name='history_action_idx'),
+        ),
+        migrations.AddField(
+            model_name='assethistoryarchive',
+            name='asset',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_history', to='assets.asset'),
+        ),
+        migrations.AddField(
+            model_name='assethistoryarchive',
+            name='employee',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='assets.employee'),
+        ),
+        migrations.AddField(
+            model_name='assethistoryarchive',
+            name='performed_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='assethistoryarchive',
+            index=models.Index(fields=['timestamp', 'id'], name='archive_timestamp_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='assethistoryarchive',
+            index=models.Index(fields=['asset', 'timestamp'], name='archive_asset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='assethistoryarchive',
+            index=models.Index(fields=['employee', 'timestamp'], name='archive_employee_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='assethistoryarchive',
+            index=models.Index(fields=['performed_by', 'timestamp'], name='archive_performer_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='assethistoryarchive',
+            index=models.Index(fields=['action', 'timestamp'], name='archive_action_idx'),
+        ),
+    ]
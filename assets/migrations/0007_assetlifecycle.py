@@ -0,0 +1,29 @@
+# Generated by Django 5.2.5 on 2026-10-17 17:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assets', '0006_history_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AssetLifecycle',
+            fields=[
+                ('asset', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='lifecycle', serialize=False, to='assets.asset')),
+                ('created_at', models.DateTimeField(blank=True, null=True)),
+                ('first_event_at', models.DateTimeField(blank=True, null=True)),
+                ('last_event_at', models.DateTimeField(blank=True, null=True)),
+                ('assignments', models.PositiveIntegerField(default=0)),
+                ('repairs', models.PositiveIntegerField(default=0)),
+                ('returns', models.PositiveIntegerField(default=0)),
+                ('disposed_at', models.DateTimeField(blank=True, null=True)),
+                ('archived_events', models.PositiveIntegerField(default=0)),
+                ('collapsed_events', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.5 on 2026-10-17 17:19
+
+import django.db.models.deletion
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assets', '0007_assetlifecycle'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='asset',
+            name='alloted_to',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='assets', to='assets.employee'),
+        ),
+        migrations.AlterField(
+            model_name='asset',
+            name='type',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='assets', to='assets.assettype'),
+        ),
+        migrations.AddIndex(
+            model_name='asset',
+            index=models.Index(fields=['-created_at', 'id'], name='asset_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='asset',
+            index=models.Index(fields=['type', '-created_at', 'id'], name='asset_type_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='asset',
+            index=models.Index(fields=['alloted_to', '-created_at', 'id'], name='asset_assignee_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='asset',
+            index=models.Index(fields=['alloted_to', 'type'], name='asset_assignee_type_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='asset',
+            index=models.Index(condition=models.Q(('alloted_to__isnull', False)), fields=['-created_at', 'id'], name='asset_assigned_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='asset',
+            index=models.Index(django.db.models.functions.text.Upper('condition'), models.OrderBy(models.F('created_at'), descending=True), models.F('id'), name='asset_condition_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='asset',
+            index=models.Index(condition=models.Q(('serial_number__isnull', False)), fields=['serial_number'], name='asset_serial_idx'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.5 on 2026-10-17 18:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assets', '0009_importjob_upsert'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AssetSearchIndex',
+            fields=[
+                ('asset', models.OneToOneField(db_column='rowid', db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_index', serialize=False, to='assets.asset')),
+                ('document', models.TextField(db_column='assets_asset_fts')),
+                ('rank', models.FloatField()),
+            ],
+            options={
+                'db_table': 'assets_asset_fts',
+                'managed': False,
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.5 on 2026-10-17 18:35
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assets', '0011_importjob_heartbeat'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='assethistory',
+            name='timestamp',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
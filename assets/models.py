@@ -2,6 +2,9 @@ import uuid
 
 from django.contrib.auth.models import User
 from django.db import models
+from django.db.models import F
+from django.db.models.functions import Upper
+from django.utils import timezone
 
 # Choices for asset condition
 CONDITION_CHOICES = [
@@ -20,6 +23,13 @@ REPAIR_STATUS_CHOICES = [
     ("closed", "Closed"),
 ]
 
+IMPORT_JOB_STATUS_CHOICES = [
+    ("queued", "Queued"),
+    ("running", "Running"),
+    ("done", "Done"),
+    ("failed", "Failed"),
+]
+
 
 class Employee(models.Model):
     first_name = models.CharField(max_length=100)
@@ -58,7 +68,11 @@ class Asset(models.Model):
     """Each record represents a single physical component"""
 
     asset_tag = models.UUIDField(default=uuid.uuid4, editable=False, unique=True)
-    type = models.ForeignKey(AssetType, on_delete=models.CASCADE, related_name="assets")
+    # type and alloted_to lead composite indexes (see Meta), which serve
+    # lookups on them alone as well, so they get no single-column index
+    type = models.ForeignKey(
+        AssetType, on_delete=models.CASCADE, related_name="assets", db_index=False
+    )
     make_model = models.CharField(max_length=200)
     serial_number = models.CharField(max_length=100, blank=True, null=True)
     year_of_purchase = models.PositiveIntegerField()
@@ -80,16 +94,146 @@ class Asset(models.Model):
         null=True,
         blank=True,
         related_name="assets",
+        db_index=False,
     )
 
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # Values diffed by the history and summary signals. A snapshot of them is
+    # taken when the asset is loaded or saved, so a save needs no extra query
+    # to find out what changed.
+    TRACKED_FIELDS = ("alloted_to_id", "condition", "is_active", "type_id")
+
     class Meta:
         ordering = ["-created_at"]
+        # asset_list pages on (-created_at, id), alone or after one filter;
+        # the dashboard rollups and the export look assets up per employee
+        indexes = [
+            models.Index(fields=["-created_at", "id"], name="asset_created_idx"),
+            models.Index(
+                fields=["type", "-created_at", "id"], name="asset_type_created_idx"
+            ),
+            models.Index(
+                fields=["alloted_to", "-created_at", "id"],
+                name="asset_assignee_created_idx",
+            ),
+            models.Index(fields=["alloted_to", "type"], name="asset_assignee_type_idx"),
+            # assigned=true filter
+            models.Index(
+                fields=["-created_at", "id"],
+                condition=models.Q(alloted_to__isnull=False),
+                name="asset_assigned_created_idx",
+            ),
+            # status filter, which matches conditions case-insensitively
+            models.Index(
+                Upper("condition"),
+                F("created_at").desc(),
+                F("id"),
+                name="asset_condition_created_idx",
+            ),
+            # serial number lookups during imports
+            models.Index(
+                fields=["serial_number"],
+                condition=models.Q(serial_number__isnull=False),
+                name="asset_serial_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.type.name} - {self.make_model} ({self.asset_tag})"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if set(cls.TRACKED_FIELDS) <= set(field_names):
+            instance.snapshot_tracked_fields()
+        return instance
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self.snapshot_tracked_fields(kwargs.get("update_fields"))
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+        self.snapshot_tracked_fields(fields)
+
+    def snapshot_tracked_fields(self, fields=None):
+        """
+        Record the tracked values as they now are in the database. ``fields``
+        limits this to the fields of a partial save or refresh.
+        """
+        if fields is None:
+            if self.get_deferred_fields().intersection(self.TRACKED_FIELDS):
+                # Loaded with .only(): reading them would query each one, and
+                # saved_tracked_values queries them together when needed
+                return
+            self._loaded_values = {
+                attname: getattr(self, attname) for attname in self.TRACKED_FIELDS
+            }
+            return
+        snapshot = getattr(self, "_loaded_values", None)
+        if snapshot is None:
+            return
+        written = {self._meta.get_field(name).attname for name in fields}
+        for attname in written.intersection(self.TRACKED_FIELDS):
+            snapshot[attname] = getattr(self, attname)
+
+    def saved_tracked_values(self):
+        """
+        Return the tracked values as last loaded from or saved to the database,
+        querying for them only when this instance has no snapshot (e.g. it
+        was loaded with .only()). Returns None if the row does not exist.
+        """
+        snapshot = getattr(self, "_loaded_values", None)
+        if snapshot is None and self.pk is not None:
+            snapshot = (
+                type(self)._base_manager.filter(pk=self.pk)
+                .values(*self.TRACKED_FIELDS)
+                .first()
+            )
+        return snapshot
+
+
+class InventorySummary(models.Model):
+    """
+    Denormalised count of the assets each employee holds per type and
+    condition (employee is empty for unassigned assets). Maintained by the
+    signals in assets/signals.py and rebuilt with rebuild_inventory_summary.
+    """
+
+    # DO_NOTHING: an employee's rows are folded into the unassigned rows
+    # before the employee is deleted (see fold_employee_inventory)
+    employee = models.ForeignKey(
+        Employee,
+        on_delete=models.DO_NOTHING,
+        null=True,
+        blank=True,
+        related_name="inventory_summary",
+    )
+    asset_type = models.ForeignKey(
+        AssetType, on_delete=models.CASCADE, related_name="inventory_summary"
+    )
+    condition = models.CharField(max_length=20)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name_plural = "Inventory Summaries"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["employee", "asset_type", "condition"],
+                condition=models.Q(employee__isnull=False),
+                name="unique_inventory_summary_assigned",
+            ),
+            models.UniqueConstraint(
+                fields=["asset_type", "condition"],
+                condition=models.Q(employee__isnull=True),
+                name="unique_inventory_summary_unassigned",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.employee or 'Unassigned'} - {self.asset_type.name} ({self.condition}): {self.count}"
+
 
 class AssetGroup(models.Model):
     """Represents a set of assets assigned together as a 'system'"""
@@ -128,16 +272,121 @@ class AssetHistory(models.Model):
         related_name="performed_actions",
     )
     action = models.CharField(max_length=50, choices=ACTIONS)
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # Set when the change is recorded, not when a buffered row is written
+    # (see assets.services.history)
+    timestamp = models.DateTimeField(default=timezone.now)
     remarks = models.TextField(blank=True)
 
     class Meta:
         ordering = ["-timestamp"]
+        # history_list pages on (timestamp, id) and filters on one column at a
+        # time, so each filter gets an index that also serves the ordering
+        indexes = [
+            models.Index(fields=["timestamp", "id"], name="history_timestamp_idx"),
+            models.Index(fields=["asset", "timestamp"], name="history_asset_idx"),
+            models.Index(fields=["employee", "timestamp"], name="history_employee_idx"),
+            models.Index(
+                fields=["performed_by", "timestamp"], name="history_performer_idx"
+            ),
+            models.Index(fields=["action", "timestamp"], name="history_action_idx"),
+        ]
 
     def __str__(self):
         return f"{self.asset.asset_tag} - {self.action} - {self.timestamp.strftime('%Y-%m-%d %H:%M')}"
 
 
+class AssetHistoryArchive(models.Model):
+    """
+    Cold storage for old AssetHistory rows, moved here so the live table only
+    holds recent history. Same columns and indexes; history_list reads it
+    when asked to include archived history.
+    """
+
+    asset = models.ForeignKey(
+        Asset, on_delete=models.CASCADE, related_name="archived_history"
+    )
+    employee = models.ForeignKey(
+        Employee, on_delete=models.SET_NULL, null=True, blank=True, related_name="+"
+    )
+    performed_by = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True, related_name="+"
+    )
+    action = models.CharField(max_length=50, choices=AssetHistory.ACTIONS)
+    # Copied from the live row, so not auto_now_add
+    timestamp = models.DateTimeField()
+    remarks = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ["-timestamp"]
+        verbose_name_plural = "Asset History Archive"
+        indexes = [
+            models.Index(fields=["timestamp", "id"], name="archive_timestamp_idx"),
+            models.Index(fields=["asset", "timestamp"], name="archive_asset_idx"),
+            models.Index(fields=["employee", "timestamp"], name="archive_employee_idx"),
+            models.Index(
+                fields=["performed_by", "timestamp"], name="archive_performer_idx"
+            ),
+            models.Index(fields=["action", "timestamp"], name="archive_action_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.asset.asset_tag} - {self.action} - {self.timestamp.strftime('%Y-%m-%d %H:%M')} (archived)"
+
+
+class AssetLifecycle(models.Model):
+    """
+    Per-asset summary of the history archived by archive_history, so
+    asset_detail can show an asset's whole lifecycle without reading the
+    archive.
+    """
+
+    asset = models.OneToOneField(
+        Asset, on_delete=models.CASCADE, primary_key=True, related_name="lifecycle"
+    )
+    created_at = models.DateTimeField(null=True, blank=True)
+    first_event_at = models.DateTimeField(null=True, blank=True)
+    last_event_at = models.DateTimeField(null=True, blank=True)
+    assignments = models.PositiveIntegerField(default=0)  # assigned + transferred
+    repairs = models.PositiveIntegerField(default=0)
+    returns = models.PositiveIntegerField(default=0)
+    disposed_at = models.DateTimeField(null=True, blank=True)
+
+    # Archived rows, and how many redundant rows compaction dropped
+    archived_events = models.PositiveIntegerField(default=0)
+    collapsed_events = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"Lifecycle of {self.asset_id} ({self.archived_events} archived events)"
+
+
+class AssetSearchIndex(models.Model):
+    """
+    The SQLite FTS5 table created by migration 0004 (rowid = asset id), so
+    the search backend can join it to rank matches. It exists only on SQLite
+    with FTS5 and is maintained by assets/services/search.py.
+    """
+
+    asset = models.OneToOneField(
+        Asset,
+        on_delete=models.DO_NOTHING,
+        primary_key=True,
+        db_column="rowid",
+        db_constraint=False,
+        related_name="search_index",
+    )
+    # FTS5's hidden column named after the table: the left side of MATCH
+    document = models.TextField(db_column="assets_asset_fts")
+    # FTS5's hidden bm25 score of the current MATCH; lower is better
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = "assets_asset_fts"
+
+    def __str__(self):
+        return f"Search index of {self.asset_id}"
+
+
 def asset_document_path(instance, filename):
     return f"asset_documents/{instance.asset.asset_tag}/{filename}"
 
@@ -187,3 +436,46 @@ class DisposalRecord(models.Model):
             self.asset.condition = "disposed"
             self.asset.save()
         super().save(*args, **kwargs)
+
+
+class ImportJob(models.Model):
+    """A bulk CSV upload waiting for, or processed by, the import worker"""
+
+    csv_file = models.FileField(upload_to="import_jobs/%Y/%m/")
+    status = models.CharField(
+        max_length=20, choices=IMPORT_JOB_STATUS_CHOICES, default="queued"
+    )
+    created_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="import_jobs",
+    )
+    # Update assets matched on type and serial number instead of adding them
+    upsert = models.BooleanField(default=False)
+
+    # Progress, updated by the worker after every committed chunk
+    bytes_total = models.PositiveBigIntegerField(default=0)
+    bytes_processed = models.PositiveBigIntegerField(default=0)
+    rows_processed = models.PositiveIntegerField(default=0)
+    created_count = models.PositiveIntegerField(default=0)
+    updated_count = models.PositiveIntegerField(default=0)
+
+    # Result: the messages bulk_upload used to flash
+    error_count = models.PositiveIntegerField(default=0)
+    errors = models.JSONField(default=list, blank=True)
+    message = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    # Set when the job is claimed and after every committed chunk; a running
+    # job that stops reporting has lost its worker (see fail_stale_jobs)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"Import #{self.pk} ({self.status})"
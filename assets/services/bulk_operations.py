@@ -0,0 +1,77 @@
+"""
+Set-based changes to many assets at once: reassigning them, changing their
+condition or deactivating them.
+
+Queryset ``update()`` sends no model signals, so ``update_assets`` does the
+bookkeeping the Asset signals do for single saves itself, once per batch:
+the AssetHistory rows (through the history buffer), the InventorySummary
+deltas, the search index and the dashboard summary cache.
+"""
+from collections import Counter
+
+from django.db import transaction
+
+from ..models import Asset
+from .csv_import import chunked
+from .history import history_changes, record_history
+from .inventory import apply_inventory_deltas
+from .search import get_search_backend
+from .summary import invalidate_asset_summary
+
+BATCH_SIZE = 500
+
+
+def _inventory_key(values):
+    return (values["alloted_to_id"], values["type_id"], values["condition"])
+
+
+def update_assets(assets, values, remarks=""):
+    """
+    Set ``values`` ({attname: value} for fields in Asset.TRACKED_FIELDS) on
+    every asset of the queryset ``assets`` that does not already have them.
+    Returns the number of assets changed.
+    """
+    untracked = set(values) - set(Asset.TRACKED_FIELDS)
+    if untracked:
+        raise ValueError(f"Cannot bulk update {', '.join(sorted(untracked))}")
+
+    with transaction.atomic():
+        rows = list(
+            assets.exclude(**values).order_by().values("id", *Asset.TRACKED_FIELDS)
+        )
+        if not rows:
+            return 0
+
+        for batch in chunked(rows, BATCH_SIZE):
+            Asset.objects.filter(pk__in=[row["id"] for row in batch]).update(**values)
+
+        deltas = Counter()
+        for row in rows:
+            new = {**row, **values}
+            for action, employee_id in history_changes(row, new):
+                record_history(
+                    row["id"], action, employee_id, remarks or f"Bulk update: {action}"
+                )
+            deltas[_inventory_key(row)] -= 1
+            deltas[_inventory_key(new)] += 1
+        apply_inventory_deltas(deltas)
+
+        if {"alloted_to_id", "type_id"} & set(values):
+            # The assignee's and type's names are indexed with the asset
+            get_search_backend().index_assets([row["id"] for row in rows])
+    invalidate_asset_summary()
+    return len(rows)
+
+
+def reassign_assets(assets, employee, remarks=""):
+    """Assign ``assets`` to ``employee``, or unassign them when it is None."""
+    employee_id = employee.pk if employee is not None else None
+    return update_assets(assets, {"alloted_to_id": employee_id}, remarks)
+
+
+def set_assets_condition(assets, condition, remarks=""):
+    return update_assets(assets, {"condition": condition}, remarks)
+
+
+def deactivate_assets(assets, remarks=""):
+    return update_assets(assets, {"is_active": False}, remarks)
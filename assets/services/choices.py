@@ -0,0 +1,32 @@
+"""
+Cached option lists for the filter dropdowns of the asset pages.
+"""
+from django.core.cache import cache
+
+from ..models import Employee
+
+EMPLOYEE_CHOICES_CACHE_KEY = "assets:employee_choices"
+
+
+def _employees():
+    return Employee.objects.values("id", "first_name", "last_name")
+
+
+def employee_choices():
+    """Return [{"id", "first_name", "last_name"}, ...] for the assignee dropdown."""
+    return cache.get_or_set(
+        EMPLOYEE_CHOICES_CACHE_KEY, lambda: list(_employees()), timeout=None
+    )
+
+
+async def aemployee_choices():
+    """Async version of employee_choices."""
+    choices = await cache.aget(EMPLOYEE_CHOICES_CACHE_KEY)
+    if choices is None:
+        choices = [row async for row in _employees()]
+        await cache.aset(EMPLOYEE_CHOICES_CACHE_KEY, choices, timeout=None)
+    return choices
+
+
+def invalidate_employee_choices():
+    cache.delete(EMPLOYEE_CHOICES_CACHE_KEY)
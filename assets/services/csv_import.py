@@ -0,0 +1,460 @@
+"""
+Set-based import engine for the combined inventory sheet.
+
+Rows are parsed into plain records first, then handled a chunk at a time:
+employees and asset types of the whole chunk are resolved with a couple of
+batched lookups, and the assets plus their "created" AssetHistory rows are
+inserted with ``bulk_create``. The number of queries therefore grows with the
+number of chunks, not with the number of rows.
+
+The chunk size is taken from ``settings.BULK_IMPORT_CHUNK_SIZE``.
+
+With ``upsert``, assets whose type and serial number match a stored asset
+update it instead of creating a duplicate. The stored matches of a chunk are
+read with one query; only the fields that differ are written, with one
+``bulk_update`` per set of changed fields, and history rows are added only
+for changes of assignment or condition. Re-importing an unchanged sheet
+therefore runs a SELECT per chunk and writes nothing but the assets that
+have no serial number to match on.
+
+With ``settings.BULK_IMPORT_WORKERS`` (or ``workers``) above 1, parsing runs
+in a pool of worker processes a chunk at a time while this process, the only
+writer, imports the chunks parsed so far. Workers only get raw rows and
+return ParsedRow tuples; they never touch the database.
+"""
+import multiprocessing
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from django.db.models import CharField
+
+from common.current_user import get_current_user
+
+from ..models import Asset, AssetHistory, AssetType, Employee
+from .choices import invalidate_employee_choices
+from .csv_parsing import AssetRecord, parse_rows
+from .history import history_changes
+from .inventory import apply_inventory_deltas, inventory_key
+from .search import get_search_backend
+from .summary import invalidate_asset_summary
+
+DEFAULT_CHUNK_SIZE = 500
+
+
+def chunked(iterable, size):
+    """Yield lists of at most ``size`` items from ``iterable``."""
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def parse_in_processes(chunks, workers):
+    """
+    Parse the raw row ``chunks`` with ``parse_rows`` in ``workers`` processes
+    and yield the parsed chunks in order. At most two chunks per worker are
+    read ahead, so memory stays bounded however large the file is.
+
+    If reading ``chunks`` fails, the chunks read before are still yielded
+    before the error is raised, as they would be without workers.
+    """
+    # spawn: forking a (possibly threaded) web or worker process is unsafe
+    pool = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"))
+    pending = deque()
+    try:
+        try:
+            for chunk in chunks:
+                pending.append(pool.submit(parse_rows, chunk))
+                if len(pending) >= 2 * workers:
+                    yield pending.popleft().result()
+        except Exception:
+            while pending:
+                yield pending.popleft().result()
+            raise
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        pool.shutdown(cancel_futures=True)
+
+
+# Length limits of the AssetRecord fields stored in CharFields: a value too
+# long for its column would make the database reject the whole chunk
+MAX_LENGTHS = {
+    field.name: field.max_length
+    for field in Asset._meta.concrete_fields
+    if isinstance(field, CharField) and field.name in AssetRecord._fields
+}
+MAX_LENGTHS["type_name"] = AssetType._meta.get_field("name").max_length
+
+
+def validate_record(record):
+    """Return why the AssetRecord ``record`` cannot be stored, or None."""
+    for field, max_length in MAX_LENGTHS.items():
+        value = getattr(record, field)
+        if value and len(value) > max_length:
+            return f"{field} is longer than {max_length} characters"
+    return None
+
+
+# AssetRecord fields compared with, and written to, a matching stored asset
+COMPARED_FIELDS = (
+    "make_model",
+    "ram",
+    "hdd",
+    "ssd",
+    "os",
+    "year_of_purchase",
+    "condition",
+    "remarks",
+)
+
+
+def _blank(value):
+    # Forms store empty text as "" or None; the sheet cannot tell them apart
+    return None if value == "" else value
+
+
+def changed_fields(stored, record):
+    """
+    Return {field: (stored, imported)} for the COMPARED_FIELDS of the
+    AssetRecord ``record`` that differ from the ``stored`` values.
+    """
+    changes = {}
+    for field in COMPARED_FIELDS:
+        old, new = _blank(stored[field]), _blank(getattr(record, field))
+        if old != new:
+            changes[field] = (old, new)
+    return changes
+
+
+class ImportResult:
+    def __init__(self):
+        self.created_count = 0
+        self.updated_count = 0
+        self.unchanged_count = 0
+        self.rows_processed = 0
+        self.errors = []
+
+
+class BulkAssetImporter:
+    """
+    Import parsed inventory rows using batched lookups and bulk inserts.
+
+    Employees and asset types are cached for the lifetime of the importer, so
+    each distinct name is looked up (or created) only once per import.
+    History rows are attributed to ``user``, by default the current user
+    (see common.current_user).
+
+    With ``upsert`` assets matching a stored asset on type and serial number
+    update it (see the module docstring); a type and serial number repeated
+    in the sheet, or shared by several stored assets, is reported as an error.
+    """
+
+    def __init__(
+        self, user=None, chunk_size=None, on_chunk=None, workers=None, upsert=False
+    ):
+        self.user = user if user is not None else get_current_user()
+        self.on_chunk = on_chunk
+        self.chunk_size = chunk_size or getattr(
+            settings, "BULK_IMPORT_CHUNK_SIZE", DEFAULT_CHUNK_SIZE
+        )
+        self.workers = workers or getattr(settings, "BULK_IMPORT_WORKERS", 1)
+        self.upsert = upsert
+        self.result = ImportResult()
+        self._employees = {}  # (first_name, last_name) -> Employee id
+        self._types = {}  # AssetType name -> AssetType id
+        self._seen = {}  # (type id, serial number) -> first line, for upserts
+
+    def run(self, rows):
+        """
+        Import ``rows``, an iterable of (line_num, row dict) pairs as read by
+        ``csv.DictReader``. Returns an ImportResult.
+
+        ``rows`` is consumed lazily and every chunk is committed in its own
+        transaction, so memory use stays bounded by ``chunk_size``. If reading
+        fails part way through, the chunks already committed are kept and
+        ``self.result`` describes them.
+
+        A chunk the database rejects is rolled back and reported in
+        ``self.result.errors`` like a row error; the import goes on with the
+        next chunk.
+
+        ``on_chunk``, if given, is called with the ImportResult after every
+        committed chunk.
+        """
+        for chunk in self.parsed_chunks(rows):
+            self.import_chunk_atomically(chunk)
+            invalidate_asset_summary()
+            if self.on_chunk:
+                self.on_chunk(self.result)
+        return self.result
+
+    def import_chunk_atomically(self, chunk):
+        """
+        Import ``chunk`` in its own transaction. If the database rejects it,
+        forget what the importer noted about the chunk so later chunks do not
+        refer to rows that were rolled back.
+        """
+        result = self.result
+        counts = (result.created_count, result.updated_count, result.unchanged_count)
+        caches = (self._employees, self._types, self._seen)
+        sizes = [(cache, len(cache)) for cache in caches]
+        try:
+            with transaction.atomic():
+                self.import_chunk(chunk)
+        except DatabaseError as exc:
+            result.created_count, result.updated_count, result.unchanged_count = counts
+            for cache, size in sizes:
+                # Only ever added to, so the newest keys are the chunk's
+                for key in list(islice(reversed(cache), len(cache) - size)):
+                    del cache[key]
+            result.errors.append(
+                f"Rows {chunk[0].line_num}-{chunk[-1].line_num} were not imported: {exc}"
+            )
+
+    def parsed_chunks(self, rows):
+        """Yield ``rows`` parsed into lists of at most ``chunk_size`` ParsedRow."""
+        chunks = chunked(rows, self.chunk_size)
+        if self.workers > 1:
+            yield from parse_in_processes(chunks, self.workers)
+        else:
+            for chunk in chunks:
+                yield parse_rows(chunk)
+
+    def import_chunk(self, chunk):
+        self._resolve_employees({p.employee for p in chunk if p.employee})
+        self._resolve_types(
+            {record.type_name for p in chunk for record in p.assets}
+        )
+
+        records = []
+        for parsed in chunk:
+            self.result.rows_processed += 1
+            if parsed.error:
+                self.result.errors.append(parsed.error)
+                continue
+            employee_id = self._employees.get(parsed.employee)
+            for record in parsed.assets:
+                error = validate_record(record)
+                if error:
+                    self.result.errors.append(
+                        f"Row {parsed.line_num} {record.type_name} error: {error}"
+                    )
+                    continue
+                records.append((parsed.line_num, record, employee_id))
+
+        if self.upsert:
+            records = self._update_existing(records)
+        assets = [
+            self._build_asset(record, employee_id) for _, record, employee_id in records
+        ]
+        if not assets:
+            return
+        self._insert(assets)
+        self.result.created_count += len(assets)
+
+    def _update_existing(self, records):
+        """
+        Update the stored assets matched by ``records``, a list of
+        (line_num, AssetRecord, employee_id), and return the records that
+        match none and are to be created.
+        """
+        stored = self._stored_assets(records)
+        new = []
+        updates = {}  # asset id -> (stored values, AssetRecord, employee_id)
+        for line_num, record, employee_id in records:
+            if not record.serial_number:
+                new.append((line_num, record, employee_id))
+                continue
+            key = (self._types[record.type_name], record.serial_number)
+            if key in self._seen:
+                self.result.errors.append(
+                    f"Row {line_num} {record.type_name} error: same type and serial "
+                    f"number as row {self._seen[key]}"
+                )
+                continue
+            self._seen[key] = line_num
+            matches = stored.get(key, [])
+            if not matches:
+                new.append((line_num, record, employee_id))
+            elif len(matches) > 1:
+                self.result.errors.append(
+                    f"Row {line_num} {record.type_name} error: serial number "
+                    f"{record.serial_number} matches {len(matches)} existing assets"
+                )
+            else:
+                updates[matches[0]["id"]] = (matches[0], record, employee_id)
+        self._update(updates)
+        return new
+
+    def _stored_assets(self, records):
+        """Return {(type_id, serial_number): [values, ...]} of the stored matches."""
+        serials = {record.serial_number for _, record, _ in records}
+        serials.discard(None)
+        if not serials:
+            return {}
+        fields = ("id", "type_id", "alloted_to_id", "is_active") + COMPARED_FIELDS
+        rows = (
+            Asset.objects.filter(serial_number__in=serials)
+            .order_by()
+            .values_list("serial_number", *fields)
+        )
+        stored = {}
+        for serial_number, *values in rows:
+            values = dict(zip(fields, values))
+            stored.setdefault((values["type_id"], serial_number), []).append(values)
+        return stored
+
+    def _update(self, updates):
+        """
+        Write the changed fields of ``updates``, {asset id: (stored values,
+        AssetRecord, employee_id)}, with their history rows, summary counts
+        and search index rows.
+        """
+        by_fields = {}  # changed field names -> [Asset, ...]
+        deltas = Counter()
+        history = []
+        for pk, (stored, record, employee_id) in updates.items():
+            changes = changed_fields(stored, record)
+            if stored["alloted_to_id"] != employee_id:
+                changes["alloted_to_id"] = (stored["alloted_to_id"], employee_id)
+            if not changes:
+                self.result.unchanged_count += 1
+                continue
+            # The imported values as the sheet has them; only the changed
+            # fields are written
+            asset = Asset(
+                pk=pk,
+                alloted_to_id=employee_id,
+                **{field: getattr(record, field) for field in COMPARED_FIELDS},
+            )
+            by_fields.setdefault(tuple(changes), []).append(asset)
+
+            if "alloted_to_id" in changes or "condition" in changes:
+                type_id = stored["type_id"]
+                deltas[(stored["alloted_to_id"], type_id, stored["condition"])] -= 1
+                deltas[(employee_id, type_id, record.condition)] += 1
+            new = {
+                "alloted_to_id": employee_id,
+                "condition": record.condition,
+                "is_active": stored["is_active"],
+            }
+            for action, action_employee_id in history_changes(stored, new):
+                history.append(
+                    AssetHistory(
+                        asset_id=pk,
+                        employee_id=action_employee_id,
+                        performed_by=self.user,
+                        action=action,
+                        remarks=f"Updated by bulk import: {action}",
+                    )
+                )
+
+        if not by_fields:
+            return
+        for fields, assets in by_fields.items():
+            Asset.objects.bulk_update(assets, fields)
+        updated_ids = [asset.pk for assets in by_fields.values() for asset in assets]
+        self.result.updated_count += len(updated_ids)
+        get_search_backend().index_assets(updated_ids)
+        apply_inventory_deltas(deltas)
+        AssetHistory.objects.bulk_create(history)
+
+    def _resolve_employees(self, names):
+        missing = names - self._employees.keys()
+        if not missing:
+            return
+        self._load_employees(missing)
+        to_create = missing - self._employees.keys()
+        if to_create:
+            Employee.objects.bulk_create(
+                [
+                    Employee(
+                        first_name=first_name,
+                        last_name=last_name,
+                        designation="Unknown",
+                        section="",
+                        email=None,
+                        phone=None,
+                    )
+                    for first_name, last_name in sorted(to_create)
+                ]
+            )
+            invalidate_employee_choices()
+            self._load_employees(to_create)
+
+    def _load_employees(self, names):
+        # Over-fetches on mixed first/last name pairs; matched exactly below.
+        rows = (
+            Employee.objects.filter(
+                first_name__in={first for first, _ in names},
+                last_name__in={last for _, last in names},
+            )
+            .order_by("id")
+            .values_list("id", "first_name", "last_name")
+        )
+        for pk, first_name, last_name in rows:
+            key = (first_name, last_name)
+            if key in names:
+                self._employees.setdefault(key, pk)
+
+    def _resolve_types(self, names):
+        missing = names - self._types.keys()
+        if not missing:
+            return
+        AssetType.objects.bulk_create(
+            [AssetType(name=name) for name in sorted(missing)], ignore_conflicts=True
+        )
+        self._types.update(
+            AssetType.objects.filter(name__in=missing).values_list("name", "id")
+        )
+
+    def _build_asset(self, record, employee_id):
+        return Asset(
+            type_id=self._types[record.type_name],
+            make_model=record.make_model,
+            serial_number=record.serial_number,
+            ram=record.ram,
+            hdd=record.hdd,
+            ssd=record.ssd,
+            os=record.os,
+            year_of_purchase=record.year_of_purchase,
+            condition=record.condition,
+            remarks=record.remarks,
+            alloted_to_id=employee_id,
+        )
+
+    def _insert(self, assets):
+        """Insert ``assets`` and their "created" history rows."""
+        Asset.objects.bulk_create(assets)
+        if any(asset.pk is None for asset in assets):
+            # Backends that cannot return ids from bulk inserts
+            ids = dict(
+                Asset.objects.filter(
+                    asset_tag__in=[asset.asset_tag for asset in assets]
+                ).values_list("asset_tag", "id")
+            )
+            for asset in assets:
+                asset.pk = ids[asset.asset_tag]
+
+        get_search_backend().index_assets([asset.pk for asset in assets])
+        apply_inventory_deltas(Counter(inventory_key(asset) for asset in assets))
+        AssetHistory.objects.bulk_create(
+            [
+                AssetHistory(
+                    asset_id=asset.pk,
+                    employee_id=asset.alloted_to_id,
+                    performed_by=self.user,
+                    action="created",
+                    remarks="Asset record created",
+                )
+                for asset in assets
+            ]
+        )
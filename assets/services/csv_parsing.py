@@ -0,0 +1,130 @@
+"""
+Pure helpers that turn one inventory CSV row into plain data.
+
+Nothing in here touches the database so the same functions can be used by
+the import engine, by validation passes and by worker processes.
+"""
+from collections import namedtuple
+
+# Peripheral columns of the combined sheet, in the order they are imported
+PERIPHERAL_TYPES = ["Monitor", "Keyboard and Mouse", "UPS", "Printer", "Speaker"]
+
+# One asset to be created from a row.
+AssetRecord = namedtuple(
+    "AssetRecord",
+    [
+        "type_name",
+        "make_model",
+        "serial_number",
+        "ram",
+        "hdd",
+        "ssd",
+        "os",
+        "year_of_purchase",
+        "condition",
+        "remarks",
+    ],
+)
+
+# Result of parsing a row: the (first_name, last_name) of the employee or
+# None, the assets found on the row and an error message or None.
+ParsedRow = namedtuple("ParsedRow", ["line_num", "employee", "assets", "error"])
+
+
+def parse_composite_field(field_value):
+    """
+    Parse a composite field in the format:
+      "Laptop: Working; Monitor: Good; UPS: Not Working"
+    and return a mapping { 'laptop': 'Working', 'monitor': 'Good', ... }
+    """
+    mapping = {}
+    if field_value:
+        parts = field_value.split(';')
+        for part in parts:
+            if ':' in part:
+                key, val = part.split(":", 1)
+                mapping[key.strip().lower()] = val.strip()
+    return mapping
+
+
+def parse_year(value):
+    """Return the year in ``value`` or 0 when it is empty or not a valid year."""
+    value = (value or "").strip()
+    try:
+        year = int(value) if value else 0
+    except ValueError:
+        return 0
+    return year if year >= 0 else 0
+
+
+def split_name(value):
+    """Split an "Alloted To" cell into (first_name, last_name), or None if empty."""
+    names = (value or "").split()
+    if not names:
+        return None
+    return names[0], " ".join(names[1:])
+
+
+def parse_peripheral(row, peripheral_name, cond_map, rem_map):
+    """
+    Return an AssetRecord for a peripheral if its primary cell is non-empty.
+    For the peripheral, the following CSV columns are expected:
+      - <Peripheral Name>
+      - <Peripheral Name> Serial number
+      - <Peripheral Name> Year of Purchase
+    """
+    value = (row.get(peripheral_name) or "").strip()
+    if not value:
+        return None
+    serial = (row.get(f"{peripheral_name} Serial number") or "").strip()
+    return AssetRecord(
+        type_name=peripheral_name,
+        make_model=value,  # using the cell value as the model info
+        serial_number=serial or None,
+        ram=None,
+        hdd=None,
+        ssd=None,
+        os=None,
+        year_of_purchase=parse_year(row.get(f"{peripheral_name} Year of Purchase")),
+        condition=cond_map.get(peripheral_name.lower(), "working"),
+        remarks=rem_map.get(peripheral_name.lower(), ""),
+    )
+
+
+def parse_row(line_num, row):
+    """Parse one DictReader row of the combined sheet into a ParsedRow."""
+    employee = split_name(row.get("Alloted To"))
+
+    # Parse composite Condition and REMARKS fields
+    cond_map = parse_composite_field(row.get("Condition", ""))
+    rem_map = parse_composite_field(row.get("REMARKS", ""))
+
+    # "Device" names the AssetType of the main asset (CPU, Laptop, ...)
+    device_val = (row.get("Device") or "").strip()
+    if not device_val:
+        return ParsedRow(line_num, employee, [], f"Row {line_num} missing Device")
+
+    # Although the CSV has a column "Make model", per mapping we use PROCESSOR for make_model.
+    main = AssetRecord(
+        type_name=device_val,
+        make_model=(row.get("PROCESSOR") or "").strip(),
+        serial_number=(row.get("Serial No.") or "").strip() or None,
+        ram=(row.get("RAM") or "").strip(),
+        hdd=(row.get("HDD") or "").strip(),
+        ssd=(row.get("SSD") or "").strip(),
+        os=(row.get("OS") or "").strip(),
+        year_of_purchase=parse_year(row.get("Year of Purchase")),
+        condition=cond_map.get(device_val.lower(), "working"),
+        remarks=rem_map.get(device_val.lower(), ""),
+    )
+    assets = [main]
+    for peripheral in PERIPHERAL_TYPES:
+        record = parse_peripheral(row, peripheral, cond_map, rem_map)
+        if record:
+            assets.append(record)
+    return ParsedRow(line_num, employee, assets, None)
+
+
+def parse_rows(rows):
+    """Parse a list of (line_num, row dict) pairs into a list of ParsedRow."""
+    return [parse_row(line_num, row) for line_num, row in rows]
@@ -0,0 +1,46 @@
+"""
+Incremental CSV reading for uploaded files.
+
+``UploadedFile.chunks()`` is exposed as a raw binary stream so that
+``io.TextIOWrapper`` can decode it and ``csv.DictReader`` can parse it a
+buffer at a time. Only the current chunk is ever held in memory, however
+large the upload is.
+"""
+import csv
+import io
+
+
+class ChunkedUploadReader(io.RawIOBase):
+    """Read-only binary stream over an iterable of ``bytes`` chunks."""
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._pending = b""
+        self.bytes_read = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while not self._pending:
+            try:
+                self._pending = next(self._chunks)
+            except StopIteration:
+                return 0
+        size = min(len(buffer), len(self._pending))
+        buffer[:size] = self._pending[:size]
+        self._pending = self._pending[size:]
+        self.bytes_read += size
+        return size
+
+
+def iter_csv_rows(uploaded_file, encoding="utf-8"):
+    """
+    Yield (line_num, row dict) pairs from an uploaded CSV file while it is
+    being read. Raises UnicodeDecodeError when the file is not ``encoding``.
+    """
+    raw = ChunkedUploadReader(uploaded_file.chunks())
+    text = io.TextIOWrapper(io.BufferedReader(raw), encoding=encoding, newline="")
+    reader = csv.DictReader(text)
+    for row in reader:
+        yield reader.line_num, row
@@ -0,0 +1,196 @@
+"""
+Buffered writing of AssetHistory rows.
+
+The history signals call ``record_history`` instead of creating rows one at a
+time. Where a row goes depends on where it is recorded:
+
+* inside ``transaction.atomic`` it is held until the transaction commits and
+  then written with the other rows of the same block in one ``bulk_create``;
+  a rollback (of the transaction or of the savepoint it was recorded in)
+  discards it together with the changes it describes;
+* otherwise, inside ``buffered_history()`` (which HistoryBufferMiddleware
+  wraps around every request) it is written when the block ends;
+* otherwise it is written straight away.
+
+``performed_by`` and ``timestamp`` are set when the row is recorded, not when
+it is written, so a held row keeps the time of the change it describes.
+
+Request buffers are kept in a context variable, so a buffer opened by the
+async middleware also collects the rows recorded by a sync view running in
+``sync_to_async``. Transaction batches follow the connection, which is per
+thread, and stay thread-local.
+"""
+import threading
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.db import connection, transaction
+from django.utils import timezone
+
+from common.current_user import get_current_user
+
+from ..models import AssetHistory
+
+_local = threading.local()
+# Open buffered_history() buffers, innermost last
+_buffers = ContextVar("history_buffers", default=())
+
+
+class _TransactionBatch(list):
+    """History rows recorded in one atomic block, written by its on_commit hook."""
+
+    def __call__(self):
+        batches = _transaction_batches()
+        if batches.get(self.key) is self:
+            del batches[self.key]
+        write_history(self)
+
+
+def _transaction_batches():
+    if not hasattr(_local, "batches"):
+        _local.batches = {}
+    return _local.batches
+
+
+def _is_pending(batch):
+    """False once a rollback has dropped the batch's on_commit hook."""
+    return any(callback is batch for _, callback, _ in connection.run_on_commit)
+
+
+def _transaction_batch():
+    batches = _transaction_batches()
+    key = tuple(connection.savepoint_ids)
+    batch = batches.get(key)
+    if batch is None or not _is_pending(batch):
+        # Forget batches whose transaction or savepoint was rolled back
+        for stale_key, stale in list(batches.items()):
+            if not _is_pending(stale):
+                del batches[stale_key]
+        batch = batches[key] = _TransactionBatch()
+        batch.key = key
+        transaction.on_commit(batch)
+    return batch
+
+
+def history_changes(old, new):
+    """
+    Return the (action, employee_id) history entries for an asset whose
+    tracked values (see Asset.TRACKED_FIELDS) change from ``old`` to ``new``.
+    """
+    changes = []
+
+    if old["alloted_to_id"] != new["alloted_to_id"]:
+        changes.append(
+            (
+                "transferred" if old["alloted_to_id"] else "assigned",
+                new["alloted_to_id"],
+            )
+        )
+
+    if old["condition"] != new["condition"]:
+        if new["condition"] == "disposed":
+            changes.append(("disposed", new["alloted_to_id"]))
+        elif new["condition"] == "repair":
+            changes.append(("repaired", new["alloted_to_id"]))
+
+    # If asset was deactivated (is_active=False)
+    if old["is_active"] != new["is_active"] and not new["is_active"]:
+        changes.append(("returned", new["alloted_to_id"]))
+
+    return changes
+
+
+def write_history(entries):
+    if entries:
+        AssetHistory.objects.bulk_create(entries, batch_size=500)
+
+
+def record_history(asset_id, action, employee_id=None, remarks=""):
+    """Record an AssetHistory row; see the module docstring for when it is written."""
+    entry = AssetHistory(
+        asset_id=asset_id,
+        employee_id=employee_id,
+        performed_by=get_current_user(),
+        action=action,
+        timestamp=timezone.now(),
+        remarks=remarks,
+    )
+    if connection.in_atomic_block:
+        _transaction_batch().append(entry)
+    elif _buffers.get():
+        _buffers.get()[-1].append(entry)
+    else:
+        write_history([entry])
+
+
+def _pending_entries():
+    yield from _buffers.get()
+    yield from _transaction_batches().values()
+
+
+def forget_asset(asset_id):
+    """Drop unwritten rows of a deleted asset; its written rows cascade."""
+    for entries in _pending_entries():
+        entries[:] = [entry for entry in entries if entry.asset_id != asset_id]
+
+
+def forget_employee(employee_id):
+    """Unset a deleted employee on unwritten rows, as SET_NULL does on written ones."""
+    for entries in _pending_entries():
+        for entry in entries:
+            if entry.employee_id == employee_id:
+                entry.employee_id = None
+
+
+@contextmanager
+def buffered_history():
+    """Collect history recorded outside a transaction and write it in one go on exit."""
+    buffer = []
+    token = _buffers.set((*_buffers.get(), buffer))
+    try:
+        yield
+    finally:
+        _buffers.reset(token)
+        # The changes were saved in autocommit mode, so write their history
+        # even when the block raised.
+        write_history(buffer)
+
+
+@asynccontextmanager
+async def abuffered_history():
+    """Async version of buffered_history."""
+    buffer = []
+    token = _buffers.set((*_buffers.get(), buffer))
+    try:
+        yield
+    finally:
+        _buffers.reset(token)
+        await sync_to_async(write_history)(buffer)
+
+
+class HistoryBufferMiddleware:
+    """
+    Write the history recorded while handling a request in one batch.
+    Add to settings.MIDDLEWARE:
+    'assets.services.history.HistoryBufferMiddleware'
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        with buffered_history():
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        async with abuffered_history():
+            return await self.get_response(request)
@@ -0,0 +1,261 @@
+"""
+Archival and compaction of old AssetHistory rows.
+
+``archive_history`` moves the rows older than a cutoff out of the live table,
+a batch of assets at a time, each batch in one transaction:
+
+* runs of assigned/transferred rows of one asset that are each within the
+  collapse window of the previous one are compacted into a single row for
+  the last change (the earlier rows only describe where the asset passed
+  through on its way);
+* the remaining rows go to AssetHistoryArchive, or, given an export
+  directory, to gzip JSONL files with one file per month;
+* the asset's AssetLifecycle row is updated with what was archived.
+
+Rows written to a file in a batch whose transaction then fails are still in
+the live table and are written again by the next run; readers of the files
+should de-duplicate on ``id``.
+"""
+import gzip
+import json
+import os
+from collections import defaultdict
+from datetime import timedelta
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Count, Max, Min, Q
+
+from ..models import AssetHistory, AssetHistoryArchive, AssetLifecycle
+from .csv_import import chunked
+
+DEFAULT_COLLAPSE_WINDOW = timedelta(minutes=10)
+BATCH_SIZE = 500
+
+ASSIGNMENT_ACTIONS = ("assigned", "transferred")
+ROW_FIELDS = (
+    "id",
+    "asset_id",
+    "asset__asset_tag",
+    "employee_id",
+    "performed_by_id",
+    "action",
+    "timestamp",
+    "remarks",
+)
+
+
+class ArchiveResult:
+    def __init__(self):
+        self.archived = 0  # rows written to the archive
+        self.collapsed = 0  # rows dropped by compaction
+        self.assets = 0
+
+
+def compact_history(rows, window=DEFAULT_COLLAPSE_WINDOW):
+    """
+    Collapse assignment runs in one asset's ``rows`` (dicts in timestamp
+    order). Returns (kept_rows, collapsed_count). A collapsed run keeps its
+    last row, as "assigned" if the run started from an unassigned asset, or
+    no row if it also ends unassigned.
+    A zero ``window`` disables compaction.
+    """
+    if not window:
+        return list(rows), 0
+
+    kept = []
+    collapsed = 0
+    run = []
+
+    def close_run():
+        nonlocal collapsed
+        if not run:
+            return
+        last = dict(run[-1])
+        if len(run) > 1:
+            if run[0]["action"] == "assigned" and last["employee_id"] is None:
+                # Assigned and unassigned again: nothing changed overall
+                collapsed += len(run)
+                run.clear()
+                return
+            collapsed += len(run) - 1
+            last["action"] = run[0]["action"]
+            note = f"(collapsed {len(run)} assignment changes)"
+            last["remarks"] = f"{last['remarks']} {note}" if last["remarks"] else note
+        kept.append(last)
+        run.clear()
+
+    for row in rows:
+        if row["action"] in ASSIGNMENT_ACTIONS:
+            if run and row["timestamp"] - run[-1]["timestamp"] > window:
+                close_run()
+            run.append(row)
+        else:
+            close_run()
+            kept.append(row)
+    close_run()
+    return kept, collapsed
+
+
+def _update_lifecycle(lifecycle, rows, collapsed):
+    for row in rows:
+        timestamp = row["timestamp"]
+        if lifecycle.first_event_at is None or timestamp < lifecycle.first_event_at:
+            lifecycle.first_event_at = timestamp
+        if lifecycle.last_event_at is None or timestamp > lifecycle.last_event_at:
+            lifecycle.last_event_at = timestamp
+
+        action = row["action"]
+        if action == "created":
+            lifecycle.created_at = lifecycle.created_at or timestamp
+        elif action in ASSIGNMENT_ACTIONS:
+            lifecycle.assignments += 1
+        elif action == "repaired":
+            lifecycle.repairs += 1
+        elif action == "returned":
+            lifecycle.returns += 1
+        elif action == "disposed":
+            lifecycle.disposed_at = timestamp
+    lifecycle.archived_events += len(rows)
+    lifecycle.collapsed_events += collapsed
+
+
+def _archive_file(export_dir, timestamp):
+    return os.path.join(export_dir, f"asset-history-{timestamp:%Y-%m}.jsonl.gz")
+
+
+def _export_rows(rows, export_dir):
+    """Append ``rows`` to the monthly files; appending adds a new gzip member."""
+    by_file = defaultdict(list)
+    for row in rows:
+        by_file[_archive_file(export_dir, row["timestamp"])].append(row)
+    for path, file_rows in by_file.items():
+        with gzip.open(path, "at", encoding="utf-8") as archive:
+            for row in file_rows:
+                record = {
+                    field.replace("asset__", ""): row[field] for field in ROW_FIELDS
+                }
+                archive.write(json.dumps(record, cls=DjangoJSONEncoder) + "\n")
+
+
+def _archive_batch(asset_ids, before, window, export_dir, result):
+    with transaction.atomic():
+        rows = (
+            AssetHistory.objects.filter(asset_id__in=asset_ids, timestamp__lt=before)
+            .order_by("asset_id", "timestamp", "id")
+            .values(*ROW_FIELDS)
+        )
+        by_asset = defaultdict(list)
+        for row in rows:
+            by_asset[row["asset_id"]].append(row)
+        if not by_asset:
+            return
+
+        lifecycles = AssetLifecycle.objects.select_for_update().in_bulk(list(by_asset))
+        new_lifecycles = []
+        kept_rows = []
+        archived_ids = []
+        for asset_id, asset_rows in by_asset.items():
+            kept, collapsed = compact_history(asset_rows, window)
+            lifecycle = lifecycles.get(asset_id)
+            if lifecycle is None:
+                lifecycle = AssetLifecycle(asset_id=asset_id)
+                new_lifecycles.append(lifecycle)
+            _update_lifecycle(lifecycle, kept, collapsed)
+            kept_rows.extend(kept)
+            archived_ids.extend(row["id"] for row in asset_rows)
+            result.collapsed += collapsed
+
+        if export_dir:
+            _export_rows(kept_rows, export_dir)
+        else:
+            AssetHistoryArchive.objects.bulk_create(
+                [
+                    AssetHistoryArchive(
+                        asset_id=row["asset_id"],
+                        employee_id=row["employee_id"],
+                        performed_by_id=row["performed_by_id"],
+                        action=row["action"],
+                        timestamp=row["timestamp"],
+                        remarks=row["remarks"],
+                    )
+                    for row in kept_rows
+                ],
+                batch_size=BATCH_SIZE,
+            )
+        AssetLifecycle.objects.bulk_create(new_lifecycles, batch_size=BATCH_SIZE)
+        AssetLifecycle.objects.bulk_update(
+            list(lifecycles.values()),
+            [
+                field.name
+                for field in AssetLifecycle._meta.concrete_fields
+                if not field.primary_key
+            ],
+            batch_size=BATCH_SIZE,
+        )
+        for ids in chunked(archived_ids, BATCH_SIZE):
+            AssetHistory.objects.filter(pk__in=ids).delete()
+
+    result.archived += len(kept_rows)
+    result.assets += len(by_asset)
+
+
+def archive_history(
+    before, window=DEFAULT_COLLAPSE_WINDOW, export_dir=None, batch_size=BATCH_SIZE
+):
+    """
+    Archive the AssetHistory rows with a timestamp before ``before``; see the
+    module docstring. Returns an ArchiveResult.
+    """
+    if export_dir:
+        os.makedirs(export_dir, exist_ok=True)
+    result = ArchiveResult()
+    asset_ids = (
+        AssetHistory.objects.filter(timestamp__lt=before)
+        .order_by("asset_id")
+        .values_list("asset_id", flat=True)
+        .distinct()
+    )
+    # Materialise the ids first: the batches delete from the table being read
+    for batch in chunked(list(asset_ids), batch_size):
+        _archive_batch(batch, before, window, export_dir, result)
+    return result
+
+
+def asset_lifecycle(asset):
+    """
+    Return the lifecycle of ``asset`` at a glance, combining its AssetLifecycle
+    (the archived history) with one aggregate over its live history.
+    """
+    live = asset.history.aggregate(
+        events=Count("id"),
+        first_event_at=Min("timestamp"),
+        last_event_at=Max("timestamp"),
+        created_at=Min("timestamp", filter=Q(action="created")),
+        assignments=Count("id", filter=Q(action__in=ASSIGNMENT_ACTIONS)),
+        repairs=Count("id", filter=Q(action="repaired")),
+        returns=Count("id", filter=Q(action="returned")),
+        disposed_at=Max("timestamp", filter=Q(action="disposed")),
+    )
+    archived = AssetLifecycle.objects.filter(asset=asset).first()
+    if archived is None:
+        return {**live, "archived_events": 0, "collapsed_events": 0}
+
+    def earliest(*values):
+        return min((value for value in values if value), default=None)
+
+    def latest(*values):
+        return max((value for value in values if value), default=None)
+
+    return {
+        "events": live["events"] + archived.archived_events,
+        "first_event_at": earliest(archived.first_event_at, live["first_event_at"]),
+        "last_event_at": latest(archived.last_event_at, live["last_event_at"]),
+        "created_at": earliest(archived.created_at, live["created_at"]),
+        "assignments": live["assignments"] + archived.assignments,
+        "repairs": live["repairs"] + archived.repairs,
+        "returns": live["returns"] + archived.returns,
+        "disposed_at": latest(archived.disposed_at, live["disposed_at"]),
+        "archived_events": archived.archived_events,
+        "collapsed_events": archived.collapsed_events,
+    }
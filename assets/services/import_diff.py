@@ -0,0 +1,161 @@
+"""
+Validate-only imports: compare an inventory sheet with the stored assets
+without writing anything.
+
+Assets are matched on (AssetType, serial number). The stored assets that
+have a serial number, the asset types and the employees are read once into
+dicts, so each asset of the sheet is classified with a few dict lookups:
+
+    new          no stored asset has its type and serial number, or it has
+                 no serial number
+    unchanged    one stored asset matches and every imported field is equal
+    changed      one stored asset matches and some imported fields differ
+    conflicting  it cannot be matched safely: its type and serial number
+                 appeared earlier in the sheet or belong to several stored
+                 assets
+"""
+from collections import Counter, namedtuple
+
+from ..models import Asset, AssetType, Employee
+from .csv_import import COMPARED_FIELDS, changed_fields, validate_record
+from .csv_parsing import parse_row
+
+ASSET_DIFF_STATUSES = ("new", "unchanged", "changed", "conflicting")
+
+# One asset of the sheet. ``employee`` is the (first_name, last_name) it is
+# alloted to or None; ``asset_id`` is the matched asset; ``changes`` maps each
+# differing field (and "alloted_to") to its (stored, imported) values.
+AssetDiff = namedtuple(
+    "AssetDiff",
+    ["line_num", "status", "record", "employee", "asset_id", "changes", "message"],
+)
+
+
+def _employee_name(key):
+    return " ".join(part for part in key if part) if key else None
+
+
+class InventoryIndex:
+    """The stored asset types, employees and serial-numbered assets, keyed for matching."""
+
+    def __init__(self):
+        self.types = dict(AssetType.objects.values_list("name", "id"))
+
+        self.employees = {}  # (first_name, last_name) -> lowest Employee id
+        self.employee_names = {}  # Employee id -> (first_name, last_name)
+        rows = Employee.objects.order_by("id").values_list("id", "first_name", "last_name")
+        for pk, first_name, last_name in rows:
+            self.employees.setdefault((first_name, last_name), pk)
+            self.employee_names[pk] = (first_name, last_name)
+
+        # (type_id, serial_number) -> [{field: value}, ...] of the stored assets
+        self.assets = {}
+        fields = ("id", "alloted_to_id") + COMPARED_FIELDS
+        rows = (
+            Asset.objects.filter(serial_number__isnull=False)
+            .order_by()
+            .values_list("type_id", "serial_number", *fields)
+        )
+        for row in rows:
+            self.assets.setdefault(row[:2], []).append(dict(zip(fields, row[2:])))
+
+    def matches(self, record):
+        """Return the stored assets with ``record``'s type and serial number."""
+        type_id = self.types.get(record.type_name)
+        if type_id is None or not record.serial_number:
+            return []
+        return self.assets.get((type_id, record.serial_number), [])
+
+    def changes(self, stored, record, employee):
+        """Return {field: (stored, imported)} for the fields ``record`` would change."""
+        changes = changed_fields(stored, record)
+        employee_id = self.employees.get(employee) if employee else None
+        if stored["alloted_to_id"] != employee_id or (employee and employee_id is None):
+            changes["alloted_to"] = (
+                _employee_name(self.employee_names.get(stored["alloted_to_id"])),
+                _employee_name(employee),
+            )
+        return changes
+
+
+class ImportDiff:
+    def __init__(self):
+        self.rows_processed = 0
+        self.entries = []
+        self.errors = []
+        self.new_employees = set()
+        self.new_types = set()
+
+    def counts(self):
+        """Return {status: number of assets} for every status."""
+        counts = Counter(entry.status for entry in self.entries)
+        return {status: counts[status] for status in ASSET_DIFF_STATUSES}
+
+    def by_status(self, status):
+        return [entry for entry in self.entries if entry.status == status]
+
+
+def diff_rows(rows, index=None):
+    """
+    Classify the assets of the ``(line_num, row dict)`` pairs in ``rows``
+    against ``index`` (by default the stored inventory) and return an
+    ImportDiff. Only reads run; nothing is saved.
+    """
+    index = index or InventoryIndex()
+    diff = ImportDiff()
+    seen = {}  # (type name, serial number) -> line of its first occurrence
+
+    for line_num, row in rows:
+        parsed = parse_row(line_num, row)
+        diff.rows_processed += 1
+        if parsed.error:
+            diff.errors.append(parsed.error)
+            continue
+        employee = parsed.employee
+        if employee and employee not in index.employees:
+            diff.new_employees.add(employee)
+
+        for record in parsed.assets:
+            error = validate_record(record)
+            if error:
+                diff.errors.append(f"Row {line_num} {record.type_name} error: {error}")
+                continue
+            if record.type_name not in index.types:
+                diff.new_types.add(record.type_name)
+
+            diff.entries.append(_classify(index, seen, line_num, record, employee))
+    return diff
+
+
+def _classify(index, seen, line_num, record, employee):
+    key = (record.type_name, record.serial_number)
+    if record.serial_number and key in seen:
+        return AssetDiff(
+            line_num,
+            "conflicting",
+            record,
+            employee,
+            None,
+            {},
+            f"Same type and serial number as row {seen[key]}",
+        )
+    if record.serial_number:
+        seen[key] = line_num
+
+    matches = index.matches(record)
+    if not matches:
+        return AssetDiff(line_num, "new", record, employee, None, {}, "")
+    if len(matches) > 1:
+        return AssetDiff(
+            line_num,
+            "conflicting",
+            record,
+            employee,
+            None,
+            {},
+            f"Matches {len(matches)} existing assets",
+        )
+    stored = matches[0]
+    changes = index.changes(stored, record, employee)
+    status = "changed" if changes else "unchanged"
+    return AssetDiff(line_num, status, record, employee, stored["id"], changes, "")
@@ -0,0 +1,189 @@
+"""
+Database-backed queue for bulk CSV imports.
+
+The upload view stores the file and enqueues an ImportJob; the
+``run_import_jobs`` management command claims queued jobs and runs them
+through the import engine, recording progress on the job as it goes. The
+stored file is deleted once the job has finished, whatever the outcome.
+
+A worker that crashes or is killed leaves its job "running". The command
+fails such jobs once they have reported no progress for
+``settings.IMPORT_JOB_STALE_AFTER`` seconds (see ``fail_stale_jobs``).
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils import timezone
+
+from common.current_user import acting_as
+
+from ..models import ImportJob
+from .csv_import import BulkAssetImporter
+from .csv_stream import iter_csv_rows
+
+logger = logging.getLogger(__name__)
+
+# Only the first errors are kept on the job; error_count has the total.
+MAX_STORED_ERRORS = 500
+
+DEFAULT_STALE_AFTER = 30 * 60  # seconds
+
+
+def enqueue_import(uploaded_file, user, upsert=False):
+    """Store ``uploaded_file`` and queue it for import on behalf of ``user``."""
+    return ImportJob.objects.create(
+        csv_file=uploaded_file,
+        created_by=user,
+        upsert=upsert,
+        bytes_total=uploaded_file.size or 0,
+    )
+
+
+def claim_next_job():
+    """
+    Mark the oldest queued job as running and return it, or None if the queue
+    is empty. Claiming is a conditional UPDATE, so concurrent workers never
+    pick up the same job.
+    """
+    while True:
+        job = ImportJob.objects.filter(status="queued").order_by("created_at", "id").first()
+        if job is None:
+            return None
+        now = timezone.now()
+        claimed = ImportJob.objects.filter(pk=job.pk, status="queued").update(
+            status="running", started_at=now, heartbeat_at=now
+        )
+        if claimed:
+            job.refresh_from_db()
+            return job
+
+
+def run_import_job(job, workers=None):
+    """
+    Import the file of a claimed job and store the outcome on it. ``workers``
+    overrides settings.BULK_IMPORT_WORKERS.
+    """
+
+    def save_progress(result):
+        ImportJob.objects.filter(pk=job.pk).update(
+            rows_processed=result.rows_processed,
+            created_count=result.created_count,
+            updated_count=result.updated_count,
+            bytes_processed=min(job.csv_file.file.tell(), job.bytes_total),
+            error_count=len(result.errors),
+            errors=result.errors[:MAX_STORED_ERRORS],
+            heartbeat_at=timezone.now(),
+        )
+
+    importer = BulkAssetImporter(
+        user=job.created_by, on_chunk=save_progress, workers=workers, upsert=job.upsert
+    )
+    try:
+        with acting_as(job.created_by), job.csv_file.open("rb"):
+            importer.run(iter_csv_rows(job.csv_file))
+    except UnicodeDecodeError:
+        status = "failed"
+        message = (
+            f"Error decoding CSV file after row {importer.result.rows_processed}. "
+            "Please ensure it is encoded in UTF-8."
+        )
+    except Exception as exc:
+        logger.exception("Import job %s failed", job.pk)
+        status = "failed"
+        message = f"Import failed after row {importer.result.rows_processed}: {exc}"
+    else:
+        status = "done"
+        message = import_message(importer.result)
+
+    result = importer.result
+    ImportJob.objects.filter(pk=job.pk).update(
+        status=status,
+        message=message,
+        rows_processed=result.rows_processed,
+        created_count=result.created_count,
+        updated_count=result.updated_count,
+        bytes_processed=F("bytes_total") if status == "done" else F("bytes_processed"),
+        error_count=len(result.errors),
+        errors=result.errors[:MAX_STORED_ERRORS],
+        finished_at=timezone.now(),
+    )
+    job.refresh_from_db()
+    # Clears the field and saves the job
+    job.csv_file.delete()
+    return job
+
+
+def fail_stale_jobs(stale_after=None):
+    """
+    Fail the running jobs that have reported no progress for ``stale_after``
+    (a timedelta, by default ``settings.IMPORT_JOB_STALE_AFTER`` seconds):
+    their worker crashed or was killed. Returns the failed jobs.
+
+    The chunks committed before the worker stopped are kept, so a stale job
+    is failed rather than queued again, which would import them twice.
+    """
+    if stale_after is None:
+        stale_after = timedelta(
+            seconds=getattr(settings, "IMPORT_JOB_STALE_AFTER", DEFAULT_STALE_AFTER)
+        )
+    cutoff = timezone.now() - stale_after
+    # Jobs claimed before heartbeats were recorded only have started_at
+    stale = Q(status="running") & (
+        Q(heartbeat_at__lt=cutoff) | Q(heartbeat_at__isnull=True, started_at__lt=cutoff)
+    )
+    failed = []
+    for job in ImportJob.objects.filter(stale):
+        # Conditional, so a job that reported progress meanwhile is left alone
+        if not ImportJob.objects.filter(stale, pk=job.pk).update(
+            status="failed",
+            message=(
+                f"Import stopped after row {job.rows_processed}: the import worker "
+                "stopped responding. The rows up to it were imported."
+            ),
+            finished_at=timezone.now(),
+        ):
+            continue
+        job.refresh_from_db()
+        # Clears the field and saves the job
+        job.csv_file.delete()
+        failed.append(job)
+    return failed
+
+
+def import_message(result):
+    """Return the success message for the ImportResult ``result``."""
+    message = f"Successfully uploaded {result.created_count} asset record(s)."
+    if result.updated_count or result.unchanged_count:
+        message += (
+            f" Updated {result.updated_count} existing asset(s); "
+            f"{result.unchanged_count} were unchanged."
+        )
+    return message
+
+
+def job_progress(job):
+    """Return a JSON-serialisable progress report for ``job``."""
+    now = timezone.now()
+    elapsed = ((job.finished_at or now) - job.started_at).total_seconds() if job.started_at else 0
+    rows_per_second = job.rows_processed / elapsed if elapsed > 0 else 0
+    fraction = job.bytes_processed / job.bytes_total if job.bytes_total else 0
+    eta = None
+    if job.status == "running" and 0 < fraction < 1:
+        eta = round(elapsed * (1 - fraction) / fraction)
+    elif job.status in ("done", "failed"):
+        eta = 0
+    return {
+        "id": job.pk,
+        "status": job.status,
+        "rows_processed": job.rows_processed,
+        "created_count": job.created_count,
+        "updated_count": job.updated_count,
+        "rows_per_second": round(rows_per_second, 1),
+        "percent": round(fraction * 100, 1),
+        "eta_seconds": eta,
+        "error_count": job.error_count,
+        "errors": job.errors,
+        "message": job.message,
+    }
@@ -0,0 +1,207 @@
+"""
+Maintenance of InventorySummary, the per-employee / per-type / per-condition
+asset counts that read-heavy pages use instead of scanning Asset.
+
+Every write path calls ``apply_inventory_deltas`` with a Counter keyed by
+``(employee_id, type_id, condition)``: the signals for single saves and
+deletes, the bulk importer for whole chunks.
+"""
+from collections import Counter
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q
+
+from ..models import Asset, InventorySummary
+
+
+def inventory_key(asset):
+    return (asset.alloted_to_id, asset.type_id, asset.condition)
+
+
+def _key_filter(key):
+    employee_id, type_id, condition = key
+    return {"employee_id": employee_id, "asset_type_id": type_id, "condition": condition}
+
+
+# Keys handled per statement when a write touches many summary rows
+DELTA_BATCH_SIZE = 500
+
+
+def apply_inventory_deltas(deltas):
+    """Add the counts in ``deltas`` to the summary, dropping rows that reach zero."""
+    increments = {key: delta for key, delta in deltas.items() if delta > 0}
+    decrements = {key: delta for key, delta in deltas.items() if delta < 0}
+    emptied = False
+    with transaction.atomic():
+        # A single key, as sent by the save signals, takes one statement
+        if len(decrements) == 1:
+            emptied = _subtract_count(*decrements.popitem())
+        for batch in _batches(decrements):
+            emptied |= _subtract_counts(batch)
+        if len(increments) == 1:
+            _add_count(*increments.popitem())
+        for batch in _batches(increments):
+            _add_counts(batch)
+        if emptied:
+            InventorySummary.objects.filter(count__lte=0).delete()
+
+
+def _batches(deltas):
+    keys = list(deltas)
+    for start in range(0, len(keys), DELTA_BATCH_SIZE):
+        yield {key: deltas[key] for key in keys[start : start + DELTA_BATCH_SIZE]}
+
+
+def _subtract_count(key, delta):
+    # If there is nothing to decrement the summary is already out of step,
+    # which rebuild_inventory_summary --verify reports.
+    return bool(
+        InventorySummary.objects.filter(count__gte=-delta, **_key_filter(key)).update(
+            count=F("count") + delta
+        )
+    )
+
+
+def _subtract_counts(decrements):
+    """
+    Apply a batch of negative deltas with one UPDATE per distinct delta.
+    Returns whether any row was decremented.
+    """
+    by_delta = {}
+    for key, pk in _summary_ids(decrements).items():
+        by_delta.setdefault(decrements[key], []).append(pk)
+    updated = 0
+    for delta, ids in by_delta.items():
+        updated += InventorySummary.objects.filter(
+            pk__in=ids, count__gte=-delta
+        ).update(count=F("count") + delta)
+    return bool(updated)
+
+
+def _add_count(key, delta):
+    rows = InventorySummary.objects.filter(**_key_filter(key))
+    if rows.update(count=F("count") + delta):
+        return
+    try:
+        with transaction.atomic():
+            InventorySummary.objects.create(count=delta, **_key_filter(key))
+    except IntegrityError:
+        # Created concurrently by another writer
+        rows.update(count=F("count") + delta)
+
+
+def _add_counts(increments):
+    """
+    Add a batch of positive deltas with one UPDATE per distinct delta for the
+    rows that exist and one INSERT for the rest, instead of a statement or two
+    per key.
+    """
+    existing = _summary_ids(increments)
+    by_delta = {}
+    for key, pk in existing.items():
+        by_delta.setdefault(increments[key], []).append(pk)
+    for delta, ids in by_delta.items():
+        InventorySummary.objects.filter(pk__in=ids).update(count=F("count") + delta)
+    missing = [key for key in increments if key not in existing]
+    if not missing:
+        return
+    try:
+        with transaction.atomic():
+            InventorySummary.objects.bulk_create(
+                [
+                    InventorySummary(count=increments[key], **_key_filter(key))
+                    for key in missing
+                ]
+            )
+    except IntegrityError:
+        # Some were created concurrently by another writer
+        for key in missing:
+            _add_count(key, increments[key])
+
+
+def _summary_ids(keys):
+    """Return {key: summary row id} for the ``keys`` that have a summary row."""
+    employee_ids = {employee_id for employee_id, _, _ in keys}
+    employees = Q(employee_id__in=employee_ids - {None})
+    if None in employee_ids:
+        employees |= Q(employee__isnull=True)
+    rows = InventorySummary.objects.filter(
+        employees,
+        asset_type_id__in={type_id for _, type_id, _ in keys},
+        condition__in={condition for _, _, condition in keys},
+    ).values_list("id", "employee_id", "asset_type_id", "condition")
+    return {
+        (employee_id, type_id, condition): pk
+        for pk, employee_id, type_id, condition in rows
+        if (employee_id, type_id, condition) in keys
+    }
+
+
+def record_inventory_change(before, after):
+    """Move one asset from summary key ``before`` to ``after`` (either may be None)."""
+    if before == after:
+        return
+    deltas = Counter()
+    if before is not None:
+        deltas[before] -= 1
+    if after is not None:
+        deltas[after] += 1
+    apply_inventory_deltas(deltas)
+
+
+def fold_employee_inventory(employee_id):
+    """Move an employee's rows to the unassigned rows; their assets are being unassigned."""
+    rows = InventorySummary.objects.filter(employee_id=employee_id)
+    deltas = Counter()
+    for type_id, condition, count in rows.values_list("asset_type_id", "condition", "count"):
+        deltas[(None, type_id, condition)] += count
+    with transaction.atomic():
+        rows.delete()
+        apply_inventory_deltas(deltas)
+
+
+def count_inventory():
+    """Return {(employee_id, type_id, condition): count} computed from Asset."""
+    rows = (
+        Asset.objects.order_by()
+        .values_list("alloted_to_id", "type_id", "condition")
+        .annotate(count=Count("id"))
+    )
+    return {(employee, type_id, condition): n for employee, type_id, condition, n in rows}
+
+
+def summary_counts():
+    """Return {(employee_id, type_id, condition): count} as stored in InventorySummary."""
+    rows = InventorySummary.objects.filter(count__gt=0).values_list(
+        "employee_id", "asset_type_id", "condition", "count"
+    )
+    return {(employee, type_id, condition): n for employee, type_id, condition, n in rows}
+
+
+def rebuild_inventory_summary():
+    """Replace the summary with counts computed from Asset; returns the number of rows."""
+    counts = count_inventory()
+    with transaction.atomic():
+        InventorySummary.objects.all().delete()
+        InventorySummary.objects.bulk_create(
+            [
+                InventorySummary(count=count, **_key_filter(key))
+                for key, count in counts.items()
+            ],
+            batch_size=1000,
+        )
+    return len(counts)
+
+
+def verify_inventory_summary():
+    """
+    Compare the summary with Asset. Returns a list of
+    (key, summary_count, actual_count) for every key that differs.
+    """
+    actual = count_inventory()
+    stored = summary_counts()
+    return [
+        (key, stored.get(key, 0), actual.get(key, 0))
+        for key in sorted(actual.keys() | stored.keys(), key=repr)
+        if stored.get(key, 0) != actual.get(key, 0)
+    ]
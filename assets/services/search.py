@@ -0,0 +1,195 @@
+"""
+Search over assets for the asset list and dashboard search boxes.
+
+The backend is chosen with ``settings.ASSET_SEARCH_BACKEND`` (a dotted path).
+When it is not set, SQLite databases that have the FTS5 index created by
+migration 0004 use SQLiteFTSSearchBackend and everything else falls back to
+LikeSearchBackend, which runs the original ``icontains`` filters.
+
+Searchable fields are "make_model", "serial_number", "type_name" and
+"employee_name" (the assignee's full name). ``ranked`` also annotates each
+asset with the backend's relevance (``rank_field``) when it has one, so the
+asset list can show the best matches first.
+"""
+import functools
+import re
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connection
+from django.db.models import F, Lookup, Q
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+from ..models import Asset, AssetSearchIndex, AssetType, Employee
+
+SEARCH_FIELDS = ("make_model", "serial_number", "type_name", "employee_name")
+
+FTS_TABLE = AssetSearchIndex._meta.db_table
+
+
+@AssetSearchIndex._meta.get_field("document").register_lookup
+class Match(Lookup):
+    """``document__match=expression``: an FTS5 full-text MATCH."""
+
+    lookup_name = "match"
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f"{lhs} MATCH {rhs}", lhs_params + rhs_params
+
+
+class LikeSearchBackend:
+    """Unindexed fallback: case-insensitive substring match on every field."""
+
+    # annotation added by ranked(); None when results cannot be ranked
+    rank_field = None
+
+    lookups = {
+        "make_model": ["make_model__icontains"],
+        "serial_number": ["serial_number__icontains"],
+        "type_name": ["type__name__icontains"],
+        "employee_name": [
+            "alloted_to__first_name__icontains",
+            "alloted_to__last_name__icontains",
+        ],
+    }
+
+    def filter(self, queryset, query, fields=SEARCH_FIELDS):
+        """Restrict an Asset ``queryset`` to rows matching ``query``."""
+        condition = Q()
+        for field in fields:
+            for lookup in self.lookups[field]:
+                condition |= Q(**{lookup: query})
+        return queryset.filter(condition)
+
+    def ranked(self, queryset, query, fields=SEARCH_FIELDS):
+        """
+        Like filter, but also annotate each asset with ``rank_field`` (lower
+        is a better match) when the backend ranks results.
+        """
+        return self.filter(queryset, query, fields)
+
+    def index_assets(self, asset_ids):
+        pass
+
+    def remove_assets(self, asset_ids):
+        pass
+
+    def rebuild(self):
+        pass
+
+
+class SQLiteFTSSearchBackend(LikeSearchBackend):
+    """
+    SQLite FTS5 index with one row per asset (rowid = asset id). Every
+    whitespace separated term of a query is a prefix phrase and all terms
+    must match; results are ranked with bm25.
+    """
+
+    batch_size = 500
+    rank_field = "search_rank"
+
+    def filter(self, queryset, query, fields=SEARCH_FIELDS):
+        expression = self.match_expression(query, fields)
+        if expression is None:
+            return queryset.none()
+        return queryset.filter(
+            pk__in=RawSQL(
+                f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s",
+                [expression],
+            )
+        )
+
+    def ranked(self, queryset, query, fields=SEARCH_FIELDS):
+        # joins the index rather than using pk__in, so the bm25 rank of the
+        # MATCH can be selected and ordered on
+        expression = self.match_expression(query, fields)
+        queryset = queryset.annotate(**{self.rank_field: F("search_index__rank")})
+        if expression is None:
+            return queryset.none()
+        return queryset.filter(search_index__document__match=expression)
+
+    @staticmethod
+    def match_expression(query, fields=SEARCH_FIELDS):
+        """
+        Build an FTS5 query: "hp 280" becomes ``{cols}: ("hp"* AND "280"*)``.
+        Punctuation inside a term keeps its tokens together as a phrase, so
+        "697738-001" matches the serial number rather than two loose words.
+        """
+        phrases = []
+        for term in query.split():
+            tokens = re.findall(r"\w+", term)
+            if tokens:
+                phrases.append('"' + " ".join(tokens) + '"*')
+        if not phrases:
+            return None
+        return "{%s}: (%s)" % (" ".join(fields), " AND ".join(phrases))
+
+    def index_assets(self, asset_ids):
+        """(Re)build the index rows of ``asset_ids``."""
+        for batch, placeholders in self._batches(asset_ids):
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})", batch
+                )
+                cursor.execute(
+                    self.index_insert_sql() + f" WHERE a.id IN ({placeholders})", batch
+                )
+
+    def remove_assets(self, asset_ids):
+        for batch, placeholders in self._batches(asset_ids):
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})", batch
+                )
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE}")
+            cursor.execute(self.index_insert_sql())
+
+    def _batches(self, asset_ids):
+        asset_ids = list(asset_ids)
+        for start in range(0, len(asset_ids), self.batch_size):
+            batch = asset_ids[start:start + self.batch_size]
+            yield batch, ", ".join(["%s"] * len(batch))
+
+    @staticmethod
+    def index_insert_sql():
+        return (
+            f"INSERT INTO {FTS_TABLE}"
+            "(rowid, make_model, serial_number, type_name, employee_name) "
+            "SELECT a.id, a.make_model, COALESCE(a.serial_number, ''), t.name, "
+            "COALESCE(e.first_name || ' ' || e.last_name, '') "
+            f"FROM {Asset._meta.db_table} a "
+            f"JOIN {AssetType._meta.db_table} t ON t.id = a.type_id "
+            f"LEFT JOIN {Employee._meta.db_table} e ON e.id = a.alloted_to_id"
+        )
+
+
+def fts_available():
+    """True when the default database is SQLite and has the FTS5 index table."""
+    return (
+        connection.vendor == "sqlite"
+        and FTS_TABLE in connection.introspection.table_names()
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def get_search_backend():
+    path = getattr(settings, "ASSET_SEARCH_BACKEND", None)
+    if path:
+        return import_string(path)()
+    if fts_available():
+        return SQLiteFTSSearchBackend()
+    return LikeSearchBackend()
+
+
+async def aget_search_backend():
+    """
+    Async version of get_search_backend. The first call in a process looks
+    the index table up with a sync query, so it runs in a thread.
+    """
+    return await sync_to_async(get_search_backend)()
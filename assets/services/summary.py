@@ -0,0 +1,157 @@
+"""
+Asset counts shown on the dashboard.
+
+The headline counts come from one conditional-aggregate query over the
+InventorySummary table and are cached until an asset is created, deleted,
+reassigned or changes condition. The cache timeout
+(``settings.ASSET_SUMMARY_CACHE_TIMEOUT``) bounds how stale another process's
+copy can get when the cache backend is not shared between processes.
+
+Per-employee counts also come from InventorySummary; sample assets and
+categories are computed by the database for the employees of one page.
+
+The ``a``-prefixed functions are the async versions used by async views.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F, Max, Q, Sum, Window
+from django.db.models.functions import Coalesce, RowNumber
+
+from ..models import Asset, InventorySummary
+
+ASSET_SUMMARY_CACHE_KEY = "assets:summary"
+
+
+def condition_filters(prefix=""):
+    """
+    Return the (damaged, under_repair, disposed) filters on ``<prefix>condition``.
+    Conditions are free text when they come from an import, so they are
+    matched loosely, as the dashboard always has.
+    """
+    field = f"{prefix}condition"
+    return (
+        Q(**{f"{field}__iexact": "damaged"}),
+        Q(**{f"{field}__icontains": "repair"}),
+        Q(**{f"{field}__icontains": "disposed"}),
+    )
+
+
+def _summary_aggregates():
+    damaged, under_repair, disposed = condition_filters()
+    return {
+        "total_assets": Coalesce(Sum("count"), 0),
+        "assigned_assets": Coalesce(Sum("count", filter=Q(employee__isnull=False)), 0),
+        "damaged_assets": Coalesce(Sum("count", filter=damaged), 0),
+        "under_repair": Coalesce(Sum("count", filter=under_repair), 0),
+        "disposed_assets": Coalesce(Sum("count", filter=disposed), 0),
+    }
+
+
+def compute_asset_summary():
+    """Count assets in total, assigned, damaged, under repair and disposed."""
+    return InventorySummary.objects.aggregate(**_summary_aggregates())
+
+
+def get_asset_summary():
+    return cache.get_or_set(
+        ASSET_SUMMARY_CACHE_KEY,
+        compute_asset_summary,
+        timeout=getattr(settings, "ASSET_SUMMARY_CACHE_TIMEOUT", 300),
+    )
+
+
+async def aget_asset_summary():
+    summary = await cache.aget(ASSET_SUMMARY_CACHE_KEY)
+    if summary is None:
+        summary = await InventorySummary.objects.aaggregate(**_summary_aggregates())
+        await cache.aset(
+            ASSET_SUMMARY_CACHE_KEY,
+            summary,
+            timeout=getattr(settings, "ASSET_SUMMARY_CACHE_TIMEOUT", 300),
+        )
+    return summary
+
+
+def invalidate_asset_summary():
+    cache.delete(ASSET_SUMMARY_CACHE_KEY)
+
+
+def annotate_asset_counts(employees):
+    """
+    Annotate an Employee queryset with asset_count, damaged_count,
+    repair_count and disposed_count. Each asset counts in the first of
+    damaged / repair / disposed that its condition matches.
+    """
+    damaged, under_repair, disposed = condition_filters("inventory_summary__")
+
+    def total(condition=None):
+        return Coalesce(Sum("inventory_summary__count", filter=condition), 0)
+
+    return employees.annotate(
+        asset_count=total(),
+        damaged_count=total(damaged),
+        repair_count=total(under_repair & ~damaged),
+        disposed_count=total(disposed & ~damaged & ~under_repair),
+    )
+
+
+def _newest_assets(employee_ids, samples):
+    return (
+        Asset.objects.filter(alloted_to_id__in=employee_ids)
+        .annotate(
+            position=Window(
+                RowNumber(),
+                partition_by=F("alloted_to_id"),
+                order_by=[F("created_at").desc(), F("id").desc()],
+            )
+        )
+        .filter(position__lte=samples)
+        .order_by("alloted_to_id", "position")
+        .values_list("alloted_to_id", "make_model")
+    )
+
+
+def _asset_types(employee_ids):
+    return (
+        Asset.objects.filter(alloted_to_id__in=employee_ids)
+        .values("alloted_to_id", "type_id", "type__name")
+        .annotate(latest=Max("created_at"))
+        .order_by("alloted_to_id", "-latest")
+    )
+
+
+def employee_asset_rollups(employee_ids, samples=3):
+    """
+    Return {employee_id: (sample_asset_names, categories)} for the given
+    employees using two queries: the newest ``samples`` asset names per
+    employee (a ROW_NUMBER window) and the distinct asset types they hold,
+    most recently assigned first.
+    """
+    rollups = {pk: ([], []) for pk in employee_ids}
+    if not rollups:
+        return rollups
+
+    for employee_id, make_model in _newest_assets(employee_ids, samples):
+        rollups[employee_id][0].append(make_model or "-")
+
+    for row in _asset_types(employee_ids):
+        rollups[row["alloted_to_id"]][1].append(
+            {"id": row["type_id"], "name": row["type__name"] or "-"}
+        )
+    return rollups
+
+
+async def aemployee_asset_rollups(employee_ids, samples=3):
+    """Async version of employee_asset_rollups."""
+    rollups = {pk: ([], []) for pk in employee_ids}
+    if not rollups:
+        return rollups
+
+    async for employee_id, make_model in _newest_assets(employee_ids, samples):
+        rollups[employee_id][0].append(make_model or "-")
+
+    async for row in _asset_types(employee_ids):
+        rollups[row["alloted_to_id"]][1].append(
+            {"id": row["type_id"], "name": row["type__name"] or "-"}
+        )
+    return rollups
@@ -1,55 +1,62 @@
 from django.contrib.auth.models import User
-from django.db.models.signals import post_save, pre_save
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
 from django.dispatch import receiver
 
-from common.current_user import get_current_user  # << added
-
-from .models import Asset, AssetHistory
+from .models import Asset, AssetType, Employee
+from .services.choices import invalidate_employee_choices
+from .services.history import (
+    forget_asset,
+    forget_employee,
+    history_changes,
+    record_history,
+)
+from .services.inventory import (
+    fold_employee_inventory,
+    inventory_key,
+    record_inventory_change,
+)
+from .services.search import get_search_backend
+from .services.summary import invalidate_asset_summary
 
 
 @receiver(pre_save, sender=Asset)
 def log_asset_changes(sender, instance, **kwargs):
     """
-    Before saving, compare with the old instance to detect changes
-    and record them in AssetHistory.
+    Before saving, compare with the values the asset was loaded with to
+    detect changes and record them in AssetHistory.
     """
     if not instance.pk:  # New asset
         return  # post_save will handle "created"
 
-    try:
-        old_instance = Asset.objects.get(pk=instance.pk)
-    except Asset.DoesNotExist:
+    # Values as last loaded/saved; only queried if the instance has no snapshot
+    old = instance.saved_tracked_values()
+    if old is None:
         return
 
-    changes = []
+    # A field deferred with .only() is not saved, so it keeps its old value;
+    # reading it from the instance would load it with a query of its own
+    deferred = instance.get_deferred_fields()
+    new = {
+        attname: old[attname] if attname in deferred else getattr(instance, attname)
+        for attname in Asset.TRACKED_FIELDS
+    }
 
-    if old_instance.alloted_to != instance.alloted_to:
-        changes.append(
-            (
-                "transferred" if old_instance.alloted_to else "assigned",
-                instance.alloted_to,
-            )
-        )
+    # The dashboard summary counts by assignment and condition
+    instance._summary_changed = (
+        old["alloted_to_id"] != new["alloted_to_id"]
+        or old["condition"] != new["condition"]
+    )
+    instance._inventory_keys = (
+        (old["alloted_to_id"], old["type_id"], old["condition"]),
+        (new["alloted_to_id"], new["type_id"], new["condition"]),
+    )
+
+    changes = history_changes(old, new)
 
-    if old_instance.condition != instance.condition:
-        if instance.condition == "disposed":
-            changes.append(("disposed", instance.alloted_to))
-        elif instance.condition == "repair":
-            changes.append(("repaired", instance.alloted_to))
-
-    # If asset was deactivated (is_active=False)
-    if old_instance.is_active != instance.is_active and not instance.is_active:
-        changes.append(("returned", instance.alloted_to))
-
-    # Write history for each detected change
-    user = get_current_user()
-    for action, employee in changes:
-        AssetHistory.objects.create(
-            asset=instance,
-            employee=employee,
-            performed_by=user,
-            action=action,
-            remarks=f"System auto-logged change: {action}",
+    # Record history for each detected change
+    for action, employee_id in changes:
+        record_history(
+            instance.pk, action, employee_id, f"System auto-logged change: {action}"
         )
 
 
@@ -57,11 +64,86 @@ def log_asset_changes(sender, instance, **kwargs):
 def log_asset_creation(sender, instance, created, **kwargs):
     """Log when a new asset is created"""
     if created:
-        user = get_current_user()
-        AssetHistory.objects.create(
-            asset=instance,
-            employee=instance.alloted_to,
-            performed_by=user,
-            action="created",
-            remarks="Asset record created",
+        record_history(
+            instance.pk, "created", instance.alloted_to_id, "Asset record created"
+        )
+
+
+@receiver(post_delete, sender=Asset)
+def forget_asset_history(sender, instance, **kwargs):
+    forget_asset(instance.pk)
+
+
+@receiver(post_delete, sender=Employee)
+def forget_employee_history(sender, instance, **kwargs):
+    forget_employee(instance.pk)
+
+
+@receiver(post_save, sender=Asset)
+def update_inventory_summary(sender, instance, created, **kwargs):
+    """Move the asset between InventorySummary rows when its key changes"""
+    if created:
+        record_inventory_change(None, inventory_key(instance))
+    elif getattr(instance, "_inventory_keys", None):
+        record_inventory_change(*instance._inventory_keys)
+
+
+@receiver(post_delete, sender=Asset)
+def remove_from_inventory_summary(sender, instance, **kwargs):
+    record_inventory_change(inventory_key(instance), None)
+
+
+@receiver(pre_delete, sender=Employee)
+def unassign_inventory_summary(sender, instance, **kwargs):
+    fold_employee_inventory(instance.pk)
+
+
+@receiver(post_save, sender=Asset)
+def refresh_asset_summary(sender, instance, created, **kwargs):
+    if created or getattr(instance, "_summary_changed", False):
+        invalidate_asset_summary()
+
+
+@receiver(post_delete, sender=Asset)
+@receiver(post_delete, sender=Employee)
+def drop_asset_summary(sender, **kwargs):
+    invalidate_asset_summary()
+
+
+@receiver(post_save, sender=Asset)
+def index_asset(sender, instance, **kwargs):
+    """Keep the search index row of a saved asset up to date"""
+    get_search_backend().index_assets([instance.pk])
+
+
+@receiver(post_delete, sender=Asset)
+def unindex_asset(sender, instance, **kwargs):
+    get_search_backend().remove_assets([instance.pk])
+
+
+@receiver(post_save, sender=Employee)
+@receiver(post_save, sender=AssetType)
+def reindex_related_assets(sender, instance, created, **kwargs):
+    """Employee and type names are indexed with their assets"""
+    if not created:
+        get_search_backend().index_assets(
+            instance.assets.values_list("id", flat=True)
         )
+
+
+@receiver(pre_delete, sender=Employee)
+def remember_employee_assets(sender, instance, **kwargs):
+    # alloted_to is SET_NULL by a plain UPDATE, so note the assets to reindex
+    instance._asset_ids = list(instance.assets.values_list("id", flat=True))
+
+
+@receiver(post_delete, sender=Employee)
+def reindex_unassigned_assets(sender, instance, **kwargs):
+    get_search_backend().index_assets(getattr(instance, "_asset_ids", []))
+
+
+@receiver(post_save, sender=Employee)
+@receiver(post_delete, sender=Employee)
+def refresh_employee_choices(sender, **kwargs):
+    """Drop the cached assignee dropdown when an employee changes"""
+    invalidate_employee_choices()
@@ -1,3 +1,1473 @@
-from django.test import TestCase
+import csv
+import gzip
+import io
+import json
+import os
+import runpy
+import tempfile
+from datetime import datetime, timedelta
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser, Permission, User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, connection, connections, transaction
+from django.http import HttpResponse
+from django.test import (
+    AsyncClient,
+    RequestFactory,
+    SimpleTestCase,
+    TestCase,
+    override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from common.current_user import (
+    ContextThreadPoolExecutor,
+    CurrentUserMiddleware,
+    acting_as,
+    get_current_user,
+)
+from common.db_router import ReadOnlyViewRouter, read_only_view
+from common.login_required import LoginRequiredMiddleware
+from common.pagination import KeysetPaginator
+from common.query_stats import QueryStatsMiddleware, query_stats, reset_query_stats
+
+from .benchmarks.generator import generate_inventory
+from .benchmarks.scenarios import SCENARIOS, BenchmarkData, run_scenario
+from .models import (
+    Asset,
+    AssetHistory,
+    AssetHistoryArchive,
+    AssetLifecycle,
+    AssetType,
+    Employee,
+    ImportJob,
+)
+from .services.bulk_operations import reassign_assets
+from .services.csv_import import BulkAssetImporter, chunked, parse_in_processes
+from .services.csv_parsing import parse_rows
+from .services.csv_stream import iter_csv_rows
+from .services.history_archive import archive_history, asset_lifecycle
+from .services.import_diff import diff_rows
+from .services.import_jobs import claim_next_job, enqueue_import, run_import_job
+from .services.inventory import (
+    apply_inventory_deltas,
+    summary_counts,
+    verify_inventory_summary,
+)
+from .services.search import get_search_backend
+from .services.summary import (
+    aget_asset_summary,
+    annotate_asset_counts,
+    employee_asset_rollups,
+    get_asset_summary,
+)
+
+
+class AsyncSearchViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("viewer", password="pw")
+        employee = Employee.objects.create(first_name="Asha", last_name="Rao")
+        laptop = AssetType.objects.create(name="Laptop")
+        Asset.objects.create(
+            type=laptop,
+            make_model="HP ProBook",
+            serial_number="SN-HP-1",
+            year_of_purchase=2023,
+            alloted_to=employee,
+        )
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        # As in a fresh process, where the backend has not been picked yet
+        get_search_backend.cache_clear()
+
+    def test_asset_list_search_in_cold_process(self):
+        response = self.client.get(reverse("asset_list"), {"q": "hp"})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "SN-HP-1")
+
+    def test_dashboard_search_in_cold_process(self):
+        response = self.client.get(reverse("dashboard"), {"q": "hp"})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Asha")
+
+
+class SearchRankingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("viewer", password="pw")
+        laptop = AssetType.objects.create(name="Laptop")
+        # the older asset is the better match, so rank and age disagree
+        cls.strong = Asset.objects.create(
+            type=laptop,
+            make_model="Dell Latitude",
+            serial_number="DELL-1",
+            year_of_purchase=2021,
+        )
+        cls.weak = Asset.objects.create(
+            type=laptop,
+            make_model="Dell Latitude 5420 business laptop with docking station",
+            serial_number="SN-2",
+            year_of_purchase=2023,
+        )
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        get_search_backend.cache_clear()
+        if not get_search_backend().rank_field:
+            self.skipTest("the search backend does not rank results")
+
+    @mock.patch("assets.views.asset.ASSET_LIST_PAGE_SIZE", 1)
+    def test_asset_list_search_pages_best_match_first(self):
+        response = self.client.get(reverse("asset_list"), {"q": "dell"})
+        page = response.context["page"]
+        self.assertEqual([asset.pk for asset in page], [self.strong.pk])
+
+        response = self.client.get(
+            reverse("asset_list"), {"q": "dell", "cursor": page.next_cursor}
+        )
+        page = response.context["page"]
+        self.assertEqual([asset.pk for asset in page], [self.weak.pk])
+        self.assertFalse(page.has_next)
+
+
+def sheet_row(name, device, serial, **cells):
+    """One row of the combined inventory sheet; ``cells`` override columns."""
+    row = {
+        "Alloted To": name,
+        "Device": device,
+        "Serial No.": serial,
+        "PROCESSOR": "Intel Core i5",
+        "RAM": "8 GB",
+        "Year of Purchase": "2022",
+        "Condition": f"{device}: Working",
+    }
+    row.update(cells)
+    return row
+
+
+def numbered(rows):
+    return list(enumerate(rows, start=2))
+
+
+class UpsertImportTests(TestCase):
+    def test_blank_cells_of_matched_assets_are_written_as_imported(self):
+        BulkAssetImporter(upsert=True).run(
+            numbered([sheet_row("Asha Rao", "Laptop", "SN-1")])
+        )
+
+        result = BulkAssetImporter(upsert=True).run(
+            numbered(
+                [
+                    sheet_row(
+                        "Asha Rao", "Laptop", "SN-1", PROCESSOR="", Condition="Laptop: "
+                    )
+                ]
+            )
+        )
+
+        self.assertEqual(result.errors, [])
+        self.assertEqual((result.created_count, result.updated_count), (0, 1))
+        asset = Asset.objects.get()
+        self.assertEqual((asset.make_model, asset.condition), ("", ""))
+
+    def test_rejected_chunk_is_reported_and_rolled_back(self):
+        calls = []
+
+        def fail_first(deltas):
+            calls.append(deltas)
+            if len(calls) == 1:
+                raise IntegrityError("summary rejected")
+            apply_inventory_deltas(deltas)
+
+        rows = numbered(
+            [
+                sheet_row("New Person", "Laptop", "SN-1"),
+                sheet_row("New Person", "Laptop", "SN-2"),
+            ]
+        )
+        target = "assets.services.csv_import.apply_inventory_deltas"
+        with mock.patch(target, fail_first):
+            result = BulkAssetImporter(chunk_size=1, upsert=True).run(rows)
+
+        self.assertEqual(
+            result.errors, ["Rows 2-2 were not imported: summary rejected"]
+        )
+        self.assertEqual(result.created_count, 1)
+        self.assertEqual(result.rows_processed, 2)
+        asset = Asset.objects.get()
+        self.assertEqual(asset.serial_number, "SN-2")
+        self.assertEqual(asset.alloted_to.first_name, "New")
+        self.assertEqual(verify_inventory_summary(), [])
+
+
+class AssetListTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser("admin", password="pw")
+        cls.employee = Employee.objects.create(first_name="Asha", last_name="Rao")
+        laptop = AssetType.objects.create(name="Laptop")
+        cls.asset = Asset.objects.create(
+            type=laptop, make_model="HP ProBook", year_of_purchase=2023
+        )
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        # The employee dropdown is cached, and the cache outlives test rollbacks
+        cache.clear()
+
+    def test_warm_asset_list_does_not_query_employees(self):
+        self.client.get(reverse("asset_list"))
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("asset_list"))
+        self.assertContains(
+            response, f'<option value="{self.employee.pk}">Asha Rao</option>'
+        )
+        self.assertFalse(
+            [q["sql"] for q in queries if 'FROM "assets_employee"' in q["sql"]]
+        )
+
+    def test_bulk_reassign(self):
+        response = self.client.post(
+            reverse("asset_bulk_action"),
+            {
+                "action": "reassign",
+                "employee": self.employee.pk,
+                "asset_ids": [self.asset.pk],
+            },
+        )
+        self.assertRedirects(
+            response, reverse("asset_list"), fetch_redirect_response=False
+        )
+        self.asset.refresh_from_db()
+        self.assertEqual(self.asset.alloted_to, self.employee)
+
+        self.client.post(
+            reverse("asset_bulk_action"),
+            {"action": "reassign", "employee": "", "asset_ids": [self.asset.pk]},
+        )
+        self.asset.refresh_from_db()
+        self.assertIsNone(self.asset.alloted_to)
+
+    def test_bulk_reassign_updates_the_summary_in_a_few_statements(self):
+        laptop = self.asset.type
+        holders = [
+            Employee.objects.create(first_name="Holder", last_name=str(n))
+            for n in range(20)
+        ]
+        for n in range(60):
+            Asset.objects.create(
+                type=laptop,
+                make_model="HP",
+                year_of_purchase=2020 + n % 3,
+                alloted_to=holders[n % 20],
+            )
+
+        with CaptureQueriesContext(connection) as queries:
+            count = reassign_assets(Asset.objects.all(), self.employee)
+
+        self.assertEqual(count, 61)
+        summary_updates = [
+            q["sql"]
+            for q in queries
+            if q["sql"].startswith('UPDATE "assets_inventorysummary"')
+        ]
+        # one UPDATE per distinct delta, not one per holder
+        self.assertLessEqual(len(summary_updates), 3)
+        self.assertEqual(verify_inventory_summary(), [])
+
+
+class AssetListPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser("admin", password="pw")
+        cls.asha = Employee.objects.create(first_name="Asha", last_name="Rao")
+        laptop = AssetType.objects.create(name="Laptop")
+        for n in range(7):
+            Asset.objects.create(
+                type=laptop,
+                make_model=f"HP {n}",
+                year_of_purchase=2023,
+                alloted_to=cls.asha if n % 3 else None,
+            )
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        cache.clear()
+
+    @mock.patch("assets.views.asset.ASSET_LIST_PAGE_SIZE", 2)
+    def test_pages_walk_the_filtered_assets_once(self):
+        expected = list(
+            Asset.objects.filter(alloted_to=self.asha)
+            .order_by("-created_at", "id")
+            .values_list("pk", flat=True)
+        )
+        params = {"assigned": self.asha.pk}
+        seen = []
+        while True:
+            response = self.client.get(reverse("asset_list"), params)
+            page = response.context["page"]
+            seen.extend(asset.pk for asset in page)
+            if not page.has_next:
+                break
+            # the Next link keeps the filter
+            self.assertContains(response, f"assigned={self.asha.pk}&amp;cursor=")
+            params = {"assigned": self.asha.pk, "cursor": page.next_cursor}
+
+        self.assertEqual(seen, expected)
+        self.assertEqual(len(seen), 4)
+
+    @mock.patch("assets.views.asset.ASSET_LIST_PAGE_SIZE", 2)
+    def test_later_pages_cost_the_same_queries(self):
+        url = reverse("asset_list")
+        self.client.get(url)  # warm the dropdown cache
+        with CaptureQueriesContext(connection) as first:
+            page = self.client.get(url).context["page"]
+        with CaptureQueriesContext(connection) as later:
+            self.client.get(url, {"cursor": page.next_cursor})
+        self.assertEqual(len(later), len(first))
+        self.assertFalse([q["sql"] for q in later if "OFFSET" in q["sql"]])
+
+
+class BulkImporterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("importer", password="pw")
+
+    def test_counts_rows_assets_and_errors(self):
+        rows = numbered(
+            [
+                sheet_row(
+                    "Asha Rao",
+                    "Laptop",
+                    "SN-1",
+                    **{"Monitor": "Dell P2419", "Monitor Serial number": "MO-1"},
+                ),
+                sheet_row("Asha Rao", "", "SN-2"),
+                sheet_row("Ravi Kumar", "Desktop", "S" * 101),
+                sheet_row("", "Desktop", "SN-3"),
+            ]
+        )
+
+        result = BulkAssetImporter(user=self.user, chunk_size=2).run(rows)
+
+        self.assertEqual(result.rows_processed, 4)
+        self.assertEqual(result.created_count, 3)
+        self.assertEqual(
+            result.errors,
+            [
+                "Row 3 missing Device",
+                "Row 4 Desktop error: serial_number is longer than 100 characters",
+            ],
+        )
+        self.assertEqual(Asset.objects.count(), 3)
+        # Names of rows that failed are still resolved; each name once
+        self.assertEqual(
+            sorted(Employee.objects.values_list("first_name", flat=True)),
+            ["Asha", "Ravi"],
+        )
+        self.assertEqual(
+            set(AssetHistory.objects.values_list("action", "performed_by")),
+            {("created", self.user.pk)},
+        )
+        self.assertEqual(AssetHistory.objects.count(), 3)
+        self.assertEqual(verify_inventory_summary(), [])
+
+    def test_values_too_long_for_their_column_are_row_errors(self):
+        rows = numbered(
+            [
+                sheet_row("Asha Rao", "Laptop", "SN-1", OS="W" * 101),
+                sheet_row(
+                    "Asha Rao", "Desktop", "SN-2", Condition="Desktop: " + "x" * 21
+                ),
+                sheet_row("Asha Rao", "Laptop", "SN-3"),
+            ]
+        )
+
+        result = BulkAssetImporter(user=self.user).run(rows)
+
+        self.assertEqual(
+            result.errors,
+            [
+                "Row 2 Laptop error: os is longer than 100 characters",
+                "Row 3 Desktop error: condition is longer than 20 characters",
+            ],
+        )
+        # the rest of the chunk is still imported
+        self.assertEqual(result.created_count, 1)
+        self.assertEqual(Asset.objects.get().serial_number, "SN-3")
+
+
+class ParallelParsingTests(TestCase):
+    ROWS = numbered(
+        [
+            sheet_row(f"Employee {n % 4}", "Laptop" if n % 5 else "", f"SN-{n}")
+            for n in range(12)
+        ]
+    )
+
+    def test_workers_parse_the_chunks_in_order(self):
+        expected = [parse_rows(chunk) for chunk in chunked(self.ROWS, 3)]
+        self.assertEqual(list(parse_in_processes(chunked(self.ROWS, 3), 2)), expected)
+
+    def test_chunks_read_before_a_failure_are_still_parsed(self):
+        def rows():
+            yield from self.ROWS[:7]
+            raise UnicodeDecodeError("utf-8", b"\xff", 0, 1, "invalid start byte")
+
+        parsed = []
+        with self.assertRaises(UnicodeDecodeError):
+            for chunk in parse_in_processes(chunked(rows(), 3), 2):
+                parsed.append(chunk)
+        # the partial last chunk is lost with the row that failed, as without workers
+        self.assertEqual([len(chunk) for chunk in parsed], [3, 3])
+
+    def test_import_with_workers_matches_a_single_process(self):
+        single = BulkAssetImporter(chunk_size=3, workers=1).run(self.ROWS)
+        snapshot = sorted(
+            Asset.objects.values_list("serial_number", "alloted_to__first_name")
+        )
+        Asset.objects.all().delete()
+
+        parallel = BulkAssetImporter(chunk_size=3, workers=2).run(self.ROWS)
+
+        self.assertEqual(parallel.errors, single.errors)
+        self.assertEqual(parallel.created_count, single.created_count)
+        self.assertEqual(
+            sorted(Asset.objects.values_list("serial_number", "alloted_to__first_name")),
+            snapshot,
+        )
+
+
+class CsvStreamTests(TestCase):
+    HEADER = "Alloted To,Device,Serial No.,Year of Purchase,Condition,REMARKS\n"
+
+    def upload(self, content, chunk_size):
+        csv_file = SimpleUploadedFile("assets.csv", content, content_type="text/csv")
+        csv_file.DEFAULT_CHUNK_SIZE = chunk_size
+        return csv_file
+
+    def test_rows_split_across_chunks_are_read_whole(self):
+        content = (
+            self.HEADER
+            + 'Ramesh Nāyar,Laptop,SN-1,2022,Laptop: Working,"first line\nsecond, line"\n'
+            + "Asha Rao,Desktop,SN-2,2021,Desktop: Working,\n"
+        ).encode()
+        # small enough to split the multi-byte character and the quoted newline
+        rows = list(iter_csv_rows(self.upload(content, chunk_size=3)))
+
+        self.assertEqual([line_num for line_num, _ in rows], [3, 4])
+        first = rows[0][1]
+        self.assertEqual(first["Alloted To"], "Ramesh Nāyar")
+        self.assertEqual(first["REMARKS"], "first line\nsecond, line")
+        self.assertEqual(rows[1][1]["Serial No."], "SN-2")
+
+    def test_decoding_error_keeps_the_chunks_already_imported(self):
+        lines = [
+            f"Asha Rao,Laptop,SN-{n},2022,Laptop: Working,\n" for n in range(1000)
+        ]
+        content = (self.HEADER + "".join(lines)).encode() + b"Asha Rao,\xff\n"
+        importer = BulkAssetImporter(chunk_size=100)
+
+        with self.assertRaises(UnicodeDecodeError):
+            importer.run(iter_csv_rows(self.upload(content, chunk_size=1024)))
+
+        imported = Asset.objects.count()
+        self.assertGreater(imported, 0)
+        self.assertEqual(imported % 100, 0)
+        self.assertEqual(importer.result.created_count, imported)
+
+
+class InventorySummaryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.laptop = AssetType.objects.create(name="Laptop")
+        cls.asha = Employee.objects.create(first_name="Asha", last_name="Rao")
+        cls.ravi = Employee.objects.create(first_name="Ravi", last_name="Kumar")
+
+    def new_asset(self, **fields):
+        return Asset.objects.create(
+            type=self.laptop, make_model="HP", year_of_purchase=2023, **fields
+        )
+
+    def test_summary_follows_creates_updates_and_deletes(self):
+        first = self.new_asset(alloted_to=self.asha)
+        second = self.new_asset(alloted_to=self.asha)
+        self.new_asset()
+        self.assertEqual(verify_inventory_summary(), [])
+        self.assertEqual(summary_counts()[(self.asha.pk, self.laptop.pk, "working")], 2)
+
+        first.alloted_to = self.ravi
+        first.save()
+        second.condition = "repair"
+        second.save()
+        self.assertEqual(verify_inventory_summary(), [])
+
+        second.delete()
+        self.assertEqual(verify_inventory_summary(), [])
+
+        self.ravi.delete()
+        self.assertEqual(verify_inventory_summary(), [])
+        self.assertEqual(summary_counts(), {(None, self.laptop.pk, "working"): 2})
+
+    def test_summary_follows_bulk_import_and_upsert(self):
+        rows = numbered([sheet_row("Asha Rao", "Laptop", "SN-1")])
+        BulkAssetImporter().run(rows)
+        self.assertEqual(verify_inventory_summary(), [])
+
+        rows = numbered([sheet_row("Ravi Kumar", "Laptop", "SN-1")])
+        BulkAssetImporter(upsert=True).run(rows)
+        self.assertEqual(verify_inventory_summary(), [])
+        # Conditions are stored as the sheet spells them
+        self.assertEqual(
+            summary_counts(), {(self.ravi.pk, self.laptop.pk, "Working"): 1}
+        )
+
+    def test_rebuild_command_repairs_a_drifted_summary(self):
+        self.new_asset(alloted_to=self.asha)
+        self.new_asset(alloted_to=self.asha)
+        # queryset updates skip the signals that keep the summary in step
+        Asset.objects.update(alloted_to=self.ravi)
+
+        out = io.StringIO()
+        with self.assertRaisesMessage(CommandError, "2 summary row(s) differ"):
+            call_command("rebuild_inventory_summary", verify=True, stdout=out)
+        self.assertIn(
+            f"employee={self.asha.pk} type={self.laptop.pk} condition='working': "
+            "summary 2, actual 0",
+            out.getvalue(),
+        )
+
+        call_command("rebuild_inventory_summary", stdout=io.StringIO())
+        self.assertEqual(summary_counts(), {(self.ravi.pk, self.laptop.pk, "working"): 2})
+        call_command("rebuild_inventory_summary", verify=True, stdout=io.StringIO())
+
+    def test_deltas_add_subtract_and_drop_empty_rows(self):
+        key = (self.asha.pk, self.laptop.pk, "working")
+        other = (None, self.laptop.pk, "damaged")
+        apply_inventory_deltas({key: 3, other: 1})
+        apply_inventory_deltas({key: -1, other: -1})
+        self.assertEqual(summary_counts(), {key: 2})
+
+
+class EmployeeRollupTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser("admin", password="pw")
+        laptop = AssetType.objects.create(name="Laptop")
+        printer = AssetType.objects.create(name="Printer")
+        cls.asha = Employee.objects.create(first_name="Asha", last_name="Rao")
+        cls.ravi = Employee.objects.create(first_name="Ravi", last_name="Kumar")
+        cls.idle = Employee.objects.create(first_name="Idle", last_name="Clerk")
+        start = timezone.make_aware(datetime(2024, 1, 1))
+        held = [
+            (cls.asha, laptop, "HP 1", "Working"),
+            (cls.asha, printer, "LaserJet", "damaged"),
+            (cls.asha, laptop, "HP 2", "under repair"),
+            (cls.asha, laptop, "HP 3", "disposed"),
+            (cls.ravi, printer, "", "Working"),
+        ]
+        for day, (employee, asset_type, make_model, condition) in enumerate(held):
+            asset = Asset.objects.create(
+                type=asset_type,
+                make_model=make_model,
+                year_of_purchase=2023,
+                alloted_to=employee,
+                condition=condition,
+            )
+            Asset.objects.filter(pk=asset.pk).update(
+                created_at=start + timedelta(days=day)
+            )
+        cls.laptop, cls.printer = laptop, printer
+
+    def test_rollups_hold_the_newest_assets_and_types(self):
+        with self.assertNumQueries(2):
+            rollups = employee_asset_rollups(
+                [self.asha.pk, self.ravi.pk, self.idle.pk]
+            )
+        self.assertEqual(
+            rollups[self.asha.pk],
+            (
+                ["HP 3", "HP 2", "LaserJet"],
+                [
+                    {"id": self.laptop.pk, "name": "Laptop"},
+                    {"id": self.printer.pk, "name": "Printer"},
+                ],
+            ),
+        )
+        self.assertEqual(
+            rollups[self.ravi.pk], (["-"], [{"id": self.printer.pk, "name": "Printer"}])
+        )
+        self.assertEqual(rollups[self.idle.pk], ([], []))
+
+    def test_counts_put_each_asset_in_one_condition(self):
+        counts = {
+            employee.pk: (
+                employee.asset_count,
+                employee.damaged_count,
+                employee.repair_count,
+                employee.disposed_count,
+            )
+            for employee in annotate_asset_counts(Employee.objects.all())
+        }
+        self.assertEqual(
+            counts,
+            {
+                self.asha.pk: (4, 1, 1, 1),
+                self.ravi.pk: (1, 0, 0, 0),
+                self.idle.pk: (0, 0, 0, 0),
+            },
+        )
+
+    def test_dashboard_queries_do_not_grow_with_employees(self):
+        self.client.force_login(self.user)
+        cache.clear()
+        self.client.get(reverse("dashboard"))
+        with CaptureQueriesContext(connection) as few:
+            self.client.get(reverse("dashboard"))
+        for n in range(10):
+            Employee.objects.create(first_name="Extra", last_name=str(n))
+        with CaptureQueriesContext(connection) as many:
+            response = self.client.get(reverse("dashboard"))
+        self.assertEqual(len(many), len(few))
+        self.assertEqual(len(response.context["employees_data"]), 13)
+
+
+class AssetSummaryCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        laptop = AssetType.objects.create(name="Laptop")
+        cls.asha = Employee.objects.create(first_name="Asha", last_name="Rao")
+        cls.first, cls.second = (
+            Asset.objects.create(
+                type=laptop, make_model="HP", year_of_purchase=2023, alloted_to=cls.asha
+            )
+            for _ in range(2)
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def counts(self, summary):
+        return (
+            summary["total_assets"],
+            summary["assigned_assets"],
+            summary["damaged_assets"],
+        )
+
+    def test_asset_writes_invalidate_the_cached_summary(self):
+        self.assertEqual(self.counts(get_asset_summary()), (2, 2, 0))
+
+        self.first.condition = "Damaged"
+        self.first.save()
+        self.assertEqual(self.counts(get_asset_summary()), (2, 2, 1))
+
+        reassign_assets(Asset.objects.filter(pk=self.second.pk), None)
+        self.assertEqual(self.counts(get_asset_summary()), (2, 1, 1))
+
+        self.first.delete()
+        self.assertEqual(self.counts(get_asset_summary()), (1, 0, 0))
+
+    async def test_async_reads_see_the_new_counts(self):
+        self.assertEqual(self.counts(await aget_asset_summary()), (2, 2, 0))
+        await sync_to_async(self.asha.delete)()
+        self.assertEqual(self.counts(await aget_asset_summary()), (2, 0, 0))
+
+    def test_other_changes_keep_the_cached_summary(self):
+        get_asset_summary()
+        self.first.remarks = "spare charger"
+        self.first.save()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.counts(get_asset_summary()), (2, 2, 0))
+
+
+class HistoryAttributionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("clerk", password="pw")
+        cls.employee = Employee.objects.create(first_name="Asha", last_name="Rao")
+        cls.asset = Asset.objects.create(
+            type=AssetType.objects.create(name="Laptop"),
+            make_model="HP",
+            year_of_purchase=2023,
+        )
+
+    def test_changes_made_acting_as_a_user_are_attributed_to_them(self):
+        with acting_as(self.user), self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                self.asset.alloted_to = self.employee
+                self.asset.save()
+
+        entry = AssetHistory.objects.get(action="assigned")
+        self.assertEqual(entry.performed_by, self.user)
+        self.assertEqual(entry.employee, self.employee)
+        self.assertIsNone(get_current_user())
+
+    def test_thread_pool_tasks_act_as_the_submitter(self):
+        with acting_as(self.user), ContextThreadPoolExecutor(max_workers=1) as pool:
+            self.assertEqual(pool.submit(get_current_user).result(), self.user)
+
+    async def test_sync_code_of_async_views_sees_the_request_user(self):
+        async def view(request):
+            return HttpResponse(str(await sync_to_async(get_current_user)()))
+
+        request = RequestFactory().get("/")
+        request.user = self.user
+        response = await CurrentUserMiddleware(view)(request)
+        self.assertEqual(response.content, b"clerk")
+        self.assertIsNone(get_current_user())
+
+        request.user = AnonymousUser()
+        response = await CurrentUserMiddleware(view)(request)
+        self.assertEqual(response.content, b"None")
+
+    def test_rolled_back_changes_leave_no_history(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                with transaction.atomic():
+                    self.asset.alloted_to = self.employee
+                    self.asset.save()
+                    transaction.set_rollback(True)
+        self.assertFalse(AssetHistory.objects.filter(action="assigned").exists())
+
+    def test_held_rows_keep_the_time_they_were_recorded(self):
+        recorded = timezone.now() - timedelta(minutes=5)
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                with mock.patch(
+                    "assets.services.history.timezone.now", return_value=recorded
+                ):
+                    self.asset.alloted_to = self.employee
+                    self.asset.save()
+            # the row is written on commit, after the clock has moved on
+        entry = AssetHistory.objects.get(action="assigned")
+        self.assertEqual(entry.timestamp, recorded)
+
+
+class KeysetPaginatorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        laptop = AssetType.objects.create(name="Laptop")
+        for n in range(5):
+            Asset.objects.create(
+                type=laptop, make_model=f"HP {n}", year_of_purchase=2023
+            )
+        # Equal timestamps, so the pages depend on the id tie-break
+        Asset.objects.update(created_at=timezone.now())
+
+    def paginator(self):
+        return KeysetPaginator(Asset.objects.all(), ("-created_at", "id"), per_page=2)
+
+    def test_cursors_walk_every_row_once_in_both_directions(self):
+        expected = list(
+            Asset.objects.order_by("-created_at", "id").values_list("id", flat=True)
+        )
+
+        pages = [self.paginator().get_page()]
+        while pages[-1].has_next:
+            pages.append(self.paginator().get_page(pages[-1].next_cursor))
+        self.assertEqual([asset.pk for page in pages for asset in page], expected)
+        self.assertEqual([len(page) for page in pages], [2, 2, 1])
+        self.assertFalse(pages[0].has_previous)
+
+        back = [pages[-1]]
+        while back[-1].has_previous:
+            back.append(self.paginator().get_page(back[-1].previous_cursor))
+        self.assertEqual(
+            [asset.pk for page in reversed(back) for asset in page], expected
+        )
+
+    def test_bad_cursor_gives_the_first_page(self):
+        first = [asset.pk for asset in self.paginator().get_page()]
+        for cursor in ("not-a-cursor", "eyJkIjoieCJ9"):
+            page = self.paginator().get_page(cursor)
+            self.assertEqual([asset.pk for asset in page], first)
+
+
+class ImportDiffTests(TestCase):
+    def test_rows_are_classified_against_the_inventory_without_writes(self):
+        BulkAssetImporter().run(
+            numbered(
+                [
+                    sheet_row("Asha Rao", "Laptop", "SN-1"),
+                    sheet_row("Asha Rao", "Laptop", "SN-2"),
+                ]
+            )
+        )
+        rows = numbered(
+            [
+                sheet_row("Asha Rao", "Laptop", "SN-1"),
+                sheet_row("Ravi Kumar", "Laptop", "SN-2"),
+                sheet_row("Asha Rao", "Laptop", "SN-3"),
+                sheet_row("Asha Rao", "Laptop", "SN-3"),
+            ]
+        )
+
+        with CaptureQueriesContext(connection) as queries:
+            diff = diff_rows(rows)
+
+        self.assertTrue(all(q["sql"].startswith("SELECT") for q in queries))
+        self.assertEqual(
+            [(entry.line_num, entry.status) for entry in diff.entries],
+            [(2, "unchanged"), (3, "changed"), (4, "new"), (5, "conflicting")],
+        )
+        self.assertEqual(
+            diff.entries[1].changes, {"alloted_to": ("Asha Rao", "Ravi Kumar")}
+        )
+        self.assertEqual(diff.new_employees, {("Ravi", "Kumar")})
+
+    def test_validate_only_upload_reports_the_diff_without_importing(self):
+        user = User.objects.create_superuser("admin", password="pw")
+        self.client.force_login(user)
+        header = "Alloted To,Device,Serial No.,PROCESSOR,Year of Purchase\r\n"
+        sheet = SimpleUploadedFile(
+            "sheet.csv", (header + "Asha Rao,Laptop,SN-1,i5,2022\r\n").encode()
+        )
+
+        response = self.client.post(
+            reverse("bulk_upload"), {"csv_file": sheet, "validate_only": "on"}
+        )
+
+        self.assertTemplateUsed(response, "assets/import_diff.html")
+        self.assertEqual(response.context["counts"]["new"], 1)
+        self.assertEqual(response.context["new_employees"], ["Asha Rao"])
+        self.assertFalse(Asset.objects.exists())
+        self.assertFalse(Employee.objects.exists())
+
+
+class BenchmarkTests(TestCase):
+    def snapshot(self):
+        return list(
+            Asset.objects.order_by("serial_number").values_list(
+                "serial_number",
+                "make_model",
+                "type__name",
+                "condition",
+                "alloted_to__last_name",
+            )
+        )
+
+    def test_the_same_seed_generates_the_same_inventory(self):
+        with transaction.atomic():
+            counts = generate_inventory(120, seed=7, batch_size=50)
+            first = self.snapshot()
+            transaction.set_rollback(True)
+
+        self.assertEqual(generate_inventory(120, seed=7, batch_size=50), counts)
+        self.assertEqual(self.snapshot(), first)
+        self.assertEqual(counts["assets"], 120)
+        self.assertEqual(counts["employees"], 15)
+        self.assertEqual(AssetHistory.objects.count(), counts["history"])
+        self.assertFalse(Asset.objects.filter(history__isnull=True).exists())
+        self.assertEqual(verify_inventory_summary(), [])
+
+    @override_settings(QUERY_STATS_LOG_QUERIES=None, QUERY_STATS_LOG_MS=None)
+    @mock.patch("assets.benchmarks.scenarios.BULK_UPLOAD_ROWS", 20)
+    def test_every_scenario_runs_against_generated_data(self):
+        generate_inventory(60, seed=1)
+        client = self.client
+        client.force_login(User.objects.create_superuser("benchmark", password="pw"))
+        data = BenchmarkData(seed=1)
+
+        for name, scenario in SCENARIOS.items():
+            with self.subTest(name):
+                result = run_scenario(scenario, client, data, repeat=1)
+                self.assertEqual(result["runs"], 1)
+                self.assertGreater(result["queries"], 0)
+
+
+class QueryPlanTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        generate_inventory(60, seed=2)
+
+    def test_main_pages_use_the_indexes(self):
+        out = io.StringIO()
+        call_command("explain_queries", fail_on_scan=True, stdout=out)
+        self.assertIn("No unexpected scans or sorts", out.getvalue())
+
+    def test_asset_list_filters_are_served_by_their_index(self):
+        assets = Asset.objects.order_by("-created_at", "id")
+        employee = Employee.objects.first()
+        queries = {
+            "asset_created_idx": assets,
+            "asset_type_created_idx": assets.filter(type=AssetType.objects.first()),
+            "asset_assignee_created_idx": assets.filter(alloted_to=employee),
+            "asset_assigned_created_idx": assets.filter(alloted_to__isnull=False),
+            "asset_serial_idx": Asset.objects.filter(serial_number="SN-1").order_by(),
+        }
+        for index, queryset in queries.items():
+            with self.subTest(index):
+                plan = queryset[:50].explain()
+                self.assertIn(index, plan)
+                self.assertNotIn("TEMP B-TREE", plan)
+
+
+class LoginRequiredMiddlewareTests(TestCase):
+    def process_view(self, path):
+        request = RequestFactory().get(path)
+        request.user = AnonymousUser()
+        request.resolver_match = None
+        return LoginRequiredMiddleware(lambda request: None).process_view(
+            request, None, (), {}
+        )
+
+    def test_anonymous_users_are_sent_to_the_login_page(self):
+        response = self.client.get(reverse("dashboard"))
+        self.assertRedirects(response, "/login/", fetch_redirect_response=False)
+        self.assertEqual(self.client.get(reverse("login")).status_code, 200)
+
+    def test_static_files_are_public_and_media_needs_a_login(self):
+        static = "/" + settings.STATIC_URL.lstrip("/")
+        self.assertIsNone(self.process_view(f"{static}app.css"))
+        response = self.process_view(f"{settings.MEDIA_URL}import_jobs/sheet.csv")
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(response.url, "/login/")
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class ImportJobTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        permission = Permission.objects.get(codename="add_asset")
+        cls.owner = User.objects.create_user("owner", password="pw")
+        cls.other = User.objects.create_user("other", password="pw")
+        cls.owner.user_permissions.add(permission)
+        cls.other.user_permissions.add(permission)
+        cls.staff = User.objects.create_user("staff", password="pw", is_staff=True)
+        cls.staff.user_permissions.add(permission)
+
+    def enqueue(self):
+        header = "Alloted To,Device,Serial No.,PROCESSOR,Year of Purchase\r\n"
+        sheet = SimpleUploadedFile(
+            "sheet.csv", (header + "Asha Rao,Laptop,SN-1,i5,2022\r\n").encode()
+        )
+        return enqueue_import(sheet, self.owner)
+
+    def test_only_the_owner_and_staff_see_a_job(self):
+        job = self.enqueue()
+        for user, status in ((self.owner, 200), (self.staff, 200), (self.other, 404)):
+            self.client.force_login(user)
+            for name in ("import_job_detail", "import_job_status"):
+                response = self.client.get(reverse(name, args=[job.pk]))
+                self.assertEqual(response.status_code, status, (user, name))
+
+    def test_uploaded_file_is_removed_when_the_job_finishes(self):
+        job = self.enqueue()
+        path = job.csv_file.path
+        self.assertTrue(os.path.exists(path))
+
+        job = run_import_job(claim_next_job())
+
+        self.assertEqual((job.status, job.created_count), ("done", 1))
+        self.assertFalse(os.path.exists(path))
+        job.refresh_from_db()
+        self.assertFalse(job.csv_file)
+
+    def test_jobs_act_as_the_user_who_queued_them(self):
+        self.enqueue()
+        run_import_job(claim_next_job())
+        self.assertEqual(
+            list(AssetHistory.objects.values_list("action", "performed_by")),
+            [("created", self.owner.pk)],
+        )
+        self.assertIsNone(get_current_user())
+
+    def test_jobs_abandoned_by_their_worker_are_failed(self):
+        self.enqueue()
+        stale = claim_next_job()
+        self.enqueue()
+        fresh = claim_next_job()
+        stale_path = stale.csv_file.path
+        ImportJob.objects.filter(pk=stale.pk).update(
+            heartbeat_at=timezone.now() - timedelta(hours=1)
+        )
+
+        out = io.StringIO()
+        call_command("run_import_jobs", "--once", stdout=out)
+
+        stale.refresh_from_db()
+        fresh.refresh_from_db()
+        self.assertEqual((stale.status, fresh.status), ("failed", "running"))
+        self.assertIn("stopped responding", stale.message)
+        self.assertIsNotNone(stale.finished_at)
+        self.assertFalse(os.path.exists(stale_path))
+        self.assertIn(f"Import job {stale.pk} failed", out.getvalue())
+
+
+def add_history(asset, action, timestamp, employee=None):
+    """Write an AssetHistory row dated ``timestamp``; returns its id."""
+    return AssetHistory.objects.create(
+        asset=asset, action=action, employee=employee, timestamp=timestamp
+    ).pk
+
+
+class HistoryArchiveTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        laptop = AssetType.objects.create(name="Laptop")
+        cls.asha = Employee.objects.create(first_name="Asha", last_name="Rao")
+        cls.ravi = Employee.objects.create(first_name="Ravi", last_name="Kumar")
+        cls.asset = Asset.objects.create(
+            type=laptop, make_model="HP", year_of_purchase=2020
+        )
+        cls.start = timezone.now() - timedelta(days=400)
+        cls.events = [
+            cls.event("created", cls.start),
+            # a quick reassignment: compacted into one "assigned" to Ravi
+            cls.event("assigned", cls.start + timedelta(minutes=1), cls.asha),
+            cls.event("transferred", cls.start + timedelta(minutes=3), cls.ravi),
+            cls.event("repaired", cls.start + timedelta(days=10), cls.ravi),
+            # recent enough to stay in the live table
+            cls.event("transferred", timezone.now() - timedelta(days=10), cls.asha),
+        ]
+
+    @classmethod
+    def event(cls, action, timestamp, employee=None):
+        pk = add_history(cls.asset, action, timestamp, employee)
+        return (pk, action, employee and employee.pk, timestamp)
+
+    def cutoff(self):
+        return timezone.now() - timedelta(days=365)
+
+    def test_archive_table_keeps_every_change_and_the_lifecycle(self):
+        result = archive_history(self.cutoff())
+
+        self.assertEqual((result.archived, result.collapsed, result.assets), (3, 1, 1))
+        self.assertEqual(
+            list(AssetHistory.objects.values_list("id", flat=True)), [self.events[4][0]]
+        )
+        archived = AssetHistoryArchive.objects.order_by("timestamp")
+        self.assertEqual(
+            [(row.action, row.employee_id, row.timestamp) for row in archived],
+            [
+                ("created", None, self.start),
+                # the run ends with the transfer to Ravi
+                ("assigned", self.ravi.pk, self.events[2][3]),
+                ("repaired", self.ravi.pk, self.events[3][3]),
+            ],
+        )
+        self.assertIn("collapsed 2 assignment changes", archived[1].remarks)
+
+        lifecycle = AssetLifecycle.objects.get(asset=self.asset)
+        self.assertEqual(
+            (
+                lifecycle.created_at,
+                lifecycle.first_event_at,
+                lifecycle.last_event_at,
+                lifecycle.assignments,
+                lifecycle.repairs,
+                lifecycle.archived_events,
+                lifecycle.collapsed_events,
+            ),
+            (self.start, self.start, self.events[3][3], 1, 1, 3, 1),
+        )
+        summary = asset_lifecycle(self.asset)
+        self.assertEqual((summary["events"], summary["assignments"]), (4, 2))
+        self.assertEqual(summary["last_event_at"], self.events[4][3])
+
+    def test_export_writes_the_archived_rows_to_monthly_files(self):
+        export_dir = tempfile.mkdtemp()
+        call_command(
+            "archive_history",
+            "--days=365",
+            "--collapse-minutes=0",
+            f"--export-dir={export_dir}",
+            stdout=io.StringIO(),
+        )
+
+        exported = []
+        for name in sorted(os.listdir(export_dir)):
+            with gzip.open(os.path.join(export_dir, name), "rt") as archive:
+                exported.extend(json.loads(line) for line in archive)
+        remaining = list(AssetHistory.objects.values_list("id", flat=True))
+
+        # without compaction, exported and remaining rows are the original rows
+        self.assertEqual(
+            sorted([row["id"] for row in exported] + remaining),
+            sorted(event[0] for event in self.events),
+        )
+        self.assertEqual(remaining, [self.events[4][0]])
+        self.assertEqual(
+            [(row["action"], row["employee_id"]) for row in exported],
+            [(action, employee) for _, action, employee, _ in self.events[:4]],
+        )
+        self.assertEqual(exported[0]["asset_tag"], str(self.asset.asset_tag))
+        self.assertFalse(AssetHistoryArchive.objects.exists())
+        self.assertEqual(
+            AssetLifecycle.objects.get(asset=self.asset).archived_events, 4
+        )
+
+    def test_failed_export_deletes_nothing(self):
+        with mock.patch("gzip.open", side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                archive_history(self.cutoff(), export_dir=tempfile.mkdtemp())
+
+        self.assertEqual(AssetHistory.objects.count(), len(self.events))
+        self.assertFalse(AssetLifecycle.objects.exists())
+
+
+class ExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user("admin", password="pw", is_staff=True)
+        asha = Employee.objects.create(first_name="Asha", last_name="Rao")
+        types = {
+            name: AssetType.objects.create(name=name)
+            for name in ("Laptop", "Desktop", "Monitor", "UPS")
+        }
+        Asset.objects.create(
+            type=types["Laptop"],
+            make_model='Core i5, 8th "Gen"',
+            serial_number="SN-1",
+            ram="8 GB",
+            os="Win-11",
+            year_of_purchase=2022,
+            condition="working",
+            remarks="Dent, lid",
+            alloted_to=asha,
+        )
+        # Asha's first monitor is the one exported
+        Asset.objects.create(
+            type=types["Monitor"],
+            make_model="HP W185",
+            serial_number="MO-1",
+            year_of_purchase=2019,
+            alloted_to=asha,
+        )
+        Asset.objects.create(
+            type=types["Monitor"],
+            make_model="Dell P2419",
+            serial_number="MO-2",
+            year_of_purchase=2021,
+            alloted_to=asha,
+        )
+        # Peripherals of nobody are not exported
+        Asset.objects.create(
+            type=types["UPS"],
+            make_model="APC",
+            serial_number="UP-1",
+            year_of_purchase=2020,
+        )
+        Asset.objects.create(type=types["Desktop"], make_model="i3", year_of_purchase=2018)
+
+    expected = [
+        [
+            "Sl.No.", "Alloted To", "Device", "Make model", "Serial No.", "PROCESSOR",
+            "RAM", "HDD", "SSD", "OS", "Year of Purchase",
+            "Monitor", "Monitor Serial number", "Monitor Year of Purchase",
+            "Keyboard and Mouse", "UPS", "UPS Serial number", "UPS Year of Purchase",
+            "Printer", "Printer Serial number", "Printer Year of Purchase",
+            "Speaker", "Condition", "REMARKS",
+        ],
+        # newest first
+        ["1", "", "Desktop", "Desktop", "", "i3", "", "", "", "", "2018"]
+        + [""] * 11
+        + ["Desktop: working", ""],
+        [
+            "2", "Asha Rao", "Laptop", "Laptop", "SN-1", 'Core i5, 8th "Gen"',
+            "8 GB", "", "", "Win-11", "2022",
+            "HP W185", "MO-1", "2019",
+            "", "", "", "", "", "", "", "",
+            "Laptop: working", "Laptop: Dent, lid",
+        ],
+    ]
+
+    def assertExported(self, response, content):
+        self.assertEqual(
+            response["Content-Disposition"], 'attachment; filename="exported_assets.csv"'
+        )
+        self.assertEqual(list(csv.reader(io.StringIO(content.decode()))), self.expected)
+
+    def test_export_streams_one_row_per_main_asset(self):
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse("export_current_data"))
+        self.assertExported(response, response.getvalue())
+
+    async def test_async_export_streams_the_same_rows(self):
+        client = AsyncClient()
+        await client.aforce_login(self.admin)
+        response = await client.get(reverse("export_current_data"))
+        content = b"".join([chunk async for chunk in response.streaming_content])
+        self.assertExported(response, content)
+
+
+@mock.patch("assets.signals.get_search_backend")
+class AssetChangeTrackingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        laptop = AssetType.objects.create(name="Laptop")
+        cls.asha = Employee.objects.create(first_name="Asha", last_name="Rao")
+        cls.asset = Asset.objects.create(
+            type=laptop, make_model="HP", year_of_purchase=2020
+        )
+
+    def test_saving_a_loaded_asset_runs_no_select(self, search_backend):
+        asset = Asset.objects.get(pk=self.asset.pk)
+        asset.remarks = "Spare"
+        with self.assertNumQueries(1):  # the UPDATE
+            asset.save()
+
+        asset.alloted_to = self.asha
+        with CaptureQueriesContext(connection) as queries:
+            with self.captureOnCommitCallbacks(execute=True):
+                asset.save()
+        self.assertFalse([q["sql"] for q in queries if q["sql"].startswith("SELECT")])
+        self.assertEqual(
+            list(AssetHistory.objects.values_list("action", "employee")),
+            [("assigned", self.asha.pk)],
+        )
+
+    def test_asset_loaded_without_tracked_fields_queries_them(self, search_backend):
+        asset = Asset.objects.only("id", "remarks").get(pk=self.asset.pk)
+        asset.remarks = "Spare"
+        with self.assertNumQueries(2):  # the tracked values, then the UPDATE
+            asset.save()
+
+        asset = Asset.objects.only("id", "condition").get(pk=self.asset.pk)
+        asset.condition = "repair"
+        with self.captureOnCommitCallbacks(execute=True):
+            asset.save()
+        self.assertEqual(
+            list(AssetHistory.objects.values_list("action", flat=True)), ["repaired"]
+        )
+        self.assertEqual(verify_inventory_summary(), [])
+
+
+class HistoryListTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("viewer", password="pw")
+        laptop = AssetType.objects.create(name="Laptop")
+        cls.asha = Employee.objects.create(first_name="Asha", last_name="Rao")
+        cls.ravi = Employee.objects.create(first_name="Ravi", last_name="Kumar")
+        asset = Asset.objects.create(type=laptop, make_model="HP", year_of_purchase=2020)
+        day = timezone.make_aware(datetime(2024, 3, 10, 12))
+        cls.created = add_history(asset, "created", day - timedelta(days=2))
+        cls.assigned = add_history(asset, "assigned", day - timedelta(days=1), cls.asha)
+        cls.transferred = add_history(asset, "transferred", day, cls.ravi)
+        cls.repaired = add_history(asset, "repaired", day + timedelta(days=1), cls.ravi)
+        cls.archived = AssetHistoryArchive.objects.create(
+            asset=asset, action="created", timestamp=day - timedelta(days=400)
+        )
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def ids(self, **params):
+        response = self.client.get(reverse("history_list"), params)
+        return [entry.pk for entry in response.context["page"]]
+
+    def test_lists_newest_first(self):
+        self.assertEqual(
+            self.ids(), [self.repaired, self.transferred, self.assigned, self.created]
+        )
+
+    def test_filters(self):
+        self.assertEqual(self.ids(action="assigned"), [self.assigned])
+        self.assertEqual(
+            self.ids(employee=self.ravi.pk), [self.repaired, self.transferred]
+        )
+        # both ends of the date range are whole days
+        self.assertEqual(
+            self.ids(date_from="2024-03-09", date_to="2024-03-10"),
+            [self.transferred, self.assigned],
+        )
+        self.assertEqual(len(self.ids(employee="bad")), 4)
+
+    def test_archived_history_is_listed_on_request(self):
+        self.assertEqual(self.ids(archived="1"), [self.archived.pk])
+
+    @mock.patch("assets.views.history.HISTORY_LIST_PAGE_SIZE", 3)
+    def test_cursor_moves_past_the_first_page(self):
+        url = reverse("history_list")
+        first = self.client.get(url).context["page"]
+        self.assertEqual(
+            [entry.pk for entry in first],
+            [self.repaired, self.transferred, self.assigned],
+        )
+
+        second = self.client.get(url, {"cursor": first.next_cursor}).context["page"]
+        self.assertEqual([entry.pk for entry in second], [self.created])
+        self.assertFalse(second.has_next)
+
+        back = self.client.get(url, {"cursor": second.previous_cursor}).context["page"]
+        self.assertEqual(list(back), list(first))
+
+
+class QueryStatsMiddlewareTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.ids = [
+            Employee.objects.create(first_name="Asha", last_name=str(n)).pk
+            for n in range(3)
+        ]
+
+    def setUp(self):
+        reset_query_stats()
+        self.request = RequestFactory().get("/employees/")
+
+    def view(self, request):
+        # the same query three times, as an N+1 loop would
+        for pk in self.ids:
+            Employee.objects.get(pk=pk)
+        return HttpResponse("ok")
+
+    def assertStats(self, response):
+        self.assertEqual(response["X-Query-Count"], "3")
+        self.assertEqual(response["X-Duplicate-Queries"], "2")
+        self.assertGreaterEqual(float(response["X-Query-Time-ms"]), 0)
+        self.assertGreaterEqual(
+            float(response["X-Response-Time-ms"]), float(response["X-Query-Time-ms"])
+        )
+        stats = query_stats()["<unresolved>"]
+        self.assertEqual((stats["requests"], stats["max_queries"]), (1, 3))
+
+    def test_headers_of_a_sync_view(self):
+        with self.assertNoLogs("common.query_stats"):
+            response = QueryStatsMiddleware(self.view)(self.request)
+        self.assertStats(response)
+
+    async def test_headers_of_an_async_view(self):
+        async def view(request):
+            return await sync_to_async(self.view)(request)
+
+        response = await QueryStatsMiddleware(view)(self.request)
+        self.assertStats(response)
+
+    @override_settings(QUERY_STATS_LOG_QUERIES=2)
+    def test_requests_over_the_query_limit_are_logged(self):
+        with self.assertLogs("common.query_stats", "WARNING") as logs:
+            QueryStatsMiddleware(self.view)(self.request)
+        [message] = logs.output
+        self.assertIn("GET /employees/ (<unresolved>): 3 queries", message)
+        self.assertIn('FROM "assets_employee"', message)
+
+
+class SettingsProfileTests(SimpleTestCase):
+    def load(self, **environ):
+        """Evaluate core/settings.py with only the given DJANGO_* variables set."""
+        environ = {
+            **{k: v for k, v in os.environ.items() if not k.startswith("DJANGO_")},
+            **environ,
+        }
+        with mock.patch.dict(os.environ, environ, clear=True):
+            return runpy.run_path(str(settings.BASE_DIR / "core" / "settings.py"))
+
+    def test_development_is_the_default(self):
+        config = self.load()
+        self.assertTrue(config["DEBUG"])
+        self.assertIn("django_browser_reload", config["INSTALLED_APPS"])
+        self.assertNotIn("CONN_MAX_AGE", config["DATABASES"]["default"])
+
+    def test_production_profile(self):
+        config = self.load(DJANGO_PROFILE="production", DJANGO_SECRET_KEY="s3cret")
+        self.assertFalse(config["DEBUG"])
+        self.assertEqual(config["SECRET_KEY"], "s3cret")
+        for app in config["DEV_APPS"]:
+            self.assertNotIn(app, config["INSTALLED_APPS"])
+        self.assertFalse(
+            [m for m in config["MIDDLEWARE"] if m.startswith("django_browser_reload")]
+        )
+        template_options = config["TEMPLATES"][0]["OPTIONS"]
+        self.assertEqual(
+            template_options["loaders"][0][0], "django.template.loaders.cached.Loader"
+        )
+        database = config["DATABASES"]["default"]
+        self.assertEqual(database["CONN_MAX_AGE"], 60)
+        self.assertEqual(database["PRAGMAS"]["journal_mode"], "WAL")
+        self.assertEqual(config["DATABASES"]["readonly"]["PRAGMAS"]["query_only"], "ON")
+        self.assertEqual(
+            config["CACHES"]["default"]["BACKEND"],
+            "django.core.cache.backends.filebased.FileBasedCache",
+        )
+
+    def test_production_needs_a_secret_key(self):
+        with self.assertRaisesMessage(ImproperlyConfigured, "DJANGO_SECRET_KEY"):
+            self.load(DJANGO_PROFILE="production")
+
+
+class SqlitePragmaTests(TestCase):
+    PRAGMAS = {"journal_mode": "WAL", "synchronous": "NORMAL", "busy_timeout": 1234}
+
+    def open(self, pragmas):
+        # a second connection to a scratch file, so connection_created fires
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        wrapper = connections["default"].__class__(
+            {
+                **connection.settings_dict,
+                "NAME": os.path.join(directory.name, "pragmas.sqlite3"),
+                "PRAGMAS": pragmas,
+            },
+            alias="pragmas",
+        )
+        wrapper.ensure_connection()
+        self.addCleanup(wrapper.close)
+        return wrapper
+
+    def pragma(self, wrapper, name):
+        with wrapper.cursor() as cursor:
+            cursor.execute(f"PRAGMA {name}")
+            return cursor.fetchone()[0]
+
+    def test_pragmas_are_applied_to_new_connections(self):
+        wrapper = self.open(self.PRAGMAS)
+        self.assertEqual(self.pragma(wrapper, "journal_mode"), "wal")
+        self.assertEqual(self.pragma(wrapper, "synchronous"), 1)  # NORMAL
+        self.assertEqual(self.pragma(wrapper, "busy_timeout"), 1234)
+
+    def test_read_only_connections_keep_the_journal_mode(self):
+        wrapper = self.open({**self.PRAGMAS, "query_only": "ON"})
+        self.assertEqual(self.pragma(wrapper, "journal_mode"), "delete")
+        self.assertEqual(self.pragma(wrapper, "query_only"), 1)
+        self.assertEqual(self.pragma(wrapper, "busy_timeout"), 1234)
+
+    def test_invalid_pragmas_are_rejected(self):
+        with self.assertRaises(ImproperlyConfigured):
+            self.open({"journal_mode": "WAL; DROP TABLE assets_asset"})
+
+
+class ReadOnlyViewRouterTests(TestCase):
+    def setUp(self):
+        self.router = ReadOnlyViewRouter()
+        self.request = RequestFactory().get("/assets/")
+
+    def routes(self, request):
+        return HttpResponse(
+            f"{self.router.db_for_read(Asset)} {self.router.db_for_write(Asset)}"
+        )
+
+    def test_read_only_views_read_from_the_readonly_alias(self):
+        with mock.patch.dict(settings.DATABASES, {"readonly": {}}):
+            response = read_only_view(self.routes)(self.request)
+            self.assertEqual(response.content, b"readonly default")
+            # the flag does not outlive the view
+            self.assertEqual(self.routes(self.request).content, b"None default")
+
+    async def test_async_read_only_views_read_from_the_readonly_alias(self):
+        async def view(request):
+            return await sync_to_async(self.routes)(request)
+
+        with mock.patch.dict(settings.DATABASES, {"readonly": {}}):
+            response = await read_only_view(view)(self.request)
+        self.assertEqual(response.content, b"readonly default")
+
+    def test_reads_stay_on_default_without_the_alias(self):
+        self.assertNotIn("readonly", settings.DATABASES)
+        response = read_only_view(self.routes)(self.request)
+        self.assertEqual(response.content, b"None default")
+
+    def test_the_readonly_alias_is_not_migrated(self):
+        with mock.patch.dict(settings.DATABASES, {"readonly": {}}):
+            self.assertFalse(self.router.allow_migrate("readonly", "assets"))
+            self.assertTrue(self.router.allow_migrate("default", "assets"))
@@ -2,6 +2,7 @@ from django.contrib.auth import views as auth_views
 from django.urls import path
 
 from .views.asset import (
+    asset_bulk_action,
     asset_create,
     asset_delete,
     asset_detail,
@@ -18,7 +19,12 @@ from .views.employee import (
     employee_list,
 )
 from .views.history import history_detail, history_list
-from .views.upload import bulk_upload, download_sample_csv
+from .views.upload import (
+    bulk_upload,
+    download_sample_csv,
+    import_job_detail,
+    import_job_status,
+)
 urlpatterns = [
     path("", dashboard, name="dashboard"),
     # Employee
@@ -29,6 +35,7 @@ urlpatterns = [
     # Asset
     path("assets/", asset_list, name="asset_list"),
     path("assets/create/", asset_create, name="asset_create"),
+    path("assets/bulk/", asset_bulk_action, name="asset_bulk_action"),
     path("assets/<int:pk>/", asset_detail, name="asset_detail"),
     path("assets/<int:pk>/edit/", asset_update, name="asset_update"),
     path("assets/<int:pk>/delete/", asset_delete, name="asset_delete"),
@@ -36,6 +43,12 @@ urlpatterns = [
     path("history/", history_list, name="history_list"),
     path("history/<int:pk>/", history_detail, name="history_detail"),
     path("bulk-upload/", bulk_upload, name="bulk_upload"),
+    path("bulk-upload/jobs/<int:pk>/", import_job_detail, name="import_job_detail"),
+    path(
+        "bulk-upload/jobs/<int:pk>/status/",
+        import_job_status,
+        name="import_job_status",
+    ),
     path("download-sample-csv/", download_sample_csv, name="download_sample_csv"),
     path("export-data/", export_current_data, name="export_current_data"),
     path("assets/<int:asset_id>/upload-document/", upload_document, name="upload_document"),
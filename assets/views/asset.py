@@ -1,11 +1,29 @@
+from asgiref.sync import sync_to_async
 from django.contrib import messages
-from django.contrib.auth.decorators import login_required
-from django.db.models import Q
-from django.http import HttpResponseForbidden, HttpResponse
+from django.contrib.auth.decorators import login_required, permission_required
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models.functions import Upper
+from django.http import HttpResponseForbidden, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
-from io import StringIO
-from ..forms.asset import AssetForm, AssetDocumentForm
-from ..models import Asset, Employee, AssetDocument
+from django.urls import reverse
+from django.utils.http import url_has_allowed_host_and_scheme
+from django.views.decorators.http import require_POST
+import csv
+from itertools import islice
+from common.db_router import read_only_view
+from common.pagination import KeysetPaginator
+from common.shortcuts import arender
+from ..forms.asset import AssetForm, AssetDocumentForm, BulkAssetActionForm
+from ..models import Asset, AssetDocument, AssetType, Employee
+from ..services.bulk_operations import (
+    deactivate_assets,
+    reassign_assets,
+    set_assets_condition,
+)
+from ..services.choices import aemployee_choices
+from ..services.csv_parsing import PERIPHERAL_TYPES
+from ..services.history_archive import asset_lifecycle
+from ..services.search import aget_search_backend, get_search_backend
 from django.forms import inlineformset_factory
 
 AssetDocumentFormSet = inlineformset_factory(
@@ -29,28 +47,30 @@ def upload_document(request, asset_id):
         form = AssetDocumentForm()
     return render(request, "assets/upload_document.html", {"form": form, "asset": asset})
 
-@login_required
-def asset_list(request):
-    """List all assets with optional search and filters."""
-    q = request.GET.get("q", "").strip()
-    type_id = request.GET.get("type")
-    assigned_id = request.GET.get("assigned")
-    status = request.GET.get("status", "")  # new status filter
+# Keyset pagination of the asset list; id breaks ties between equal created_at
+ASSET_LIST_ORDERING = ("-created_at", "id")
+ASSET_LIST_PAGE_SIZE = 50
 
-    qs = Asset.objects.select_related("type", "alloted_to").all()
+
+def filter_assets(queryset, params, search_backend=None, ranked=False):
+    """
+    Apply the asset list's search and filter parameters (q, type, assigned,
+    status). Async callers pass ``search_backend`` from aget_search_backend.
+    With ``ranked``, matches of ``q`` carry the backend's ``rank_field``.
+    """
+    q = params.get("q", "").strip()
+    type_id = params.get("type")
+    assigned_id = params.get("assigned")
+    status = params.get("status", "")
 
     if q:
-        qs = qs.filter(
-            Q(make_model__icontains=q)
-            | Q(serial_number__icontains=q)
-            | Q(type__name__icontains=q)
-            | Q(alloted_to__first_name__icontains=q)
-            | Q(alloted_to__last_name__icontains=q)
-        )
+        search_backend = search_backend or get_search_backend()
+        search = search_backend.ranked if ranked else search_backend.filter
+        queryset = search(queryset, q)
 
     if type_id:
         try:
-            qs = qs.filter(type__id=int(type_id))
+            queryset = queryset.filter(type__id=int(type_id))
         except (ValueError, TypeError):
             pass
 
@@ -58,29 +78,65 @@ def asset_list(request):
         # support assigned=true (show all assigned assets) or an employee id
         aid = str(assigned_id).lower()
         if aid in ("1", "true", "yes", "assigned"):
-            qs = qs.filter(alloted_to__isnull=False)
+            queryset = queryset.filter(alloted_to__isnull=False)
         else:
             try:
-                qs = qs.filter(alloted_to__id=int(assigned_id))
+                queryset = queryset.filter(alloted_to__id=int(assigned_id))
             except (ValueError, TypeError):
                 # invalid assigned value — ignore the filter
                 pass
 
-    # apply status/condition filter if present
+    # apply status/condition filter if present; compared in upper case rather
+    # than with iexact so the asset_condition_created_idx index applies
     if status:
-        qs = qs.filter(condition__iexact=status)
+        queryset = queryset.alias(condition_upper=Upper("condition")).filter(
+            condition_upper=status.upper()
+        )
 
-    # for building filter dropdowns
-    types = (
-        Asset.objects.select_related("type").values("type__id", "type__name").distinct()
+    return queryset
+
+
+@login_required
+@read_only_view
+async def asset_list(request):
+    """List all assets with optional search and filters."""
+    q = request.GET.get("q", "").strip()
+    type_id = request.GET.get("type")
+    assigned_id = request.GET.get("assigned")
+    status = request.GET.get("status", "")  # new status filter
+
+    search_backend = await aget_search_backend()
+    qs = filter_assets(
+        Asset.objects.select_related("type", "alloted_to"),
+        request.GET,
+        search_backend=search_backend,
+        ranked=True,
     )
-    employees = Employee.objects.all()
+
+    # search results come best match first when the backend ranks them
+    ordering = ASSET_LIST_ORDERING
+    if q and search_backend.rank_field:
+        ordering = (search_backend.rank_field, "id")
+    page = await KeysetPaginator(
+        qs, ordering, per_page=ASSET_LIST_PAGE_SIZE
+    ).aget_page(request.GET.get("cursor"))
+
+    # for building filter dropdowns
+    types = [
+        row
+        async for row in AssetType.objects.filter(inventory_summary__isnull=False)
+        .distinct()
+        .order_by("name")
+        .values("id", "name")
+    ]
+    employees = await aemployee_choices()
 
     # statuses from model choices (list of (value,label))
     statuses = Asset._meta.get_field("condition").choices
 
     context = {
-        "assets": qs,
+        "assets": page,
+        "page": page,
         "q": q,
         "type_id": type_id,
         "assigned_id": assigned_id,
@@ -88,15 +144,55 @@ def asset_list(request):
         "types": types,
         "employees": employees,
         "statuses": statuses,
+        "bulk_form": BulkAssetActionForm(employees=employees),
     }
-    return render(request, "assets/asset_list.html", context)
+    return await arender(request, "assets/asset_list.html", context)
+
+
+@login_required
+@permission_required("assets.change_asset", raise_exception=True)
+@require_POST
+def asset_bulk_action(request):
+    """Reassign, change the condition of or deactivate many assets at once."""
+    next_url = request.POST.get("next")
+    if not url_has_allowed_host_and_scheme(
+        next_url, allowed_hosts={request.get_host()}, require_https=request.is_secure()
+    ):
+        next_url = reverse("asset_list")
+
+    form = BulkAssetActionForm(request.POST)
+    if not form.is_valid():
+        for errors in form.errors.values():
+            for error in errors:
+                messages.error(request, error)
+        return redirect(next_url)
+
+    data = form.cleaned_data
+    if data["select_all"]:
+        assets = filter_assets(Asset.objects.all(), request.POST)
+    else:
+        assets = Asset.objects.filter(pk__in=data["asset_ids"])
+
+    if data["action"] == "reassign":
+        employee = None
+        if data["employee"] is not None:
+            employee = get_object_or_404(Employee, pk=data["employee"])
+        count = reassign_assets(assets, employee, data["remarks"])
+    elif data["action"] == "condition":
+        count = set_assets_condition(assets, data["condition"], data["remarks"])
+    else:
+        count = deactivate_assets(assets, data["remarks"])
+    messages.success(request, f"Updated {count} asset(s).")
+    return redirect(next_url)
 
 
 @login_required
+@read_only_view
 def asset_detail(request, pk):
     """View a single asset's details."""
     asset = get_object_or_404(Asset.objects.select_related("type", "alloted_to"), pk=pk)
-    return render(request, "assets/asset_detail.html", {"asset": asset})
+    context = {"asset": asset, "lifecycle": asset_lifecycle(asset)}
+    return render(request, "assets/asset_detail.html", context)
 
 
 @login_required
@@ -151,116 +247,154 @@ def asset_delete(request, pk):
 
     return render(request, "assets/asset_confirm_delete.html", {"asset": asset})
 
-@login_required
-def export_current_data(request):
-    if not request.user.is_staff:
-        return HttpResponseForbidden("Only admin can export data.")
+class Echo:
+    """Pseudo-buffer for csv.writer: write() hands the line back instead of storing it."""
 
-    # Define the peripheral types as used in import
-    PERIPHERAL_TYPES = ["Monitor", "Keyboard and Mouse", "UPS", "Printer", "Speaker"]
+    def write(self, value):
+        return value
 
-    header = (
-        "Sl.No.,Alloted To,Device,Make model,Serial No.,PROCESSOR,RAM,HDD,SSD,OS,Year of Purchase,"
-        "Monitor,Monitor Serial number,Monitor Year of Purchase,"
-        "Keyboard and Mouse,UPS,UPS Serial number,UPS Year of Purchase,"
-        "Printer,Printer Serial number,Printer Year of Purchase,"
-        "Speaker,Condition,REMARKS\n"
+
+EXPORT_HEADER = [
+    "Sl.No.", "Alloted To", "Device", "Make model", "Serial No.", "PROCESSOR",
+    "RAM", "HDD", "SSD", "OS", "Year of Purchase",
+    "Monitor", "Monitor Serial number", "Monitor Year of Purchase",
+    "Keyboard and Mouse", "UPS", "UPS Serial number", "UPS Year of Purchase",
+    "Printer", "Printer Serial number", "Printer Year of Purchase",
+    "Speaker", "Condition", "REMARKS",
+]
+
+
+def peripheral_rows():
+    return (
+        Asset.objects.filter(alloted_to__isnull=False, type__name__in=PERIPHERAL_TYPES)
+        .order_by("id")
+        .values_list(
+            "alloted_to_id", "type__name", "make_model", "serial_number", "year_of_purchase"
+        )
     )
-    output = StringIO()
-    output.write(header)
-
-    # Main assets are those whose type is not in peripheral types.
-    main_assets = (
-        Asset.objects.select_related("type", "alloted_to")
-        .exclude(type__name__in=PERIPHERAL_TYPES)
-        .all()
+
+
+def add_peripheral(index, employee_id, type_name, make_model, serial, year):
+    index.setdefault(
+        (employee_id, type_name),
+        (make_model or "", serial or "", str(year) if year else ""),
     )
 
-    counter = 1
-    for asset in main_assets:
-        # Alloted To: If exists, combine first and last name.
-        alloted = ""
-        if asset.alloted_to:
-            alloted = f"{asset.alloted_to.first_name} {asset.alloted_to.last_name}"
-
-        # Main asset fields:
-        # For export we use:
-        #   Device: asset.type.name
-        #   Make model: (here, we output the asset type – as per your import mapping, this field
-        #               is used for lookup and must match the import sample)
-        #   Serial No.: asset.serial_number
-        #   PROCESSOR: asset.make_model (contains processor info)
-        #   RAM, HDD, SSD, OS, Year of Purchase as stored.
-        main_device = asset.type.name if asset.type else ""
-        main_make_model = asset.type.name if asset.type else ""
-        serial_no = asset.serial_number or ""
-        processor = asset.make_model or ""
-        ram = asset.ram or ""
-        hdd = asset.hdd or ""
-        ssd = asset.ssd or ""
-        os_val = asset.os or ""
-        yop = str(asset.year_of_purchase) if asset.year_of_purchase else ""
-
-        # For Condition and REMARKS, output composite values in the format: "<AssetType>: Value"
-        condition_comp = f"{asset.type.name}: {asset.condition}" if asset.type and asset.condition else (asset.condition or "")
-        remarks_comp = f"{asset.type.name}: {asset.remarks}" if asset.type and asset.remarks else (asset.remarks or "")
-
-        # For peripherals, we try to find an asset (for the same employee) of that type.
-        peripheral_values = {}
-        if asset.alloted_to:
-            for p in PERIPHERAL_TYPES:
-                periph = (
-                    Asset.objects.filter(alloted_to=asset.alloted_to, type__name=p)
-                    .order_by("id")
-                    .first()
-                )
-                if periph:
-                    peripheral_values[p] = {
-                        "make_model": periph.make_model or "",
-                        "serial_number": periph.serial_number or "",
-                        "year": str(periph.year_of_purchase) if periph.year_of_purchase else "",
-                    }
-                else:
-                    peripheral_values[p] = {"make_model": "", "serial_number": "", "year": ""}
-        else:
-            for p in PERIPHERAL_TYPES:
-                peripheral_values[p] = {"make_model": "", "serial_number": "", "year": ""}
-
-        row = [
-            str(counter),
-            alloted,
-            main_device,
-            main_make_model,
-            serial_no,
-            processor,
-            ram,
-            hdd,
-            ssd,
-            os_val,
-            yop,
-            # Monitor
-            peripheral_values["Monitor"]["make_model"],
-            peripheral_values["Monitor"]["serial_number"],
-            peripheral_values["Monitor"]["year"],
-            # Keyboard and Mouse
-            peripheral_values["Keyboard and Mouse"]["make_model"],
-            # UPS
-            peripheral_values["UPS"]["make_model"],
-            peripheral_values["UPS"]["serial_number"],
-            peripheral_values["UPS"]["year"],
-            # Printer
-            peripheral_values["Printer"]["make_model"],
-            peripheral_values["Printer"]["serial_number"],
-            peripheral_values["Printer"]["year"],
-            # Speaker
-            peripheral_values["Speaker"]["make_model"],
-            # Condition and REMARKS for main asset
-            condition_comp,
-            remarks_comp,
-        ]
-        output.write(",".join(row) + "\n")
+
+def peripheral_index():
+    """
+    Map (employee id, peripheral type name) to the (make_model, serial_number,
+    year) of that employee's first peripheral of the type, using one query.
+    """
+    index = {}
+    for row in peripheral_rows().iterator(chunk_size=2000):
+        add_peripheral(index, *row)
+    return index
+
+
+def main_asset_rows():
+    """Main assets are those whose type is not in peripheral types."""
+    return Asset.objects.exclude(type__name__in=PERIPHERAL_TYPES).values_list(
+        "alloted_to_id", "alloted_to__first_name", "alloted_to__last_name",
+        "type__name", "serial_number", "make_model", "ram", "hdd", "ssd", "os",
+        "year_of_purchase", "condition", "remarks",
+    )
+
+
+EMPTY_PERIPHERAL = ("", "", "")
+
+
+def export_row(counter, row, peripherals):
+    """Build the export sheet row of one main asset (a main_asset_rows row)."""
+    (
+        employee_id, first_name, last_name, type_name, serial_no, processor,
+        ram, hdd, ssd, os_val, year, condition, remarks,
+    ) = row
+    # Alloted To: If exists, combine first and last name.
+    alloted = f"{first_name} {last_name}" if employee_id else ""
+
+    # For peripherals, take the first asset (for the same employee) of that type.
+    monitor, keyboard, ups, printer, speaker = (
+        peripherals.get((employee_id, p), EMPTY_PERIPHERAL)
+        if employee_id
+        else EMPTY_PERIPHERAL
+        for p in PERIPHERAL_TYPES
+    )
+
+    return [
+        counter,
+        alloted,
+        # Device and Make model both carry the asset type, which is what
+        # the import uses for the AssetType lookup
+        type_name,
+        type_name,
+        serial_no or "",
+        # PROCESSOR: make_model holds the processor info
+        processor or "",
+        ram or "",
+        hdd or "",
+        ssd or "",
+        os_val or "",
+        str(year) if year else "",
+        *monitor,
+        keyboard[0],
+        *ups,
+        *printer,
+        speaker[0],
+        # Condition and REMARKS are composite values: "<AssetType>: Value"
+        f"{type_name}: {condition}" if condition else "",
+        f"{type_name}: {remarks}" if remarks else "",
+    ]
+
+
+def export_rows():
+    """Yield the export sheet row by row, header first."""
+    yield EXPORT_HEADER
+
+    peripherals = peripheral_index()
+    for counter, row in enumerate(main_asset_rows().iterator(chunk_size=2000), start=1):
+        yield export_row(counter, row, peripherals)
+
+
+async def _aiterate(queryset, chunk_size=2000):
+    """
+    Stream ``queryset`` to async code, ``chunk_size`` rows per trip to the
+    database thread. Used instead of ``queryset.aiterator()``, which for a
+    values_list() queryset runs the query in the event loop and fails.
+    """
+    rows = queryset.iterator(chunk_size=chunk_size)
+    while chunk := await sync_to_async(list)(islice(rows, chunk_size)):
+        for row in chunk:
+            yield row
+
+
+async def aexport_rows():
+    """Async version of export_rows."""
+    yield EXPORT_HEADER
+
+    peripherals = {}
+    async for row in _aiterate(peripheral_rows()):
+        add_peripheral(peripherals, *row)
+
+    counter = 0
+    async for row in _aiterate(main_asset_rows()):
         counter += 1
+        yield export_row(counter, row, peripherals)
+
 
-    response = HttpResponse(output.getvalue(), content_type="text/csv")
+@login_required
+async def export_current_data(request):
+    user = await request.auser()
+    if not user.is_staff:
+        return HttpResponseForbidden("Only admin can export data.")
+
+    writer = csv.writer(Echo())
+    if isinstance(request, ASGIRequest):
+        # Streamed from the event loop: a slow download holds no thread
+        rows = (writer.writerow(row) async for row in aexport_rows())
+    else:
+        # A WSGI server has to buffer an async iterator; give it a sync one
+        rows = (writer.writerow(row) for row in export_rows())
+    response = StreamingHttpResponse(rows, content_type="text/csv")
     response["Content-Disposition"] = 'attachment; filename="exported_assets.csv"'
-    return response
\ No newline at end of file
+    return response
@@ -1,108 +1,82 @@
 # views/dashboard.py
-from django.db.models import Count, Prefetch, Q
-from django.shortcuts import render
+from django.core.paginator import Paginator
+from django.db.models import Q
+
+from common.db_router import read_only_view
+from common.pagination import aget_page
+from common.shortcuts import arender
 
 from assets.models import Asset, AssetHistory, Employee
+from assets.services.search import aget_search_backend
+from assets.services.summary import (
+    aemployee_asset_rollups,
+    aget_asset_summary,
+    annotate_asset_counts,
+)
+
+EMPLOYEES_PER_PAGE = 25
 
 
-def dashboard(request):
+@read_only_view
+async def dashboard(request):
     q = request.GET.get("q", "").strip()
 
-    total_assets = Asset.objects.count() or 0
-    assigned_assets = Asset.objects.filter(alloted_to__isnull=False).count() or 0
-    damaged_assets = Asset.objects.filter(condition__iexact="damaged").count() or 0
-    under_repair = Asset.objects.filter(condition__icontains="repair").count() or 0
-    disposed_assets = Asset.objects.filter(condition__icontains="disposed").count() or 0
+    summary = await aget_asset_summary()
 
     # recent history (keep if needed elsewhere)
     recent_history = AssetHistory.objects.select_related("asset", "employee").order_by(
         "-timestamp"
     )[:5]
 
-    # Build a base asset queryset (used to derive employee-related data)
-    base_asset_qs = Asset.objects.select_related("type", "alloted_to").all()
-    if q:
-        base_asset_qs = base_asset_qs.filter(
-            Q(make_model__icontains=q)
-            | Q(serial_number__icontains=q)
-            | Q(type__name__icontains=q)
-        )
-
-    # Get set of employee ids that match via assigned assets
-    asset_emp_ids = list(
-        base_asset_qs.values_list("alloted_to_id", flat=True).distinct()
-    )
     # Employee queryset: include employees whose name matches q OR who have matching assets
     employees_qs = Employee.objects.all()
     if q:
+        search_backend = await aget_search_backend()
+        matching_assets = search_backend.filter(
+            Asset.objects.filter(alloted_to__isnull=False),
+            q,
+            fields=("make_model", "serial_number", "type_name"),
+        )
         employees_qs = employees_qs.filter(
-            Q(pk__in=[i for i in asset_emp_ids if i])  # filter out None
+            Q(pk__in=matching_assets.values("alloted_to_id"))
             | Q(first_name__icontains=q)
             | Q(last_name__icontains=q)
-        ).distinct()
+        )
 
-    # determine the reverse accessor name for Asset.alloted_to dynamically
-    accessor = Asset._meta.get_field("alloted_to").remote_field.get_accessor_name()
-    employees_qs = employees_qs.prefetch_related(
-        Prefetch(accessor, queryset=Asset.objects.select_related("type"))
+    # per-employee counts are computed by the database; only the employees
+    # on the current page are turned into rows
+    # (Meta.ordering does not apply to the aggregate query, so order explicitly)
+    page = await aget_page(
+        Paginator(
+            annotate_asset_counts(employees_qs).order_by("first_name", "last_name", "id"),
+            EMPLOYEES_PER_PAGE,
+        ),
+        request.GET.get("page"),
     )
+    rollups = await aemployee_asset_rollups([emp.id for emp in page])
 
     employees_data = []
-    for idx, emp in enumerate(employees_qs, start=1):
-        # assets assigned to this employee (from prefetch) using dynamic accessor
-        assigned_assets_manager = getattr(emp, accessor, None)
-        assigned_assets_qs = (
-            list(assigned_assets_manager.all()) if assigned_assets_manager else []
-        )
-        asset_count = len(assigned_assets_qs)
-
-        # per-condition counts for this employee
-        damaged_count = 0
-        repair_count = 0
-        disposed_count = 0
-        for a in assigned_assets_qs:
-            cond = (a.condition or "").lower()
-            if cond == "damaged":
-                damaged_count += 1
-            elif "repair" in cond:
-                repair_count += 1
-            elif "disposed" in cond:
-                disposed_count += 1
-
-        # sample asset names (up to 3)
-        sample_assets = [a.make_model or "-" for a in assigned_assets_qs[:3]]
-
-        # categories assigned (unique)
-        categories = []
-        seen = set()
-        for a in assigned_assets_qs:
-            t = getattr(a, "type", None)
-            if t and t.id not in seen:
-                seen.add(t.id)
-                categories.append({"id": t.id, "name": t.name or "-"})
-
+    for idx, emp in enumerate(page, start=page.start_index()):
+        sample_assets, categories = rollups.get(emp.id, ([], []))
         employees_data.append(
             {
                 "sl": idx,
                 "id": emp.id,
                 "name": f"{emp.first_name or ''} {emp.last_name or ''}".strip() or "-",
-                "asset_count": asset_count,
+                "asset_count": emp.asset_count,
                 "sample_assets": sample_assets,
                 "categories": categories,
-                "damaged_count": damaged_count,
-                "repair_count": repair_count,
-                "disposed_count": disposed_count,
+                "damaged_count": emp.damaged_count,
+                "repair_count": emp.repair_count,
+                "disposed_count": emp.disposed_count,
             }
         )
 
     context = {
-        "total_assets": total_assets,
-        "assigned_assets": assigned_assets,
-        "damaged_assets": damaged_assets,
-        "under_repair": under_repair,
-        "disposed_assets": disposed_assets,
+        **summary,
         "recent_history": recent_history,
         "employees_data": employees_data,
+        "page": page,
         "q": q,
     }
-    return render(request, "assets/dashboard.html", context)
+    return await arender(request, "assets/dashboard.html", context)
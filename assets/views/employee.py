@@ -1,10 +1,12 @@
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
+from django.db import transaction
 from django.http import HttpResponseForbidden
 from django.shortcuts import get_object_or_404, redirect, render
 
 from ..forms.employee import EmployeeForm
-from ..models import Asset, Employee
+from ..models import Employee
+from ..services.bulk_operations import reassign_assets
 
 
 @login_required
@@ -50,9 +52,14 @@ def employee_delete(request, pk):
         return HttpResponseForbidden("You do not have permission to delete employees.")
 
     if request.method == "POST":
-        # Before deleting employee, unassign their assets and record no change here
-        Asset.objects.filter(alloted_to=employee).update(alloted_to=None)
-        employee.delete()
+        # Unassign their assets first so the history records it
+        with transaction.atomic():
+            reassign_assets(
+                employee.assets.all(),
+                None,
+                remarks=f"Unassigned: employee {employee} deleted",
+            )
+            employee.delete()
         messages.success(request, "Employee deleted and assets unassigned.")
         return redirect("employee_list")
 
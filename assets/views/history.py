@@ -1,17 +1,99 @@
+from datetime import datetime, time, timedelta
+
+from django.contrib.auth.models import User
 from django.shortcuts import get_object_or_404, render
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from common.db_router import read_only_view
+from common.pagination import KeysetPaginator
+from common.shortcuts import arender
+from ..models import AssetHistory as History, AssetHistoryArchive
+from ..services.choices import aemployee_choices
+
+# (timestamp, id) is unique and matches the history indexes
+HISTORY_LIST_ORDERING = ("-timestamp", "-id")
+HISTORY_LIST_PAGE_SIZE = 50
+
+
+def _start_of_day(value):
+    day = parse_date(value or "")
+    if day is None:
+        return None
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def filter_history(queryset, params):
+    """
+    Apply the history list's filters (asset, employee, performed_by, action,
+    date_from, date_to). Dates filter on a timestamp range rather than
+    ``timestamp__date`` so the timestamp indexes can be used.
+    """
+    for param, field in (
+        ("asset", "asset_id"),
+        ("employee", "employee_id"),
+        ("performed_by", "performed_by_id"),
+    ):
+        value = params.get(param)
+        if value:
+            try:
+                queryset = queryset.filter(**{field: int(value)})
+            except (ValueError, TypeError):
+                # invalid id — ignore the filter
+                pass
 
-from ..models import AssetHistory as History
+    action = params.get("action")
+    if action:
+        queryset = queryset.filter(action=action)
 
+    date_from = _start_of_day(params.get("date_from"))
+    if date_from:
+        queryset = queryset.filter(timestamp__gte=date_from)
 
-def history_list(request):
-    histories = History.objects.select_related(
-        "asset", "employee", "performed_by"
-    ).order_by("-timestamp")
-    return render(request, "history/list.html", {"histories": histories})
+    date_to = _start_of_day(params.get("date_to"))
+    if date_to:
+        # inclusive of the whole day
+        queryset = queryset.filter(timestamp__lt=date_to + timedelta(days=1))
 
+    return queryset
 
+
+@read_only_view
+async def history_list(request):
+    # archived history lives in its own table and is only read on request;
+    # rows exported with archive_history --export-dir are not in either table
+    archived = request.GET.get("archived") == "1"
+    model = AssetHistoryArchive if archived else History
+
+    histories = filter_history(
+        model.objects.select_related("asset__type", "employee", "performed_by"),
+        request.GET,
+    )
+    page = await KeysetPaginator(
+        histories, HISTORY_LIST_ORDERING, per_page=HISTORY_LIST_PAGE_SIZE
+    ).aget_page(request.GET.get("cursor"))
+
+    context = {
+        "histories": page,
+        "page": page,
+        "archived": archived,
+        "params": request.GET,
+        "actions": History.ACTIONS,
+        "employees": await aemployee_choices(),
+        "users": [
+            row async for row in User.objects.order_by("username").values("id", "username")
+        ],
+    }
+    return await arender(request, "history/list.html", context)
+
+
+@read_only_view
 def history_detail(request, pk):
+    archived = request.GET.get("archived") == "1"
+    model = AssetHistoryArchive if archived else History
     history = get_object_or_404(
-        History.objects.select_related("asset", "employee", "performed_by"), pk=pk
+        model.objects.select_related("asset", "employee", "performed_by"), pk=pk
+    )
+    return render(
+        request, "history/detail.html", {"history": history, "archived": archived}
     )
-    return render(request, "history/detail.html", {"history": history})
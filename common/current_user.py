@@ -1,33 +1,117 @@
-import threading
+"""
+The user the current request (or job) acts for, read by the history signals.
 
-_local = threading.local()
+The user is kept in a context variable rather than a thread-local, so it is
+seen by async views and by the sync code they call through ``sync_to_async``,
+whichever thread that runs on. Requests get it from CurrentUserMiddleware;
+code that runs outside a request (import workers, management commands,
+scripts) sets it with ``acting_as``:
+
+    with acting_as(job.created_by):
+        importer.run(rows)
+
+Plain threads start with an empty context, so work handed to a thread pool
+should go through ContextThreadPoolExecutor, whose tasks run in a copy of the
+submitter's context. Context does not cross process boundaries: processes
+should return data and leave the saving to the process that acts as the user.
+"""
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+_current_user = ContextVar("current_user", default=None)
+
+
+class _RequestUser:
+    """
+    Stands in for ``request.user`` until it is asked for. The lazy user
+    itself is not put in the context variable: asgiref inspects the values
+    of context variables when it copies them back from ``sync_to_async``,
+    which would load the user in the event loop.
+    """
+
+    __slots__ = ("request",)
+
+    def __init__(self, request):
+        self.request = request
 
 
 def set_current_user(user):
-    _local.user = user
+    """Set the current user; returns a token for ``reset_current_user``."""
+    return _current_user.set(user)
+
+
+def reset_current_user(token):
+    """Restore the user that was current before ``set_current_user`` returned ``token``."""
+    _current_user.reset(token)
 
 
 def get_current_user():
-    return getattr(_local, "user", None)
+    """Return the user being acted for, or None (also for anonymous requests)."""
+    user = _current_user.get()
+    if isinstance(user, _RequestUser):
+        user = getattr(user.request, "user", None)
+    if user is not None and not user.is_authenticated:
+        return None
+    return user
 
 
 def clear_current_user():
-    if hasattr(_local, "user"):
-        del _local.user
+    _current_user.set(None)
+
+
+@contextmanager
+def acting_as(user):
+    """Make ``user`` the current user inside the block, then restore the previous one."""
+    token = set_current_user(user)
+    try:
+        yield user
+    finally:
+        reset_current_user(token)
+
+
+class ContextThreadPoolExecutor(ThreadPoolExecutor):
+    """
+    ThreadPoolExecutor whose tasks run in a copy of the context they were
+    submitted from, so they act as the same user (and see the other context
+    variables, e.g. the read-only view flag).
+    """
+
+    def submit(self, fn, /, *args, **kwargs):
+        context = contextvars.copy_context()
+        return super().submit(context.run, fn, *args, **kwargs)
 
 
 class CurrentUserMiddleware:
     """
     Add to settings.MIDDLEWARE:
-    'assets.current_user.CurrentUserMiddleware'
+    'common.current_user.CurrentUserMiddleware'
     """
 
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
 
     def __call__(self, request):
-        # store user (may be AnonymousUser)
-        set_current_user(getattr(request, "user", None))
-        response = self.get_response(request)
-        clear_current_user()
-        return response
+        if self.async_mode:
+            return self.__acall__(request)
+        token = set_current_user(_RequestUser(request))
+        try:
+            return self.get_response(request)
+        finally:
+            reset_current_user(token)
+
+    async def __acall__(self, request):
+        token = set_current_user(_RequestUser(request))
+        try:
+            return await self.get_response(request)
+        finally:
+            reset_current_user(token)
@@ -0,0 +1,71 @@
+"""
+Send the reads of read-only views to a separate database connection.
+
+Views wrapped in ``read_only_view`` read through the READ_ONLY_DATABASE alias
+(default "readonly") when it is configured; everything else, and every write,
+uses "default". For SQLite the alias points at the same file with
+``query_only`` set, so in WAL mode the pages keep reading while an import
+holds the write lock, and any accidental write fails instead of queueing
+behind it.
+
+The flag lives in a context variable, so it also covers async views and the
+ORM calls they make through ``sync_to_async``.
+
+Add to settings:
+DATABASE_ROUTERS = ['common.db_router.ReadOnlyViewRouter']
+"""
+import functools
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+
+_read_only = ContextVar("read_only_view", default=False)
+
+
+def read_only_alias():
+    alias = getattr(settings, "READ_ONLY_DATABASE", "readonly")
+    return alias if alias in settings.DATABASES else None
+
+
+def read_only_view(view):
+    """Decorator: run ``view``'s queries on the read-only connection."""
+
+    if iscoroutinefunction(view):
+
+        @functools.wraps(view)
+        async def async_wrapper(request, *args, **kwargs):
+            token = _read_only.set(True)
+            try:
+                return await view(request, *args, **kwargs)
+            finally:
+                _read_only.reset(token)
+
+        return async_wrapper
+
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        token = _read_only.set(True)
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            _read_only.reset(token)
+
+    return wrapper
+
+
+class ReadOnlyViewRouter:
+    def db_for_read(self, model, **hints):
+        if _read_only.get():
+            return read_only_alias()
+        return None
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases are the same database
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db != read_only_alias()
@@ -1,26 +1,85 @@
+import re
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
 from django.conf import settings
 from django.shortcuts import redirect
-from django.urls import resolve
 
-EXEMPT_URLS = [
-    "login",  # name of your login URL
-    "admin:login",
-    "admin:logout",
-]
+EXEMPT_URLS = frozenset(
+    [
+        "login",  # name of your login URL
+        "admin:login",
+        "admin:logout",
+    ]
+)
+
+
+def _path_prefix(url):
+    """Return the path part of a STATIC_URL-style setting, or None for full URLs."""
+    if not url or "://" in url:
+        return None
+    return "/" + url.lstrip("/")
+
+
+def build_path_rules():
+    """
+    Return the [(compiled pattern, exempt)] rules that decide from the path
+    alone; the first pattern matching the start of the path wins.
+
+    Static files are public. Uploaded media (asset documents and import
+    sheets) always needs a login. ``settings.LOGIN_EXEMPT_PATHS`` adds
+    regular expressions of further public paths.
+    """
+    rules = []
+    media = _path_prefix(settings.MEDIA_URL)
+    if media:
+        rules.append((re.compile(re.escape(media)), False))
+    static = _path_prefix(settings.STATIC_URL)
+    if static:
+        rules.append((re.compile(re.escape(static)), True))
+    for pattern in getattr(settings, "LOGIN_EXEMPT_PATHS", ()):
+        rules.append((re.compile(pattern), True))
+    return rules
 
 
 class LoginRequiredMiddleware:
     """
     Middleware that requires a user to be authenticated to access any page.
+
+    Authenticated users are let through first. Otherwise the path is checked
+    against the rules of ``build_path_rules``, compiled once at startup, and
+    only then against EXEMPT_URLS. The check runs in ``process_view``, once
+    Django has resolved the URL for dispatch, so exempt pages are recognised
+    from ``request.resolver_match`` instead of resolving the path a second
+    time.
+
+    Add to settings.MIDDLEWARE, after AuthenticationMiddleware:
+    'common.login_required.LoginRequiredMiddleware'
     """
 
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
+        self.path_rules = build_path_rules()
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
 
     def __call__(self, request):
-        current_url = resolve(request.path_info).url_name
+        if self.async_mode:
+            return self.__acall__(request)
+        return self.get_response(request)
 
-        if not request.user.is_authenticated and current_url not in EXEMPT_URLS:
-            return redirect(settings.LOGIN_URL)
+    async def __acall__(self, request):
+        return await self.get_response(request)
 
-        return self.get_response(request)
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if request.user.is_authenticated:
+            return None
+        for pattern, exempt in self.path_rules:
+            if pattern.match(request.path_info):
+                return None if exempt else redirect(settings.LOGIN_URL)
+        if request.resolver_match.view_name in EXEMPT_URLS:
+            return None
+        return redirect(settings.LOGIN_URL)
@@ -0,0 +1,158 @@
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+class KeysetPage:
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    @property
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+
+class KeysetPaginator:
+    """
+    Seek-method paginator: pages are addressed by an opaque cursor holding the
+    ordering values of the row at the page boundary, so every page is a
+    ``WHERE (a, b) < (x, y) ORDER BY a, b LIMIT n`` lookup and page 1000 costs
+    the same as page 1.
+
+    ``ordering`` must end with a unique field (usually the primary key); it
+    may also name annotations of the queryset.
+    Example usage:
+        page = KeysetPaginator(qs, ("-created_at", "id")).get_page(request.GET.get("cursor"))
+    """
+
+    def __init__(self, queryset, ordering, per_page=50):
+        self.queryset = queryset
+        self.ordering = list(ordering)
+        self.per_page = per_page
+        self.fields = [self._ordering_field(name.lstrip("-")) for name in self.ordering]
+
+    def _ordering_field(self, name):
+        """Return the model field or annotation output field the cursor stores."""
+        annotation = self.queryset.query.annotations.get(name)
+        if annotation is None:
+            return self.queryset.model._meta.get_field(name)
+        # an unbound copy named after the annotation, so value_to_string
+        # reads the annotated attribute
+        field = annotation.output_field.clone()
+        field.set_attributes_from_name(name)
+        return field
+
+    def get_page(self, cursor=None):
+        """Return the KeysetPage for ``cursor``; a missing or bad cursor gives the first page."""
+        direction, values, qs = self._page_queryset(cursor)
+        return self._make_page(list(qs), direction, values)
+
+    async def aget_page(self, cursor=None):
+        """Async version of get_page."""
+        direction, values, qs = self._page_queryset(cursor)
+        return self._make_page([row async for row in qs], direction, values)
+
+    def _page_queryset(self, cursor):
+        direction, values = self.decode_cursor(cursor)
+        qs = self.queryset
+        if values is None:
+            direction = "next"
+            qs = qs.order_by(*self.ordering)
+        elif direction == "next":
+            qs = qs.filter(self._seek(values, forward=True)).order_by(*self.ordering)
+        else:
+            qs = qs.filter(self._seek(values, forward=False)).order_by(
+                *self._reversed_ordering()
+            )
+        return direction, values, qs[: self.per_page + 1]
+
+    def _make_page(self, rows, direction, values):
+        has_more = len(rows) > self.per_page
+        rows = rows[: self.per_page]
+        if direction == "previous":
+            rows.reverse()
+
+        if not rows:
+            return KeysetPage(rows)
+        if direction == "next":
+            has_next, has_previous = has_more, values is not None
+        else:
+            has_next, has_previous = True, has_more
+        return KeysetPage(
+            rows,
+            next_cursor=self.encode_cursor("next", rows[-1]) if has_next else None,
+            previous_cursor=(
+                self.encode_cursor("previous", rows[0]) if has_previous else None
+            ),
+        )
+
+    def encode_cursor(self, direction, obj):
+        values = [field.value_to_string(obj) for field in self.fields]
+        payload = json.dumps({"d": direction, "v": values}, separators=(",", ":"))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+    def decode_cursor(self, cursor):
+        if not cursor:
+            return "next", None
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            direction = payload["d"]
+            values = [
+                field.to_python(value) for field, value in zip(self.fields, payload["v"])
+            ]
+        except (ValueError, TypeError, KeyError, ValidationError):
+            return "next", None
+        if direction not in ("next", "previous") or len(values) != len(self.fields):
+            return "next", None
+        return direction, values
+
+    def _seek(self, values, forward):
+        """
+        Build ``(a, b, c) > (x, y, z)`` for the ordering as
+        ``a > x OR (a = x AND b > y) OR (a = x AND b = y AND c > z)``,
+        with each comparison flipped for descending fields.
+        """
+        condition = Q()
+        equal = {}
+        for name, value in zip(self.ordering, values):
+            field = name.lstrip("-")
+            descending = name.startswith("-")
+            lookup = "lt" if descending == forward else "gt"
+            condition |= Q(**equal, **{f"{field}__{lookup}": value})
+            equal[field] = value
+        return condition
+
+    def _reversed_ordering(self):
+        return [name[1:] if name.startswith("-") else f"-{name}" for name in self.ordering]
+
+
+async def aget_page(paginator, number):
+    """
+    Async version of ``paginator.get_page(number)`` for a Paginator over a
+    queryset: the count and the rows of the page are read with the async ORM,
+    so the returned Page runs no queries when it is used.
+    """
+    # Paginator.count is a cached_property; setting it skips the sync count()
+    paginator.count = await paginator.object_list.acount()
+    page = paginator.get_page(number)
+    page.object_list = [obj async for obj in page.object_list]
+    return page
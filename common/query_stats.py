@@ -0,0 +1,224 @@
+"""
+Per-request SQL instrumentation.
+
+QueryStatsMiddleware counts the queries each request runs, their total time
+and the queries repeated with the same SQL (differing only in parameters,
+the usual sign of an N+1 loop), and adds them to the response as headers:
+
+    X-Query-Count, X-Query-Time-ms, X-Duplicate-Queries, X-Response-Time-ms
+
+The numbers are also kept per view name for the last
+``settings.QUERY_STATS_WINDOW`` requests of this process, which staff can
+read from ``query_stats_view``. Requests that run more than
+``settings.QUERY_STATS_LOG_QUERIES`` queries or take more than
+``settings.QUERY_STATS_LOG_MS`` milliseconds are logged as warnings on the
+"common.query_stats" logger, with their most repeated queries.
+
+Queries run while a streaming response is being sent happen after the
+middleware has returned and are not counted.
+
+The request's recorder is found through a context variable by an execute
+wrapper installed on every connection when it is opened, so the queries an
+async view runs through ``sync_to_async``, on another thread's connection,
+are counted too. The receiver is connected when this module is imported
+(see assets.apps.AssetsConfig.ready).
+"""
+import logging
+import re
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import JsonResponse
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_samples = defaultdict(deque)
+_recorder = ContextVar("query_recorder", default=None)
+
+_PARAM_LIST = re.compile(r"\(\s*%s(?:\s*,\s*%s)*\s*\)")
+_ROW_LIST = re.compile(r"\(%s, \.\.\.\)(?:, \(%s, \.\.\.\))+")
+_NUMBER = re.compile(r"\b\d+\b")
+_SPACE = re.compile(r"\s+")
+
+
+def fingerprint(sql):
+    """Normalise ``sql`` so queries differing only in their values compare equal."""
+    sql = _PARAM_LIST.sub("(%s, ...)", sql)
+    sql = _ROW_LIST.sub("(%s, ...), ...", sql)
+    sql = _NUMBER.sub("N", sql)
+    return _SPACE.sub(" ", sql).strip()
+
+
+class QueryRecorder:
+    """Database execute wrapper that counts and times the queries it sees."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            self.fingerprints[fingerprint(sql)] += 1
+
+    def duplicates(self):
+        """Return [(fingerprint, times), ...] of the queries run more than once."""
+        return [(sql, n) for sql, n in self.fingerprints.most_common() if n > 1]
+
+
+def _record_query(execute, sql, params, many, context):
+    recorder = _recorder.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    return recorder(execute, sql, params, many, context)
+
+
+@receiver(connection_created)
+def install_query_recorder(sender, connection, **kwargs):
+    # connection_created is sent again when a closed connection reconnects
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+def record_sample(view_name, sample):
+    window = getattr(settings, "QUERY_STATS_WINDOW", 100)
+    with _lock:
+        samples = _samples[view_name]
+        samples.append(sample)
+        while len(samples) > window:
+            samples.popleft()
+
+
+def query_stats():
+    """Return {view_name: stats} summarising the samples kept for each view."""
+    with _lock:
+        snapshot = {name: list(samples) for name, samples in _samples.items()}
+
+    stats = {}
+    for name, samples in snapshot.items():
+        duplicates = Counter()
+        for sample in samples:
+            duplicates.update(dict(sample["duplicates"]))
+        n = len(samples)
+        stats[name] = {
+            "requests": n,
+            "avg_queries": round(sum(s["queries"] for s in samples) / n, 1),
+            "max_queries": max(s["queries"] for s in samples),
+            "avg_db_ms": round(sum(s["db_ms"] for s in samples) / n, 1),
+            "max_db_ms": round(max(s["db_ms"] for s in samples), 1),
+            # time outside the database: view code and template rendering
+            "avg_render_ms": round(
+                sum(s["total_ms"] - s["db_ms"] for s in samples) / n, 1
+            ),
+            "avg_total_ms": round(sum(s["total_ms"] for s in samples) / n, 1),
+            "max_total_ms": round(max(s["total_ms"] for s in samples), 1),
+            "duplicate_queries": duplicates.most_common(5),
+        }
+    return stats
+
+
+def reset_query_stats():
+    with _lock:
+        _samples.clear()
+
+
+class QueryStatsMiddleware:
+    """
+    Add to settings.MIDDLEWARE, as early as possible so the queries of the
+    other middleware are counted too:
+    'common.query_stats.QueryStatsMiddleware'
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        recorder = QueryRecorder()
+        token = _recorder.set(recorder)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _recorder.reset(token)
+        self.report(request, response, recorder, start)
+        return response
+
+    async def __acall__(self, request):
+        recorder = QueryRecorder()
+        token = _recorder.set(recorder)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _recorder.reset(token)
+        self.report(request, response, recorder, start)
+        return response
+
+    def report(self, request, response, recorder, start):
+        """Add the headers, keep the sample and log the request if it is slow."""
+        total_ms = (time.perf_counter() - start) * 1000
+        db_ms = recorder.duration * 1000
+        duplicates = recorder.duplicates()
+
+        response["X-Query-Count"] = str(recorder.count)
+        response["X-Query-Time-ms"] = f"{db_ms:.1f}"
+        response["X-Duplicate-Queries"] = str(sum(n - 1 for _, n in duplicates))
+        response["X-Response-Time-ms"] = f"{total_ms:.1f}"
+
+        match = getattr(request, "resolver_match", None)
+        view_name = match.view_name if match else "<unresolved>"
+        record_sample(
+            view_name,
+            {
+                "queries": recorder.count,
+                "db_ms": db_ms,
+                "total_ms": total_ms,
+                "duplicates": duplicates[:5],
+            },
+        )
+
+        max_queries = getattr(settings, "QUERY_STATS_LOG_QUERIES", None)
+        max_ms = getattr(settings, "QUERY_STATS_LOG_MS", None)
+        if (max_queries is not None and recorder.count > max_queries) or (
+            max_ms is not None and total_ms > max_ms
+        ):
+            logger.warning(
+                "%s %s (%s): %d queries, %.1f ms in the database, %.1f ms total; "
+                "most repeated: %s",
+                request.method,
+                request.path,
+                view_name,
+                recorder.count,
+                db_ms,
+                total_ms,
+                duplicates[:3] or "none",
+            )
+
+
+@staff_member_required
+def query_stats_view(request):
+    """Rolling per-view query statistics of this process, as JSON."""
+    return JsonResponse(
+        {"window": getattr(settings, "QUERY_STATS_WINDOW", 100), "views": query_stats()}
+    )
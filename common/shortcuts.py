@@ -0,0 +1,15 @@
+from asgiref.sync import sync_to_async
+from django.shortcuts import render
+
+
+async def arender(request, template_name, context=None):
+    """
+    ``render`` for async views. Templates read the session and the user, which
+    are loaded with sync queries, so the template is rendered in a thread.
+    ``request.user`` is first replaced with the user ``request.auser()`` has
+    loaded (login_required already did), which Django would otherwise load a
+    second time.
+    """
+    if hasattr(request, "auser"):
+        request.user = await request.auser()
+    return await sync_to_async(render)(request, template_name, context)
@@ -0,0 +1,47 @@
+"""
+Connection setup for SQLite.
+
+Every new SQLite connection whose DATABASES entry has a "PRAGMAS" dict gets
+those pragmas applied, in order, before it is used, e.g.:
+
+    "PRAGMAS": {"journal_mode": "WAL", "synchronous": "NORMAL", "busy_timeout": 5000}
+
+``journal_mode`` is stored in the database file, so it is skipped on
+read-only connections ("query_only" set), which could not change it anyway.
+
+The receiver is connected when this module is imported (see
+assets.apps.AssetsConfig.ready).
+"""
+import re
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+_NAME = re.compile(r"^[a-z_]+$")
+_VALUE = re.compile(r"^-?\w+$")
+
+
+def pragma_statements(pragmas):
+    """Return the PRAGMA statements for ``pragmas``, checking names and values."""
+    statements = []
+    for name, value in pragmas.items():
+        value = str(value)
+        if not _NAME.match(name) or not _VALUE.match(value):
+            raise ImproperlyConfigured(f"Invalid SQLite pragma {name}={value!r}")
+        statements.append(f"PRAGMA {name} = {value}")
+    return statements
+
+
+@receiver(connection_created)
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    if connection.vendor != "sqlite":
+        return
+    pragmas = dict(connection.settings_dict.get("PRAGMAS") or {})
+    if not pragmas:
+        return
+    if str(pragmas.get("query_only", "")).upper() in ("1", "ON", "TRUE"):
+        pragmas.pop("journal_mode", None)
+    with connection.cursor() as cursor:
+        for statement in pragma_statements(pragmas):
+            cursor.execute(statement)
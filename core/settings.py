@@ -12,20 +12,45 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 import os
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
 
-# Quick-start development settings - unsuitable for production
+# Settings profile: "development" (the default) or "production", chosen with
+# the DJANGO_PROFILE environment variable. The production profile turns off
+# DEBUG (which keeps every executed query in memory), drops the dev-only apps,
+# middleware and URLs, caches compiled templates, keeps database connections
+# open between requests and uses a cache shared by the worker processes.
+# docs/production-profile-benchmark.md compares the two with run_benchmarks.
+PROFILE = os.environ.get("DJANGO_PROFILE", "development")
+PRODUCTION = PROFILE == "production"
+
+
+def env_list(name, default=""):
+    """Split a comma-separated environment variable into a list."""
+    items = os.environ.get(name, default).split(",")
+    return [item.strip() for item in items if item.strip()]
+
+
 # See https://docs.djangoproject.com/en/5.2/howto/deployment/checklist/
 
 # SECURITY WARNING: keep the secret key used in production secret!
-SECRET_KEY = "django-insecure-^z2@m@oltq$!x+rkgk*#ix(cctn(vz0&x#lgp=8c7d5*jmd^8n"
+if PRODUCTION:
+    SECRET_KEY = os.environ.get("DJANGO_SECRET_KEY")
+    if not SECRET_KEY:
+        raise ImproperlyConfigured(
+            "DJANGO_SECRET_KEY must be set when DJANGO_PROFILE=production"
+        )
+else:
+    SECRET_KEY = "django-insecure-^z2@m@oltq$!x+rkgk*#ix(cctn(vz0&x#lgp=8c7d5*jmd^8n"
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = os.environ.get("DJANGO_DEBUG", "0" if PRODUCTION else "1") == "1"
 
-ALLOWED_HOSTS = []
+ALLOWED_HOSTS = env_list("DJANGO_ALLOWED_HOSTS")
+CSRF_TRUSTED_ORIGINS = env_list("DJANGO_CSRF_TRUSTED_ORIGINS")
 
 
 # Application definition
@@ -43,19 +68,32 @@ INSTALLED_APPS = [
     "django_browser_reload",
     "widget_tweaks",
 ]
+# Development tooling; the production profile leaves it out
+DEV_APPS = ["tailwind", "django_browser_reload"]
 
 MIDDLEWARE = [
+    "common.query_stats.QueryStatsMiddleware",
     "django_browser_reload.middleware.BrowserReloadMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "common.login_required.LoginRequiredMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "common.current_user.CurrentUserMiddleware",
+    "assets.services.history.HistoryBufferMiddleware",
 ]
 
+if PRODUCTION:
+    INSTALLED_APPS = [app for app in INSTALLED_APPS if app not in DEV_APPS]
+    MIDDLEWARE = [
+        middleware
+        for middleware in MIDDLEWARE
+        if middleware != "django_browser_reload.middleware.BrowserReloadMiddleware"
+    ]
+
 ROOT_URLCONF = "core.urls"
 
 TEMPLATES = [
@@ -73,18 +111,111 @@ TEMPLATES = [
     },
 ]
 
+if PRODUCTION:
+    # Parse each template once per process
+    TEMPLATES[0]["APP_DIRS"] = False
+    TEMPLATES[0]["OPTIONS"]["loaders"] = [
+        (
+            "django.template.loaders.cached.Loader",
+            [
+                "django.template.loaders.filesystem.Loader",
+                "django.template.loaders.app_directories.Loader",
+            ],
+        )
+    ]
+
 WSGI_APPLICATION = "core.wsgi.application"
 
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+# DJANGO_DB_ENGINE=postgresql selects PostgreSQL, configured with the
+# DJANGO_DB_NAME / _USER / _PASSWORD / _HOST / _PORT variables
+if os.environ.get("DJANGO_DB_ENGINE") == "postgresql":
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.postgresql",
+            "NAME": os.environ.get("DJANGO_DB_NAME", "it_asset_management"),
+            "USER": os.environ.get("DJANGO_DB_USER", ""),
+            "PASSWORD": os.environ.get("DJANGO_DB_PASSWORD", ""),
+            "HOST": os.environ.get("DJANGO_DB_HOST", ""),
+            "PORT": os.environ.get("DJANGO_DB_PORT", ""),
+        }
+    }
+else:
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": BASE_DIR / "db.sqlite3",
+        }
+    }
+
+# SQLite performance mode, on in production and with DJANGO_SQLITE_PERFORMANCE=1.
+# common.sqlite applies these pragmas to every new connection. WAL lets
+# readers run alongside a writer and NORMAL syncs at checkpoints instead of on
+# every commit, which is safe in WAL mode. busy_timeout (ms) makes a writer
+# wait for the lock instead of failing with "database is locked", and
+# IMMEDIATE transactions take the write lock up front, so a transaction
+# never fails trying to upgrade a read lock that another writer blocks.
+SQLITE_PERFORMANCE = DATABASES["default"]["ENGINE"].endswith("sqlite3") and (
+    os.environ.get("DJANGO_SQLITE_PERFORMANCE", "1" if PRODUCTION else "0") == "1"
+)
+if SQLITE_PERFORMANCE:
+    DATABASES["default"]["OPTIONS"] = {"transaction_mode": "IMMEDIATE"}
+    DATABASES["default"]["PRAGMAS"] = {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "busy_timeout": int(os.environ.get("DJANGO_SQLITE_BUSY_TIMEOUT", "5000")),
+        "mmap_size": 256 * 1024 * 1024,
+        "cache_size": -20000,  # negative: KiB, i.e. about 20 MB per connection
+        "temp_store": "MEMORY",
+    }
+
+if PRODUCTION:
+    # Seconds a connection is kept open for the next request (0 closes it
+    # after every request, as in development)
+    DATABASES["default"]["CONN_MAX_AGE"] = int(
+        os.environ.get("DJANGO_CONN_MAX_AGE", "60")
+    )
+    DATABASES["default"]["CONN_HEALTH_CHECKS"] = True
+
+# Read-only connection used by the views wrapped in
+# common.db_router.read_only_view, so listing pages keep reading while an
+# import is writing. With SQLite it is the same file opened with query_only.
+if SQLITE_PERFORMANCE and os.environ.get("DJANGO_SQLITE_READ_CONNECTION", "1") == "1":
+    DATABASES["readonly"] = {
+        **DATABASES["default"],
+        "OPTIONS": {},
+        "PRAGMAS": {**DATABASES["default"]["PRAGMAS"], "query_only": "ON"},
+        "TEST": {"MIRROR": "default"},
+    }
+READ_ONLY_DATABASE = "readonly"
+DATABASE_ROUTERS = ["common.db_router.ReadOnlyViewRouter"]
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Development uses the per-process default. In production the dashboard
+# counts and dropdown choices are invalidated across workers, so the cache
+# must be shared: Redis when DJANGO_REDIS_URL is set, else files on disk.
+
+if os.environ.get("DJANGO_REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.environ["DJANGO_REDIS_URL"],
+        }
+    }
+elif PRODUCTION:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": os.environ.get(
+                "DJANGO_CACHE_DIR", str(BASE_DIR / ".django_cache")
+            ),
+        }
     }
-}
 
 
 # Password validation
@@ -111,6 +242,8 @@ INTERNAL_IPS = [
 ]
 
 LOGIN_URL = "/login/"
+# Regular expressions of further paths LoginRequiredMiddleware leaves public
+LOGIN_EXEMPT_PATHS = []
 LOGIN_REDIRECT_URL = "/"
 LOGOUT_REDIRECT_URL = "/login/"
 # Internationalization
@@ -131,8 +264,39 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'asset_documents')
 # https://docs.djangoproject.com/en/5.2/howto/static-files/
 
 STATIC_URL = "static/"
+STATIC_ROOT = os.environ.get("DJANGO_STATIC_ROOT", str(BASE_DIR / "staticfiles"))
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
+
+# Bulk CSV import: number of rows inserted and committed per transaction
+BULK_IMPORT_CHUNK_SIZE = 500
+# Processes that parse the sheet while the importer writes; 1 parses inline.
+# Parsing is a small share of an import and spawning workers costs more than
+# it saves on small hosts: on one core, parsing 20,000 rows took 0.37 s
+# inline and 1.26 s with 2 workers. Raise it only on multi-core hosts.
+BULK_IMPORT_WORKERS = 1
+# Queue uploads for the import worker (python manage.py run_import_jobs)
+# instead of importing them inside the request
+BULK_UPLOAD_ASYNC = True
+# Seconds a running import job may go without progress before
+# run_import_jobs fails it as abandoned by a crashed worker
+IMPORT_JOB_STALE_AFTER = 30 * 60
+
+# Dotted path of the asset search backend. None picks SQLite FTS5 when the
+# index exists, else assets.services.search.LikeSearchBackend
+ASSET_SEARCH_BACKEND = None
+
+# Seconds the dashboard's headline counts may be served from cache. Saves
+# invalidate them immediately; the timeout bounds staleness in other
+# processes when the cache backend is per-process
+ASSET_SUMMARY_CACHE_TIMEOUT = 300
+
+# Per-request query instrumentation (common.query_stats): number of recent
+# requests kept per view for /query-stats/, and the query count and response
+# time in milliseconds above which a request is logged. None disables a limit
+QUERY_STATS_WINDOW = 100
+QUERY_STATS_LOG_QUERIES = 50
+QUERY_STATS_LOG_MS = 1000
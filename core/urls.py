@@ -20,10 +20,15 @@ from django.urls import include, path
 from django.conf.urls.static import static
 from django.conf import settings
 
+from common.query_stats import query_stats_view
+
 urlpatterns = [
     path("admin/", admin.site.urls),
-    path("__reload__/", include("django_browser_reload.urls")),  # ✅ Add this line
+    path("query-stats/", query_stats_view, name="query_stats"),
     path("", include("assets.urls")),
 ]
 
+if "django_browser_reload" in settings.INSTALLED_APPS:
+    urlpatterns.insert(1, path("__reload__/", include("django_browser_reload.urls")))
+
 urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file